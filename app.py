@@ -1,22 +1,65 @@
 from aiogram import executor
+from data import config
 from loader import dp, db
 import middlewares, filters, handlers
-from utils.notify_admins import on_startup_notify
-from utils.set_bot_commands import set_default_commands
+from utils.notify_admins import on_startup_notify, wait_notifications
+from utils.scheduler import start_scheduler, stop_scheduler
+from utils.claim_timeouts import start_claim_timeouts, stop_claim_timeouts
+from utils.webhook import start_webhook
+from utils.outbox import stop_outbox
+from utils.channel_posts import flush_posts
+from utils.db_api.stats_rollup import schedule_reconciliation
+from utils.startup import run_startup
+from utils.sharding import is_primary, run_sharded
 from handlers.users.departure import initialize_departure_module
+from handlers.users.delivery import initialize_delivery_module
 
 
 async def on_startup(dispatcher):
     """Bot ishga tushganda Prisma client’ni bog‘lash"""
-    await initialize_departure_module()
-    await set_default_commands(dispatcher)
-    await db.connect()  # **Barcha joylar uchun bitta ulanish!**
-    await on_startup_notify(dispatcher)
+    # Avval db.connect (**barcha joylar uchun bitta ulanish!**), keyin isitish -
+    # updatelarni qabul qilish shundan keyin boshlanadi
+    # Sharded rejimda processing buyurtmalar muddatini tiklash va adminlarga xabar faqat birinchi ishchida
+    await run_startup(dispatcher, {
+        "departure_cleanup": initialize_departure_module,
+        "delivery_cleanup": initialize_delivery_module
+    } if is_primary() else None)
+    start_scheduler()  # Bazadagi eslatma va bekor qilish vazifalari
+    await schedule_reconciliation()  # Statistika jadvalini davriy tekshirish
+    start_claim_timeouts()  # Haydovchi band qilgan buyurtmalar muddati
+    if is_primary():
+        await on_startup_notify(dispatcher)
 
 async def on_shutdown(dispatcher):
     """Bot o‘chirilganda Prisma client’ni uzish"""
+    await stop_scheduler()
+    await stop_claim_timeouts()
+    await flush_posts()  # Oynada kutayotgan kanal tahrirlari
+    await wait_notifications()
+    await stop_outbox()
     await db.disconnect()  # **Bot o‘chirilganda ulanish uziladi**
 
 if __name__ == '__main__':
-    executor.start_polling(dp, on_startup=on_startup, on_shutdown=on_shutdown, skip_updates=True)
+    if config.BOT_MODE == "webhook":
+        start_webhook(
+            dp,
+            webhook_url=f"{config.WEBHOOK_HOST}{config.WEBHOOK_PATH}",
+            path=config.WEBHOOK_PATH,
+            host=config.WEBAPP_HOST,
+            port=config.WEBAPP_PORT,
+            workers=config.WEBHOOK_WORKERS,
+            queue_size=config.WEBHOOK_QUEUE_SIZE,
+            ssl_cert=config.WEBHOOK_SSL_CERT or None,
+            ssl_key=config.WEBHOOK_SSL_KEY or None,
+            secret_token=config.WEBHOOK_SECRET or None,
+            allowed_updates=config.ALLOWED_UPDATES,
+            on_startup=on_startup,
+            on_shutdown=on_shutdown
+        )
+    elif config.BOT_MODE == "sharded":
+        run_sharded(config.BOT_TOKEN, config.SHARD_WORKERS, on_startup, on_shutdown, config.SHARD_CONCURRENCY,
+                    allowed_updates=config.ALLOWED_UPDATES, skip_updates=config.SKIP_UPDATES)
+    else:
+        executor.start_polling(dp, on_startup=on_startup, on_shutdown=on_shutdown, skip_updates=config.SKIP_UPDATES,
+                               allowed_updates=config.ALLOWED_UPDATES)
 
@@ -0,0 +1,102 @@
+"""Buyurtmani haydovchi olishi (claim) benchmarki.
+
+Bir nechta haydovchi bir vaqtda bitta buyurtmani olishga urinadi. Eski usul
+(``find_unique`` -> holatni tekshirish -> ``update`` -> ``find_unique``) va
+``claim`` o'tishidagi compare-and-set so'rovi solishtiriladi: har bir
+buyurtmani nechta haydovchi "yutgani" va yutgan bosish kechikishi.
+Baza sxemasi ``prisma migrate deploy`` bilan tayyorlangan bo'lishi kerak.
+Loyiha ildizidan (.env bilan):
+
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.claim_bench --orders 200 --drivers 8
+
+Diqqat: benchmark jadvallarni tozalaydi - ishchi bazada ishga tushirmang.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from prisma import Prisma
+
+from utils.db_api.lifecycle import TRANSITION_SQL, TRANSITIONS
+from utils.db_api.orders import CLAIM_INCLUDE
+
+SEED_SQL = [
+    'TRUNCATE "OrderStatus", "Order", "District", "Region", "User" RESTART IDENTITY CASCADE',
+    '''INSERT INTO "Region" ("name", "updatedAt") VALUES ('Viloyat', NOW())''',
+    '''INSERT INTO "District" ("name", "regionId", "updatedAt") VALUES ('Tuman', 1, NOW())''',
+    '''INSERT INTO "User" ("firstName", "lastName", "telegramId", "phoneNumber", "role", "updatedAt")
+       SELECT 'Foydalanuvchi', '' || i, 100000 + i, '+998900000000',
+              (CASE WHEN i = 1 THEN 'PASSENGER' ELSE 'DRIVER' END)::"Role", NOW()
+       FROM generate_series(1, {drivers} + 1) i''',
+    '''INSERT INTO "Order" ("passengerId", "fromRegionId", "fromDistrictId", "toRegionId", "toDistrictId",
+                          "passengers", "departureTime", "updatedAt")
+       SELECT 1, 1, 1, 1, 1, 2, NOW() + INTERVAL '1 day', NOW() FROM generate_series(1, {orders})''',
+    '''INSERT INTO "OrderStatus" ("status", "userId", "orderId", "updatedAt")
+       SELECT 'initiated', 1, "id", NOW() FROM "Order"''',
+]
+
+RESET_SQL = '''UPDATE "OrderStatus" SET "status" = 'initiated', "userId" = 1'''
+
+
+async def legacy_claim(db: Prisma, order_id: int, driver_id: int) -> bool:
+    """Avvalgi handler mantig'i: o'qish, tekshirish, yozish, qayta o'qish"""
+    order = await db.order.find_unique(where={"id": order_id}, include=CLAIM_INCLUDE)
+    if not order or order.status.status != "initiated":
+        return False
+    await db.orderstatus.update(where={"orderId": order_id}, data={"status": "processing", "userId": driver_id})
+    await db.order.find_unique(where={"id": order_id}, include=CLAIM_INCLUDE)
+    return True
+
+
+async def cas_claim(db: Prisma, order_id: int, driver_id: int) -> bool:
+    rule = TRANSITIONS["claim"]
+    return bool(await db.query_raw(TRANSITION_SQL, [order_id], rule.target, list(rule.sources), driver_id, None))
+
+
+async def run(db: Prisma, claim, args):
+    await db.execute_raw(RESET_SQL)
+    winners = {}
+    timings = []
+
+    async def attempt(order_id: int, driver_id: int):
+        started = time.perf_counter()
+        if await claim(db, order_id, driver_id):
+            timings.append(time.perf_counter() - started)
+            winners[order_id] = winners.get(order_id, 0) + 1
+
+    for order_id in range(1, args.orders + 1):
+        await asyncio.gather(*(attempt(order_id, 2 + i) for i in range(args.drivers)))
+
+    double = sum(1 for count in winners.values() if count > 1)
+    return double, statistics.median(timings) * 1000 if timings else 0.0
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--drivers", type=int, default=8, help="bitta buyurtmani bir vaqtda bosadigan haydovchilar")
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        raise SystemExit("BENCH_DATABASE_URL berilmagan (alohida test bazasi kerak)")
+
+    db = Prisma(datasource={"url": url})
+    await db.connect()
+    try:
+        for sql in SEED_SQL:
+            await db.execute_raw(sql.format(**vars(args)))
+
+        print(f"{args.orders} ta buyurtma, har biriga {args.drivers} ta haydovchi bir vaqtda")
+        print(f"{'usul':<12}{'ikki marta olingan':>20}{'yutgan bosish (median)':>26}")
+        for name, claim in (("eski", legacy_claim), ("CAS", cas_claim)):
+            double, median = await run(db, claim, args)
+            print(f"{name:<12}{double:>20}{median:>24.2f}ms")
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
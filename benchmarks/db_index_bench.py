@@ -0,0 +1,151 @@
+"""Order/OrderStatus indekslari uchun so'rovlar benchmarki.
+
+Alohida (bo'sh) PostgreSQL bazaga sintetik ma'lumotlar yoziladi, so'ng
+botning eng ko'p ishlatiladigan so'rovlari indekslarsiz va
+``20261018110000_add_hot_path_indexes`` migratsiyasidagi indekslar bilan
+o'lchanadi. Baza sxemasi ``prisma migrate deploy`` bilan tayyorlangan
+bo'lishi kerak. Loyiha ildizidan:
+
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.db_index_bench --orders 1000000
+
+Diqqat: benchmark jadvallarni tozalaydi - ishchi bazada ishga tushirmang.
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import statistics
+import time
+from pathlib import Path
+
+from prisma import Prisma
+
+MIGRATION = Path(__file__).resolve().parent.parent / "prisma" / "migrations" / \
+    "20261018110000_add_hot_path_indexes" / "migration.sql"
+
+SEED_SQL = [
+    'TRUNCATE "OrderStatus", "Order", "District", "Region", "User" RESTART IDENTITY CASCADE',
+    '''INSERT INTO "Region" ("name", "updatedAt")
+       SELECT 'Viloyat ' || i, NOW() FROM generate_series(1, {regions}) i''',
+    '''INSERT INTO "District" ("name", "regionId", "updatedAt")
+       SELECT 'Tuman ' || i, 1 + i % {regions}, NOW() FROM generate_series(1, {districts}) i''',
+    '''INSERT INTO "User" ("firstName", "lastName", "telegramId", "phoneNumber", "role", "updatedAt")
+       SELECT 'Foydalanuvchi', '' || i, 100000 + i, '+998900000000',
+              (CASE WHEN i % 10 = 0 THEN 'DRIVER' ELSE 'PASSENGER' END)::"Role", NOW()
+       FROM generate_series(1, {users}) i''',
+    # Yo'lovchilar taqsimoti notekis: ba'zilarda yuzlab buyurtma bor
+    '''INSERT INTO "Order" ("passengerId", "driverId", "orderType", "fromRegionId", "fromDistrictId",
+                          "toRegionId", "toDistrictId", "passengers", "createdAt", "updatedAt")
+       SELECT p, CASE WHEN i % 3 = 0 THEN 10 * (1 + i % ({users} / 10)) END,
+              (CASE WHEN i % 4 = 0 THEN 'DELIVERY' ELSE 'PASSENGER' END)::"OrderType",
+              1 + d1 % {regions}, d1, 1 + d2 % {regions}, d2, 1 + i % 4,
+              NOW() - (random() * INTERVAL '365 days'), NOW()
+       FROM (
+           SELECT i, 1 + floor(power(random(), 3) * {users})::int AS p,
+                  1 + i % {districts} AS d1, 1 + (i * 7) % {districts} AS d2
+           FROM generate_series(1, {orders}) i
+       ) s''',
+    '''INSERT INTO "OrderStatus" ("status", "userId", "orderId", "updatedAt")
+       SELECT (CASE WHEN id % 50 = 0 THEN 'processing' WHEN id % 5 = 0 THEN 'initiated'
+                    WHEN id % 7 = 0 THEN 'canceled' ELSE 'completed' END)::"OrderStatusEnum",
+              "passengerId", id, NOW()
+       FROM "Order"''',
+    'ANALYZE',
+]
+
+# (nomi, SQL, parametr generatori) - Prisma hosil qiladigan so'rovlarga yaqin
+QUERIES = [
+    ("tarix sahifasi", 'SELECT * FROM "Order" WHERE "passengerId" = $1 ORDER BY "createdAt" DESC, "id" DESC LIMIT 3',
+     lambda a: [random.randint(1, a.users)]),
+    ("tarix soni", 'SELECT COUNT(*) FROM "Order" WHERE "passengerId" = $1',
+     lambda a: [random.randint(1, a.users)]),
+    ("haydovchi buyurtmalari", 'SELECT * FROM "Order" WHERE "driverId" = $1',
+     lambda a: [10 * random.randint(1, a.users // 10)]),
+    ("bugungi buyurtmalar", '''SELECT COUNT(*) FROM "Order" WHERE "createdAt" >= NOW() - INTERVAL '1 day\'''',
+     lambda a: []),
+    ("haftalik buyurtmalar", '''SELECT COUNT(*) FROM "Order" WHERE "createdAt" >= NOW() - INTERVAL '7 days\'''',
+     lambda a: []),
+    ("haftalik pochta", '''SELECT COUNT(*) FROM "Order" WHERE "orderType" = 'DELIVERY'
+                            AND "createdAt" >= NOW() - INTERVAL '7 days\'''',
+     lambda a: []),
+    ("processing statuslar", '''SELECT * FROM "OrderStatus" WHERE "status" = 'processing\'''',
+     lambda a: []),
+    ("processing pochta", '''SELECT s.* FROM "OrderStatus" s JOIN "Order" o ON o."id" = s."orderId"
+                              WHERE s."status" = 'processing' AND o."orderType" = 'DELIVERY\'''',
+     lambda a: []),
+    ("viloyatdan buyurtmalar", 'SELECT COUNT(*) FROM "Order" WHERE "fromRegionId" = $1',
+     lambda a: [random.randint(1, a.regions)]),
+    ("tumanga buyurtmalar", 'SELECT COUNT(*) FROM "Order" WHERE "toDistrictId" = $1',
+     lambda a: [random.randint(1, a.districts)]),
+]
+
+
+def migration_indexes():
+    """Migratsiyadagi (indeks nomi, CREATE INDEX so'rovi) juftliklari"""
+    sql = MIGRATION.read_text()
+    return [(name, stmt.strip()) for stmt, name in
+            re.findall(r'(CREATE INDEX "([^"]+)" ON [^;]+);', sql)]
+
+
+async def measure(db: Prisma, args):
+    results = {}
+    for name, sql, params in QUERIES:
+        for _ in range(args.warmup):
+            await db.query_raw(sql, *params(args))
+        timings = []
+        for _ in range(args.repeat):
+            values = params(args)
+            started = time.perf_counter()
+            await db.query_raw(sql, *values)
+            timings.append(time.perf_counter() - started)
+        results[name] = statistics.median(timings) * 1000
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--orders", type=int, default=1000000)
+    parser.add_argument("--regions", type=int, default=14)
+    parser.add_argument("--districts", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--skip-seed", action="store_true", help="mavjud sintetik ma'lumotlardan foydalanish")
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        raise SystemExit("BENCH_DATABASE_URL berilmagan (alohida test bazasi kerak)")
+
+    db = Prisma(datasource={"url": url})
+    await db.connect()
+    try:
+        indexes = migration_indexes()
+
+        if not args.skip_seed:
+            started = time.perf_counter()
+            for sql in SEED_SQL:
+                await db.execute_raw(sql.format(**vars(args)))
+            print(f"{args.orders} ta buyurtma, {args.users} ta foydalanuvchi yozildi "
+                  f"({time.perf_counter() - started:.1f} s)")
+
+        for name, _ in indexes:
+            await db.execute_raw(f'DROP INDEX IF EXISTS "{name}"')
+        await db.execute_raw("ANALYZE")
+        before = await measure(db, args)
+
+        for _, create in indexes:
+            await db.execute_raw(create)
+        await db.execute_raw("ANALYZE")
+        after = await measure(db, args)
+
+        print(f"{'so`rov':<24}{'indekssiz':>12}{'indeks bilan':>14}{'tezlashish':>12}")
+        for name, _, _ in QUERIES:
+            print(f"{name:<24}{before[name]:>10.2f}ms{after[name]:>12.2f}ms{before[name] / after[name]:>11.1f}x")
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""FSM storage benchmark: MemoryStorage va SQLiteStorage.
+
+Wizard qadamini taqlid qiladi (get_state, get_data, update_data, ...) va har
+bir amal uchun kechikishni o'lchaydi. Loyiha ildizidan ishga tushiriladi:
+
+    python -m benchmarks.fsm_storage_bench --users 2000 --steps 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+
+from utils.fsm_storage import SQLiteStorage
+
+
+async def wizard_step(storage, user_id, step, timings):
+    address = {"chat": user_id, "user": user_id}
+
+    started = time.perf_counter()
+    await storage.get_state(**address)
+    timings["get_state"].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await storage.get_data(**address)
+    timings["get_data"].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await storage.update_data(**address, data={f"field_{step}": step, "last_inline_message_id": step})
+    timings["update_data"].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await storage.set_state(**address, state=f"OrderState:step_{step}")
+    timings["set_state"].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await storage.get_data(**address)
+    timings["get_data"].append(time.perf_counter() - started)
+
+
+async def run(name, storage, users, steps):
+    timings = defaultdict(list)
+    started = time.perf_counter()
+    for step in range(steps):
+        # Foydalanuvchilar parallel ishlaydi, xuddi polling paytidagidek
+        await asyncio.gather(*(wizard_step(storage, user_id, step, timings) for user_id in range(1, users + 1)))
+    for user_id in range(1, users + 1):
+        await storage.finish(chat=user_id, user=user_id)
+    total = time.perf_counter() - started
+    await storage.close()
+    await storage.wait_closed()
+
+    print(f"\n{name}: {total:.2f}s jami")
+    for op, values in timings.items():
+        values.sort()
+        p99 = values[int(len(values) * 0.99) - 1]
+        print(
+            f"  {op:<12} o'rtacha {statistics.mean(values) * 1e6:8.1f} µs"
+            f"   p50 {values[len(values) // 2] * 1e6:8.1f} µs   p99 {p99 * 1e6:8.1f} µs"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        await run("MemoryStorage", MemoryStorage(), args.users, args.steps)
+        await run(
+            "SQLiteStorage (issiq kesh)",
+            SQLiteStorage(os.path.join(tmp, "hot.sqlite3"), cache_size=args.users * 2),
+            args.users, args.steps
+        )
+        # Kesh foydalanuvchilar sonidan kichik - o'qishlarning ko'pi diskdan
+        await run(
+            "SQLiteStorage (kichik kesh)",
+            SQLiteStorage(os.path.join(tmp, "cold.sqlite3"), cache_size=max(1, args.users // 10)),
+            args.users, args.steps
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
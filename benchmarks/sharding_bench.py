@@ -0,0 +1,116 @@
+"""Sharded rejim benchmarki: 1/2/4/8 ta ishchi jarayon.
+
+Lokal soxta Telegram API server (getUpdates uchun) ko'tariladi va
+``Supervisor`` updatelarni ishchilarga ``shard_key`` bo'yicha taqsimlaydi.
+Handler CPU ishini (matn yig'ish, klaviatura, JSON) ``--handler-cpu-ms``
+davomida band aylanish bilan taqlid qiladi - bitta jarayonda bu ish GIL
+tufayli ketma-ket bajariladi. Har bir ishchi soni uchun o'tkazuvchanlik,
+kechikish va bitta foydalanuvchi updatelari tartibi buzilgan holatlar soni
+chiqariladi. Loyiha ildizidan:
+
+    python -m benchmarks.sharding_bench --updates 5000 --rate 2000 --handler-cpu-ms 2
+"""
+import argparse
+import asyncio
+import multiprocessing
+import statistics
+import time
+from collections import defaultdict
+
+from aiogram import Bot, Dispatcher, types
+from aiogram.bot.api import TelegramAPIServer
+from aiohttp import web
+
+from benchmarks.transport_bench import API_PORT, HOST, TOKEN, FakeTelegramAPI, make_update, produce
+from utils.sharding import Supervisor, serve_shard
+
+
+def bench_worker(index: int, total: int, inbox, control, ready, primary: bool, results, cpu_ms: float,
+                 concurrency: int):
+    """Ishchi jarayon: CPU ishini taqlid qiluvchi bitta message handler"""
+    async def main():
+        dp = Dispatcher(Bot(TOKEN))
+
+        async def handler(message: types.Message):
+            deadline = time.perf_counter() + cpu_ms / 1000
+            while time.perf_counter() < deadline:
+                pass
+            results.put((message.message_id, message.from_user.id, time.time()))
+
+        dp.register_message_handler(handler)
+        ready.put(index)
+        try:
+            await serve_shard(dp, inbox, concurrency)
+        finally:
+            await (await dp.bot.get_session()).close()
+
+    asyncio.run(main())
+
+
+async def run(args, api: FakeTelegramAPI, workers: int, first_id: int):
+    results = multiprocessing.get_context("spawn").Queue()
+    supervisor = Supervisor(
+        TOKEN, workers, bench_worker, (results, args.handler_cpu_ms, args.concurrency),
+        server=TelegramAPIServer.from_base(f"http://{HOST}:{API_PORT}")
+    )
+    serving = asyncio.create_task(supervisor.serve())
+    await supervisor.ready.wait()
+
+    released = {}
+
+    async def send(number):
+        update_id = first_id + number
+        released[update_id] = time.time()
+        api.push(make_update(update_id))
+
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    await produce(args, send)
+    handled = [await loop.run_in_executor(None, results.get) for _ in range(args.updates)]
+    elapsed = time.perf_counter() - started
+
+    supervisor.stop()
+    api.available.set()
+    await serving
+    api.pending = []
+
+    # Bitta foydalanuvchi updatelari kelgan tartibda bajarilgan bo'lishi kerak
+    by_user = defaultdict(list)
+    for update_id, user_id, finished in sorted(handled, key=lambda item: item[2]):
+        by_user[user_id].append(update_id)
+    violations = sum(
+        1 for ids in by_user.values() for previous, current in zip(ids, ids[1:]) if current < previous
+    )
+
+    values = sorted(finished - released[update_id] for update_id, _, finished in handled)
+    p99 = values[int(len(values) * 0.99) - 1]
+    print(
+        f"{workers:>2} ishchi {len(values) / elapsed:8.0f} update/s   "
+        f"kechikish o'rtacha {statistics.mean(values) * 1000:7.1f} ms   "
+        f"p50 {values[len(values) // 2] * 1000:7.1f} ms   p99 {p99 * 1000:7.1f} ms   "
+        f"tartib buzilishi {violations}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--rate", type=float, default=2000, help="sekundiga yuboriladigan updatelar")
+    parser.add_argument("--handler-cpu-ms", type=float, default=2, help="handler ichidagi CPU ishi taqlidi")
+    parser.add_argument("--concurrency", type=int, default=16, help="har bir ishchida parallel updatelar")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    api = FakeTelegramAPI()
+    api_runner = web.AppRunner(api.make_app(), access_log=None)
+    await api_runner.setup()
+    await web.TCPSite(api_runner, HOST, API_PORT).start()
+
+    print(f"{args.updates} ta update, {args.rate:.0f}/s, handler CPU {args.handler_cpu_ms} ms")
+    for number, workers in enumerate(args.workers):
+        await run(args, api, workers, number * args.updates)
+    await api_runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
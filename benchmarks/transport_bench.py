@@ -0,0 +1,210 @@
+"""Polling va webhook transportlarini solishtirish.
+
+Lokal soxta Telegram API server (getUpdates uchun) va webhook server
+ko'tariladi, so'ng bir xil updatelar oqimi ikkala transport orqali
+o'tkaziladi. Handler I/O ni (baza, Telegram API) ``--handler-ms`` kutish
+bilan taqlid qiladi. Loyiha ildizidan:
+
+    python -m benchmarks.transport_bench --updates 5000 --rate 1000 --workers 16
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+from aiogram import Bot, Dispatcher, types
+from aiogram.bot.api import TelegramAPIServer
+from aiohttp import web
+
+from utils.webhook import WebhookServer
+
+TOKEN = "123456:benchmark"
+HOST = "127.0.0.1"
+API_PORT = 18081
+WEBHOOK_PORT = 18082
+
+
+def make_update(update_id: int) -> dict:
+    user_id = 1000 + update_id % 500
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Bench"},
+            "text": "benchmark",
+        },
+    }
+
+
+class FakeTelegramAPI:
+    """getUpdates ni long-polling bilan qaytaruvchi minimal Bot API"""
+
+    def __init__(self):
+        self.pending = []
+        self.available = asyncio.Event()
+
+    def push(self, update: dict):
+        self.pending.append(update)
+        self.available.set()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        if method.lower() != "getupdates":
+            return web.json_response({"ok": True, "result": True})
+
+        params = dict(await request.post())
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+
+        self.pending = [u for u in self.pending if u["update_id"] >= offset]
+        if not self.pending:
+            self.available.clear()
+            try:
+                await asyncio.wait_for(self.available.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return web.json_response({"ok": True, "result": self.pending[:limit]})
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        return app
+
+
+class Recorder:
+    def __init__(self, total: int):
+        self.total = total
+        self.released = {}
+        self.latencies = []
+        self.done = asyncio.Event()
+
+    def release(self, update_id: int):
+        self.released[update_id] = time.perf_counter()
+
+    def handled(self, update_id: int):
+        self.latencies.append(time.perf_counter() - self.released[update_id])
+        if len(self.latencies) >= self.total:
+            self.done.set()
+
+
+def make_dispatcher(recorder: Recorder, handler_ms: float) -> Dispatcher:
+    bot = Bot(TOKEN, server=TelegramAPIServer.from_base(f"http://{HOST}:{API_PORT}"))
+    dp = Dispatcher(bot)
+
+    async def handler(message: types.Message):
+        await asyncio.sleep(handler_ms / 1000)
+        recorder.handled(message.message_id)
+
+    dp.register_message_handler(handler)
+    return dp
+
+
+async def produce(args, send):
+    interval = 1 / args.rate
+    started = time.perf_counter()
+    for update_id in range(1, args.updates + 1):
+        await send(update_id)
+        delay = started + update_id * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def report(name: str, recorder: Recorder, elapsed: float):
+    values = sorted(recorder.latencies)
+    p99 = values[int(len(values) * 0.99) - 1]
+    print(
+        f"{name:<8} {len(values) / elapsed:8.0f} update/s   "
+        f"kechikish o'rtacha {statistics.mean(values) * 1000:7.1f} ms   "
+        f"p50 {values[len(values) // 2] * 1000:7.1f} ms   p99 {p99 * 1000:7.1f} ms"
+    )
+
+
+async def run_polling(args, api: FakeTelegramAPI):
+    recorder = Recorder(args.updates)
+    dp = make_dispatcher(recorder, args.handler_ms)
+    Bot.set_current(dp.bot)
+    Dispatcher.set_current(dp)
+    polling = asyncio.create_task(dp.start_polling(timeout=20, relax=0.1))
+
+    async def send(update_id):
+        recorder.release(update_id)
+        api.push(make_update(update_id))
+
+    started = time.perf_counter()
+    await produce(args, send)
+    await recorder.done.wait()
+    elapsed = time.perf_counter() - started
+
+    dp.stop_polling()
+    polling.cancel()
+    api.available.set()
+    await asyncio.gather(polling, return_exceptions=True)
+    await (await dp.bot.get_session()).close()
+    report("polling", recorder, elapsed)
+
+
+async def run_webhook(args):
+    recorder = Recorder(args.updates)
+    dp = make_dispatcher(recorder, args.handler_ms)
+    server = WebhookServer(dp, "/webhook", workers=args.workers, queue_size=args.queue_size)
+    runner = web.AppRunner(server.make_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, HOST, WEBHOOK_PORT).start()
+    await server.start()
+
+    # Telegram bitta webhookga ko'pi bilan max_connections (standart 40) ta parallel ulanish ochadi
+    connections = asyncio.Semaphore(40)
+    url = f"http://{HOST}:{WEBHOOK_PORT}/webhook"
+    tasks = []
+
+    async with aiohttp.ClientSession() as session:
+        async def post(update_id):
+            async with connections:
+                while True:
+                    async with session.post(url, json=make_update(update_id)) as response:
+                        if response.status == 200:
+                            return
+                    await asyncio.sleep(0.05)  # 503 - Telegram kabi keyinroq qayta yuborish
+
+        async def send(update_id):
+            recorder.release(update_id)
+            tasks.append(asyncio.create_task(post(update_id)))
+
+        started = time.perf_counter()
+        await produce(args, send)
+        await asyncio.gather(*tasks)
+        await recorder.done.wait()
+        elapsed = time.perf_counter() - started
+
+    await server.stop()
+    await runner.cleanup()
+    await (await dp.bot.get_session()).close()
+    report("webhook", recorder, elapsed)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--rate", type=float, default=1000, help="sekundiga yuboriladigan updatelar")
+    parser.add_argument("--handler-ms", type=float, default=5, help="handler ichidagi I/O taqlidi")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--queue-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    api = FakeTelegramAPI()
+    api_runner = web.AppRunner(api.make_app(), access_log=None)
+    await api_runner.setup()
+    await web.TCPSite(api_runner, HOST, API_PORT).start()
+
+    print(f"{args.updates} ta update, {args.rate:.0f}/s, handler {args.handler_ms} ms, {args.workers} ta ishchi")
+    await run_polling(args, api)
+    await run_webhook(args)
+    await api_runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -8,3 +8,31 @@ env.read_env()
 BOT_TOKEN = env.str("BOT_TOKEN")  # Bot toekn
 OWNER_ID = env.list("OWNER_ID")  # owner idsi
 IP = env.str("ip")  # Xosting ip manzili
+
+# FSM storage: "sqlite" (diskda saqlanadi) yoki "memory"
+FSM_STORAGE = env.str("FSM_STORAGE", "sqlite")
+FSM_STORAGE_PATH = env.str("FSM_STORAGE_PATH", "fsm_storage.sqlite3")
+FSM_STATE_TTL = env.int("FSM_STATE_TTL", 86400)  # tashlab ketilgan wizard shuncha sekunddan keyin o'chadi
+FSM_CACHE_SIZE = env.int("FSM_CACHE_SIZE", 10000)
+
+# Ishga tushirish rejimi: "polling", "webhook" yoki "sharded" (polling + bir nechta ishchi jarayon)
+BOT_MODE = env.str("BOT_MODE", "polling")
+SKIP_UPDATES = env.bool("SKIP_UPDATES", False)  # polling: restart paytida kelgan updatelarni tashlab yuborish
+
+# Sharded rejim sozlamalari
+SHARD_WORKERS = env.int("SHARD_WORKERS", 4)  # ishchi jarayonlar soni (odatda CPU yadrolari soni)
+SHARD_CONCURRENCY = env.int("SHARD_CONCURRENCY", 16)  # har bir ishchida parallel updatelar
+
+# Webhook sozlamalari
+WEBHOOK_HOST = env.str("WEBHOOK_HOST", "")  # masalan https://bot.example.com
+WEBHOOK_PATH = env.str("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = env.str("WEBHOOK_SECRET", "")
+WEBHOOK_SSL_CERT = env.str("WEBHOOK_SSL_CERT", "")  # self-signed sertifikat (ixtiyoriy)
+WEBHOOK_SSL_KEY = env.str("WEBHOOK_SSL_KEY", "")
+WEBHOOK_WORKERS = env.int("WEBHOOK_WORKERS", 16)  # updatelarni parallel qayta ishlovchilar soni
+WEBHOOK_QUEUE_SIZE = env.int("WEBHOOK_QUEUE_SIZE", 1000)  # navbat to'lsa Telegramga 503 qaytariladi
+WEBAPP_HOST = env.str("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = env.int("WEBAPP_PORT", 8443)
+
+# Bot qabul qiladigan update turlari (chat_member - kanal a'zoligi keshi uchun, bot kanal admini bo'lishi kerak)
+ALLOWED_UPDATES = env.list("ALLOWED_UPDATES", ["message", "callback_query", "chat_member"])
@@ -0,0 +1,20 @@
+# Paket turlari
+PACKAGE_TYPES = {
+    "DOCUMENT": {"name": "📄 Hujjat", "emoji": "📄"},
+    "PARCEL": {"name": "📦 Posilka", "emoji": "📦"},
+    "FRAGILE": {"name": "🔸 Mo'rt buyum", "emoji": "🔸"},
+    "VALUABLE": {"name": "💎 Qimmatbaho", "emoji": "💎"},
+    "OTHER": {"name": "📋 Boshqa", "emoji": "📋"}
+}
+
+# Paket hajmlari
+PACKAGE_SIZES = {
+    "SMALL": {"name": "📦 Kichik (10kg gacha)", "emoji": "📦", "weight": "10kg gacha"},
+    "MEDIUM": {"name": "📦 O'rta (10-25kg)", "emoji": "📦", "weight": "10-25kg"},
+    "LARGE": {"name": "📦 Katta (25-50kg)", "emoji": "📦", "weight": "25-50kg"},
+    "EXTRA_LARGE": {"name": "📦 Juda katta (50kg+)", "emoji": "📦", "weight": "50kg dan ortiq"}
+}
+
+# Callback da paket turi/hajmi shu ro'yxatlardagi indeks bilan uzatiladi
+PACKAGE_TYPE_KEYS = tuple(PACKAGE_TYPES)
+PACKAGE_SIZE_KEYS = tuple(PACKAGE_SIZES)
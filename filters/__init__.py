@@ -1,9 +1,8 @@
 from aiogram import Dispatcher
 
 from loader import dp
-# from .is_admin import AdminFilter
+from .role import RoleFilter
 
 
 if __name__ == "filters":
-    #dp.filters_factory.bind(is_admin)
-    pass
+    dp.filters_factory.bind(RoleFilter, event_handlers=[dp.message_handlers, dp.callback_query_handlers])
@@ -0,0 +1,27 @@
+from typing import Iterable, Union
+
+from aiogram import types
+from aiogram.dispatcher.filters import BoundFilter
+from aiogram.dispatcher.handler import ctx_data
+
+from utils.db_api.users import get_user
+
+
+class RoleFilter(BoundFilter):
+    """
+    Foydalanuvchi roli bo'yicha filtr: ``role="DRIVER"`` yoki
+    ``role=["ADMIN", "SUPER_ADMIN"]``. Foydalanuvchi ``IdentityMiddleware``
+    qo'ygan ma'lumotdan olinadi - bazaga murojaat qilinmaydi.
+    """
+    key = "role"
+
+    def __init__(self, role: Union[str, Iterable[str]]):
+        self.roles = {role} if isinstance(role, str) else set(role)
+
+    async def check(self, obj: Union[types.Message, types.CallbackQuery]) -> bool:
+        data = ctx_data.get() or {}
+        if "user" in data:
+            user = data["user"]
+        else:
+            user = await get_user(obj.from_user.id)
+        return user is not None and user.role in self.roles
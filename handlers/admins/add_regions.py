@@ -2,7 +2,7 @@ import logging
 from aiogram import types
 from aiogram.dispatcher import FSMContext
 from aiogram.types import ReplyKeyboardRemove
-from loader import dp, db, bot
+from loader import dp, db
 from states.admin_states import RegionManagementStates, DistrictManagementStates
 from keyboards.admin_btns import (
     admin_main_menu, cancel_keyboard, confirmation_keyboard,
@@ -10,50 +10,20 @@ from keyboards.admin_btns import (
     regions_list_keyboard, districts_list_keyboard, back_keyboard
 )
 from data.config import OWNER_ID
+from utils.db_api.catalog import get_catalog, reload_catalog
+from utils.db_api.catalog_stats import region_counts, district_counts, invalidate_region, invalidate_district
+from utils import callback_codec as codec
+from utils.notify_admins import notify_admins
+from utils.db_api.users import ADMIN_ROLES, UserRecord
 
 # Admin ID lar ro'yxati
 ADMIN_IDS = list(map(int, OWNER_ID))
 
-async def check_admin_access(user_id: int) -> bool:
-    """Foydalanuvchining admin huquqlarini tekshirish"""
-    try:
-        user = await db.user.find_unique(where={'telegramId': str(user_id)})
-        return user and user.role in ["ADMIN", "SUPER_ADMIN"]
-    except Exception as e:
-        logging.error(f"Admin huquqlarini tekshirishda xato: {e}")
-        return False
-
-async def notify_admins(message_text: str, exclude_user_id: int = None):
-    """Barcha adminlarga xabar yuborish"""
-    try:
-        admins = await db.user.find_many(where={
-            'OR': [
-                {'role': 'ADMIN'},
-                {'role': 'SUPER_ADMIN'}
-            ]
-        })
-        
-        for admin in admins:
-            admin_id = int(admin.telegramId)
-            if exclude_user_id and admin_id == exclude_user_id:
-                continue
-                
-            try:
-                await bot.send_message(admin_id, message_text, parse_mode="HTML")
-            except Exception as e:
-                logging.error(f"Admin {admin_id} ga xabar yuborishda xato: {e}")
-    except Exception as e:
-        logging.error(f"Adminlarni olishda xato: {e}")
-
 # ==================== VILOYATLAR BOSHQARUVI ====================
 
-@dp.message_handler(lambda m: m.text == "Viloyatlar")
+@dp.message_handler(lambda m: m.text == "Viloyatlar", role=ADMIN_ROLES)
 async def regions_menu(message: types.Message, state: FSMContext):
     """Viloyatlar menyusini ko'rsatish"""
-    if not await check_admin_access(message.from_user.id):
-        await message.answer("❌ Sizda admin huquqlari mavjud emas!")
-        return
-    
     await message.answer(
         "🏛️ <b>Viloyatlar boshqaruvi</b>\n\nQuyidagi amallardan birini tanlang:",
         reply_markup=region_main_keyboard(),
@@ -61,13 +31,19 @@ async def regions_menu(message: types.Message, state: FSMContext):
     )
     await RegionManagementStates.main_menu.set()
 
+@dp.message_handler(lambda m: m.text == "Viloyatlar")
+async def regions_menu_denied(message: types.Message):
+    """Admin bo'lmagan foydalanuvchi (yuqoridagi handler role filtri o'tkazmagan)"""
+    await message.answer("❌ Sizda admin huquqlari mavjud emas!")
+
 # ==================== VILOYATLAR RO'YXATI ====================
 
 @dp.callback_query_handler(lambda c: c.data == "region_list", state=RegionManagementStates.main_menu)
 async def show_regions_list(callback: types.CallbackQuery, state: FSMContext):
     """Viloyatlar ro'yxatini ko'rsatish"""
     try:
-        regions = await db.region.find_many(include={"districts": True}, order={"name": "asc"})
+        catalog = await get_catalog()
+        regions = catalog.regions
         
         if not regions:
             await callback.message.edit_text(
@@ -79,9 +55,9 @@ async def show_regions_list(callback: types.CallbackQuery, state: FSMContext):
             return
         
         total_regions = len(regions)
-        await state.update_data(regions=regions, current_page=0)
+        await state.update_data(current_page=0)
         
-        keyboard = regions_list_keyboard(regions)
+        keyboard = regions_list_keyboard(catalog)
         
         await callback.message.edit_text(
             f"📋 <b>Viloyatlar ro'yxati</b>\n\n"
@@ -99,16 +75,15 @@ async def show_regions_list(callback: types.CallbackQuery, state: FSMContext):
         await callback.message.edit_text("❌ Xatolik yuz berdi. Iltimos, qayta urinib ko'ring.")
         await callback.answer()
 
-@dp.callback_query_handler(lambda c: c.data.startswith("regions_page_"), state=RegionManagementStates.region_list)
+@dp.callback_query_handler(codec.on(codec.ADMIN_REGIONS_PAGE), state=RegionManagementStates.region_list)
 async def regions_pagination(callback: types.CallbackQuery, state: FSMContext):
     """Viloyatlar ro'yxati sahifalash"""
     try:
-        page = int(callback.data.split("_")[2])
-        data = await state.get_data()
-        regions = data.get('regions', [])
+        page = codec.unpack_id(callback.data)
+        catalog = await get_catalog()
         
-        keyboard = regions_list_keyboard(regions, page)
-        total_regions = len(regions)
+        keyboard = regions_list_keyboard(catalog, page)
+        total_regions = len(catalog.regions)
         
         await callback.message.edit_text(
             f"📋 <b>Viloyatlar ro'yxati</b>\n\n"
@@ -125,28 +100,22 @@ async def regions_pagination(callback: types.CallbackQuery, state: FSMContext):
         logging.error(f"Sahifalashda xato: {e}")
         await callback.answer("❌ Xatolik yuz berdi")
 
-@dp.callback_query_handler(lambda c: c.data.startswith("region_"), state=RegionManagementStates.region_list)
+@dp.callback_query_handler(codec.on(codec.ADMIN_REGION), state=RegionManagementStates.region_list)
 async def show_region_detail(callback: types.CallbackQuery, state: FSMContext):
     """Viloyat tafsilotlarini ko'rsatish"""
     try:
-        region_id = int(callback.data.split("_")[1])
+        region_id = codec.unpack_id(callback.data)
         
-        region = await db.region.find_unique(
-            where={"id": region_id},
-            include={
-                "districts": True,
-                "ordersFrom": True,
-                "ordersTo": True
-            }
-        )
+        region = await db.region.find_unique(where={"id": region_id})
         
         if not region:
             await callback.answer("❌ Viloyat topilmadi")
             return
         
-        total_districts = len(region.districts)
-        total_orders_from = len(region.ordersFrom)
-        total_orders_to = len(region.ordersTo)
+        counts = await region_counts(region_id)
+        total_districts = counts.districts
+        total_orders_from = counts.orders_from
+        total_orders_to = counts.orders_to
         
         message_text = (
             f"🏛️ <b>Viloyat ma'lumotlari</b>\n\n"
@@ -174,10 +143,10 @@ async def show_region_detail(callback: types.CallbackQuery, state: FSMContext):
 
 # ==================== VILOYAT TAXRIRLASH ====================
 
-@dp.callback_query_handler(lambda c: c.data.startswith("edit_region_"), state=RegionManagementStates.region_detail)
+@dp.callback_query_handler(codec.on(codec.ADMIN_EDIT_REGION), state=RegionManagementStates.region_detail)
 async def start_edit_region(callback: types.CallbackQuery, state: FSMContext):
     """Viloyatni tahrirlashni boshlash"""
-    region_id = int(callback.data.split("_")[2])
+    region_id = codec.unpack_id(callback.data)
     
     region = await db.region.find_unique(where={"id": region_id})
     if not region:
@@ -226,6 +195,7 @@ async def process_edit_region_name(message: types.Message, state: FSMContext):
             where={"id": region_id},
             data={"name": new_name}
         )
+        await reload_catalog()
         
         await message.answer(
             f"✅ Viloyat muvaffaqiyatli yangilandi:\n\n"
@@ -249,22 +219,21 @@ async def process_edit_region_name(message: types.Message, state: FSMContext):
 
 # ==================== VILOYAT O'CHIRISH ====================
 
-@dp.callback_query_handler(lambda c: c.data.startswith("delete_region_"), state=RegionManagementStates.region_detail)
+@dp.callback_query_handler(codec.on(codec.ADMIN_DELETE_REGION), state=RegionManagementStates.region_detail)
 async def start_delete_region(callback: types.CallbackQuery, state: FSMContext):
     """Viloyatni o'chirishni boshlash"""
-    region_id = int(callback.data.split("_")[2])
+    region_id = codec.unpack_id(callback.data)
     
-    region = await db.region.find_unique(
-        where={"id": region_id},
-        include={"districts": True, "ordersFrom": True, "ordersTo": True}
-    )
+    region = await db.region.find_unique(where={"id": region_id})
     
     if not region:
         await callback.answer("❌ Viloyat topilmadi")
         return
     
-    total_districts = len(region.districts)
-    total_orders = len(region.ordersFrom) + len(region.ordersTo)
+    # O'chirish ogohlantirishi uchun keshsiz, joriy sonlar
+    counts = await region_counts(region_id, fresh=True)
+    total_districts = counts.districts
+    total_orders = counts.orders
     
     warning_text = ""
     if total_districts > 0:
@@ -298,6 +267,8 @@ async def confirm_region_deletion(callback: types.CallbackQuery, state: FSMConte
         try:
             # Delete region (this will cascade delete districts due to Prisma relations)
             await db.region.delete(where={"id": region_id})
+            await reload_catalog()
+            invalidate_region(region_id)
             
             await callback.message.edit_text(
                 f"✅ Viloyat muvaffaqiyatli o'chirildi: <b>{region_name}</b>",
@@ -373,6 +344,7 @@ async def confirm_region_addition(callback: types.CallbackQuery, state: FSMConte
         
         try:
             await db.region.create(data={"name": region_name})
+            await reload_catalog()
             await callback.message.edit_text(
                 f"✅ Viloyat muvaffaqiyatli qo'shildi: <b>{region_name}</b>\n\n"
                 f"ℹ️ <b>Hurmatli admin!</b> Viloyat bazaga qo'shildi. Unga tuman biriktirishingiz zarur. "
@@ -397,22 +369,20 @@ async def confirm_region_addition(callback: types.CallbackQuery, state: FSMConte
 
 # ==================== TUMANLAR BOSHQARUVI ====================
 
-@dp.callback_query_handler(lambda c: c.data.startswith("region_districts_"), state=RegionManagementStates.region_detail)
+@dp.callback_query_handler(codec.on(codec.ADMIN_REGION_DISTRICTS), state=RegionManagementStates.region_detail)
 async def show_region_districts(callback: types.CallbackQuery, state: FSMContext):
     """Viloyatga tegishli tumanlarni ko'rsatish"""
     try:
-        region_id = int(callback.data.split("_")[2])
+        region_id = codec.unpack_id(callback.data)
         
-        region = await db.region.find_unique(
-            where={"id": region_id},
-            include={"districts": True}
-        )
+        catalog = await get_catalog()
+        region = catalog.region_by_id.get(region_id)
         
         if not region:
             await callback.answer("❌ Viloyat topilmadi")
             return
         
-        districts = region.districts
+        districts = catalog.districts_of(region_id)
         total_districts = len(districts)
         
         if not districts:
@@ -420,7 +390,7 @@ async def show_region_districts(callback: types.CallbackQuery, state: FSMContext
                 f"🏘️ <b>{region.name} viloyati tumanlari</b>\n\n"
                 f"❌ Hozircha hech qanday tuman mavjud emas.\n\n"
                 f"➕ Yangi tuman qo'shish uchun 'Tuman qo'shish' tugmasini bosing.",
-                reply_markup=back_keyboard(f"back_to_region_{region_id}")
+                reply_markup=back_keyboard(codec.pack(codec.ADMIN_BACK_TO_REGION, region_id))
             )
             await callback.answer()
             return
@@ -428,11 +398,10 @@ async def show_region_districts(callback: types.CallbackQuery, state: FSMContext
         await state.update_data(
             current_region_id=region_id,
             current_region_name=region.name,
-            districts=districts,
             current_page=0
         )
         
-        keyboard = districts_list_keyboard(districts, region_id)
+        keyboard = districts_list_keyboard(catalog, region_id)
         
         await callback.message.edit_text(
             f"🏘️ <b>{region.name} viloyati tumanlari</b>\n\n"
@@ -448,19 +417,17 @@ async def show_region_districts(callback: types.CallbackQuery, state: FSMContext
         logging.error(f"Tumanlar ro'yxatini ko'rsatishda xato: {e}")
         await callback.answer("❌ Xatolik yuz berdi")
 
-@dp.callback_query_handler(lambda c: c.data.startswith("districts_page_"), state=DistrictManagementStates.district_list)
+@dp.callback_query_handler(codec.on(codec.ADMIN_DISTRICTS_PAGE), state=DistrictManagementStates.district_list)
 async def districts_pagination(callback: types.CallbackQuery, state: FSMContext):
     """Tumanlar ro'yxati sahifalash"""
     try:
-        parts = callback.data.split("_")
-        page = int(parts[2])
-        region_id = int(parts[3])
+        _, (page, region_id) = codec.unpack(callback.data)
         
         data = await state.get_data()
-        districts = data.get('districts', [])
+        catalog = await get_catalog()
         
-        keyboard = districts_list_keyboard(districts, region_id, page)
-        total_districts = len(districts)
+        keyboard = districts_list_keyboard(catalog, region_id, page)
+        total_districts = len(catalog.districts_of(region_id))
         region_name = data.get('current_region_name', '')
         
         await callback.message.edit_text(
@@ -477,27 +444,24 @@ async def districts_pagination(callback: types.CallbackQuery, state: FSMContext)
         logging.error(f"Sahifalashda xato: {e}")
         await callback.answer("❌ Xatolik yuz berdi")
 
-@dp.callback_query_handler(lambda c: c.data.startswith("district_"), state=DistrictManagementStates.district_list)
+@dp.callback_query_handler(codec.on(codec.ADMIN_DISTRICT), state=DistrictManagementStates.district_list)
 async def show_district_detail(callback: types.CallbackQuery, state: FSMContext):
     """Tuman tafsilotlarini ko'rsatish"""
     try:
-        district_id = int(callback.data.split("_")[1])
+        district_id = codec.unpack_id(callback.data)
         
         district = await db.district.find_unique(
             where={"id": district_id},
-            include={
-                "region": True,
-                "ordersFrom": True,
-                "ordersTo": True
-            }
+            include={"region": True}
         )
         
         if not district:
             await callback.answer("❌ Tuman topilmadi")
             return
         
-        total_orders_from = len(district.ordersFrom)
-        total_orders_to = len(district.ordersTo)
+        counts = await district_counts(district_id)
+        total_orders_from = counts.orders_from
+        total_orders_to = counts.orders_to
         
         message_text = (
             f"🏘️ <b>Tuman ma'lumotlari</b>\n\n"
@@ -529,10 +493,10 @@ async def show_district_detail(callback: types.CallbackQuery, state: FSMContext)
 
 # ==================== TUMAN TAXRIRLASH ====================
 
-@dp.callback_query_handler(lambda c: c.data.startswith("edit_district_"), state=DistrictManagementStates.district_detail)
+@dp.callback_query_handler(codec.on(codec.ADMIN_EDIT_DISTRICT), state=DistrictManagementStates.district_detail)
 async def start_edit_district(callback: types.CallbackQuery, state: FSMContext):
     """Tuman nomini tahrirlashni boshlash"""
-    district_id = int(callback.data.split("_")[2])
+    district_id = codec.unpack_id(callback.data)
     
     district = await db.district.find_unique(
         where={"id": district_id},
@@ -595,6 +559,7 @@ async def process_edit_district_name(message: types.Message, state: FSMContext):
             where={"id": district_id},
             data={"name": new_name}
         )
+        await reload_catalog()
         
         region = await db.region.find_unique(where={"id": region_id})
         
@@ -622,25 +587,21 @@ async def process_edit_district_name(message: types.Message, state: FSMContext):
 
 # ==================== TUMAN O'CHIRISH ====================
 
-@dp.callback_query_handler(lambda c: c.data.startswith("delete_district_"), state=DistrictManagementStates.district_detail)
+@dp.callback_query_handler(codec.on(codec.ADMIN_DELETE_DISTRICT), state=DistrictManagementStates.district_detail)
 async def start_delete_district(callback: types.CallbackQuery, state: FSMContext):
     """Tuman ni o'chirishni boshlash"""
-    district_id = int(callback.data.split("_")[2])
+    district_id = codec.unpack_id(callback.data)
     
     district = await db.district.find_unique(
         where={"id": district_id},
-        include={
-            "region": True,
-            "ordersFrom": True,
-            "ordersTo": True
-        }
+        include={"region": True}
     )
     
     if not district:
         await callback.answer("❌ Tuman topilmadi")
         return
     
-    total_orders = len(district.ordersFrom) + len(district.ordersTo)
+    total_orders = (await district_counts(district_id, fresh=True)).orders
     
     warning_text = ""
     if total_orders > 0:
@@ -687,17 +648,14 @@ async def confirm_district_deletion(callback: types.CallbackQuery, state: FSMCon
         
         try:
             # Avval tekshiramiz, hali ham buyurtmalar bormi
-            district = await db.district.find_unique(
-                where={"id": district_id},
-                include={"ordersFrom": True, "ordersTo": True}
-            )
+            district = await db.district.find_unique(where={"id": district_id})
             
             if not district:
                 await callback.message.edit_text("❌ Tuman topilmadi")
                 await callback.answer()
                 return
                 
-            total_orders = len(district.ordersFrom) + len(district.ordersTo)
+            total_orders = (await district_counts(district_id, fresh=True)).orders
             if total_orders > 0:
                 await callback.message.edit_text(
                     f"❌ Tuman ni o'chirib bo'lmaydi. Hali ham {total_orders} ta buyurtma mavjud.",
@@ -708,6 +666,10 @@ async def confirm_district_deletion(callback: types.CallbackQuery, state: FSMCon
             
             # Delete district
             await db.district.delete(where={"id": district_id})
+            await reload_catalog()
+            invalidate_district(district_id)
+            if data.get('current_region_id'):
+                invalidate_region(data['current_region_id'])
             
             await callback.message.edit_text(
                 f"✅ Tuman muvaffaqiyatli o'chirildi:\n\n"
@@ -738,10 +700,10 @@ async def confirm_district_deletion(callback: types.CallbackQuery, state: FSMCon
 
 # ==================== TUMAN QO'SHISH ====================
 
-@dp.callback_query_handler(lambda c: c.data.startswith("add_district_"), state=RegionManagementStates.region_detail)
+@dp.callback_query_handler(codec.on(codec.ADMIN_ADD_DISTRICT), state=RegionManagementStates.region_detail)
 async def start_add_district(callback: types.CallbackQuery, state: FSMContext):
     """Tuman qo'shishni boshlash"""
-    region_id = int(callback.data.split("_")[2])
+    region_id = codec.unpack_id(callback.data)
     
     region = await db.region.find_unique(where={"id": region_id})
     if not region:
@@ -757,7 +719,7 @@ async def start_add_district(callback: types.CallbackQuery, state: FSMContext):
         f"➕ <b>Yangi tuman qo'shish</b>\n\n"
         f"🏛️ Viloyat: <b>{region.name}</b>\n\n"
         f"Tuman nomini kiriting:",
-        reply_markup=back_keyboard(f"back_to_region_{region_id}"),
+        reply_markup=back_keyboard(codec.pack(codec.ADMIN_BACK_TO_REGION, region_id)),
         parse_mode="HTML"
     )
     await DistrictManagementStates.waiting_for_new_district_name.set()
@@ -821,6 +783,8 @@ async def confirm_district_addition(callback: types.CallbackQuery, state: FSMCon
                 "name": district_name,
                 "regionId": region_id
             })
+            await reload_catalog()
+            invalidate_region(region_id)
             
             await callback.message.edit_text(
                 f"✅ Tuman muvaffaqiyatli qo'shildi:\n\n"
@@ -862,7 +826,8 @@ async def back_to_region_menu(callback: types.CallbackQuery, state: FSMContext):
 async def back_to_regions_list(callback: types.CallbackQuery, state: FSMContext):
     """Viloyatlar ro'yxatiga qaytish"""
     try:
-        regions = await db.region.find_many(include={"districts": True}, order={"name": "asc"})
+        catalog = await get_catalog()
+        regions = catalog.regions
         
         if not regions:
             await callback.message.edit_text(
@@ -873,9 +838,9 @@ async def back_to_regions_list(callback: types.CallbackQuery, state: FSMContext)
             return
         
         total_regions = len(regions)
-        await state.update_data(regions=regions, current_page=0)
+        await state.update_data(current_page=0)
         
-        keyboard = regions_list_keyboard(regions)
+        keyboard = regions_list_keyboard(catalog)
         
         await callback.message.edit_text(
             f"📋 <b>Viloyatlar ro'yxati</b>\n\n"
@@ -892,34 +857,22 @@ async def back_to_regions_list(callback: types.CallbackQuery, state: FSMContext)
         logging.error(f"Viloyatlar ro'yxatiga qaytishda xato: {e}")
         await callback.answer("❌ Xatolik yuz berdi")
 
-@dp.callback_query_handler(lambda c: c.data.startswith("back_to_region_") and not c.data.endswith('districts'), state="*")
+@dp.callback_query_handler(codec.on(codec.ADMIN_BACK_TO_REGION), state="*")
 async def back_to_region_from_districts(callback: types.CallbackQuery, state: FSMContext):
     """Viloyat tafsilotlariga qaytish (tumanlar ro'yxatidan)"""
     try:
-        # Callback_data format: "back_to_region_123"
-        parts = callback.data.split('_')
-        if len(parts) >= 4:
-            region_id = int(parts[3])
-        else:
-            await callback.answer("❌ Noto'g'ri format")
-            return
-        
-        region = await db.region.find_unique(
-            where={"id": region_id},
-            include={
-                "districts": True,
-                "ordersFrom": True,
-                "ordersTo": True
-            }
-        )
+        region_id = codec.unpack_id(callback.data)
+
+        region = await db.region.find_unique(where={"id": region_id})
         
         if not region:
             await callback.answer("❌ Viloyat topilmadi")
             return
         
-        total_districts = len(region.districts)
-        total_orders_from = len(region.ordersFrom)
-        total_orders_to = len(region.ordersTo)
+        counts = await region_counts(region_id)
+        total_districts = counts.districts
+        total_orders_from = counts.orders_from
+        total_orders_to = counts.orders_to
         
         message_text = (
             f"🏛️ <b>Viloyat ma'lumotlari</b>\n\n"
@@ -960,16 +913,14 @@ async def back_to_region_districts(callback: types.CallbackQuery, state: FSMCont
             await callback.answer("❌ Viloyat ma'lumotlari topilmadi")
             return
         
-        region = await db.region.find_unique(
-            where={"id": region_id},
-            include={"districts": True}
-        )
+        catalog = await get_catalog()
+        region = catalog.region_by_id.get(region_id)
         
         if not region:
             await callback.answer("❌ Viloyat topilmadi")
             return
         
-        districts = region.districts
+        districts = catalog.districts_of(region_id)
         total_districts = len(districts)
         
         if not districts:
@@ -977,14 +928,14 @@ async def back_to_region_districts(callback: types.CallbackQuery, state: FSMCont
                 f"🏘️ <b>{region.name} viloyati tumanlari</b>\n\n"
                 f"❌ Hozircha hech qanday tuman mavjud emas.\n\n"
                 f"➕ Yangi tuman qo'shish uchun 'Tuman qo'shish' tugmasini bosing.",
-                reply_markup=back_keyboard(f"back_to_region_{region_id}")
+                reply_markup=back_keyboard(codec.pack(codec.ADMIN_BACK_TO_REGION, region_id))
             )
             await callback.answer()
             return
         
-        await state.update_data(districts=districts, current_page=0)
+        await state.update_data(current_page=0)
         
-        keyboard = districts_list_keyboard(districts, region_id)
+        keyboard = districts_list_keyboard(catalog, region_id)
         
         await callback.message.edit_text(
             f"🏘️ <b>{region.name} viloyati tumanlari</b>\n\n"
@@ -1013,19 +964,16 @@ async def back_to_district_detail(callback: types.CallbackQuery, state: FSMConte
         
         district = await db.district.find_unique(
             where={"id": district_id},
-            include={
-                "region": True,
-                "ordersFrom": True,
-                "ordersTo": True
-            }
+            include={"region": True}
         )
         
         if not district:
             await callback.answer("❌ Tuman topilmadi")
             return
         
-        total_orders_from = len(district.ordersFrom)
-        total_orders_to = len(district.ordersTo)
+        counts = await district_counts(district_id)
+        total_orders_from = counts.orders_from
+        total_orders_to = counts.orders_to
         
         message_text = (
             f"🏘️ <b>Tuman ma'lumotlari</b>\n\n"
@@ -1077,22 +1025,16 @@ async def back_to_region_detail_handler(callback: types.CallbackQuery, state: FS
             await callback.answer("❌ Viloyat ma'lumotlari topilmadi")
             return
         
-        region = await db.region.find_unique(
-            where={"id": region_id},
-            include={
-                "districts": True,
-                "ordersFrom": True,
-                "ordersTo": True
-            }
-        )
+        region = await db.region.find_unique(where={"id": region_id})
         
         if not region:
             await callback.answer("❌ Viloyat topilmadi")
             return
         
-        total_districts = len(region.districts)
-        total_orders_from = len(region.ordersFrom)
-        total_orders_to = len(region.ordersTo)
+        counts = await region_counts(region_id)
+        total_districts = counts.districts
+        total_orders_from = counts.orders_from
+        total_orders_to = counts.orders_to
         
         message_text = (
             f"🏛️ <b>Viloyat ma'lumotlari</b>\n\n"
@@ -1120,8 +1062,8 @@ async def back_to_region_detail_handler(callback: types.CallbackQuery, state: FS
 # ==================== ADMIN KOMANDALARI ====================
 
 @dp.message_handler(commands=['admin'])
-async def admin_command(message: types.Message):
-    if not await check_admin_access(message.from_user.id):
+async def admin_command(message: types.Message, user: UserRecord):
+    if not (user and user.is_admin):
         await message.answer("❌ Sizda admin huquqlari mavjud emas!")
         return
     
@@ -1,35 +1,25 @@
 from aiogram import types, Dispatcher
-from datetime import datetime, timedelta
-from loader import dp, db
+from loader import dp
+from utils.db_api.statistics import collect_statistics
+from utils.db_api.users import ADMIN_ROLES
 
-@dp.message_handler(lambda message: message.text == "📊 Statistika", state="*")
+@dp.message_handler(lambda message: message.text == "📊 Statistika", state="*", role=ADMIN_ROLES)
 async def show_statistics(message: types.Message):
     """Statistika tugmasi bosilganda barcha statistikani ko'rsatish"""
     
     try:
-        # Foydalanuvchini bazadan topish va adminligini tekshirish
-        user = await db.user.find_unique(where={"telegramId": message.from_user.id})
-        
-        if not user or user.role not in ["ADMIN", "SUPER_ADMIN"]:
-            await message.answer("❌ Sizda bu amalni bajarish uchun ruxsat yo'q")
-            return
-        
-        # 1. Foydalanuvchilar statistikasi
-        total_users = await db.user.count()
-        drivers_count = await db.user.count(where={"role": "DRIVER"})
-        passengers_count = await db.user.count(where={"role": "PASSENGER"})
-        admins_count = await db.user.count(where={"role": {"in": ["ADMIN", "SUPER_ADMIN"]}})
-        
-        # 2. Buyurtmalar statistikasi
-        total_orders = await db.order.count()
-        
-        # Bugungi buyurtmalar
-        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_orders = await db.order.count(where={"createdAt": {"gte": today_start}})
-        
-        # Oxirgi 7 kun buyurtmalari
-        week_ago = datetime.now() - timedelta(days=7)
-        weekly_orders = await db.order.count(where={"createdAt": {"gte": week_ago}})
+        # Adminlik RoleFilter orqali tekshiriladi
+        # Foydalanuvchilar va buyurtmalar statistikasi (so'rovlar parallel bajariladi)
+        stats = await collect_statistics()
+        users, orders = stats["users"], stats["orders"]
+        total_users = users["total"]
+        drivers_count = users["drivers"]
+        passengers_count = users["passengers"]
+        admins_count = users["admins"]
+        
+        total_orders = orders["total"]
+        today_orders = orders["today"]
+        weekly_orders = orders["week"]
         
         # Xabar tayyorlash
         response = (
@@ -52,3 +42,9 @@ async def show_statistics(message: types.Message):
         
     except Exception as e:
         await message.answer(f"❌ Statistika yuklashda xatolik: {str(e)}")
+
+
+@dp.message_handler(lambda message: message.text == "📊 Statistika", state="*")
+async def show_statistics_denied(message: types.Message):
+    """Admin bo'lmagan foydalanuvchi (yuqoridagi handler role filtri o'tkazmagan)"""
+    await message.answer("❌ Sizda bu amalni bajarish uchun ruxsat yo'q")
@@ -0,0 +1,10 @@
+from aiogram import types
+
+from loader import dp
+from utils.membership import CHANNEL_ID, update_member_status
+
+
+@dp.chat_member_handler(lambda update: update.chat.id == CHANNEL_ID)
+async def channel_member_changed(update: types.ChatMemberUpdated):
+    """Haydovchilar kanalidagi a'zolik o'zgarishi (bot kanal admini bo'lsa keladi)"""
+    update_member_status(update.new_chat_member.user.id, update.new_chat_member.status)
@@ -1,14 +1,30 @@
-import logging
 import asyncio
-import json
+import logging
 import os
-from datetime import datetime, date, timedelta
+from datetime import datetime
 from aiogram import types
-from loader import dp, db, bot
+from loader import dp, db
 from aiogram.dispatcher import FSMContext
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from states.registerstates import DeliveryState
 from utils.userordercontrol import send_order_reminder
+from utils.db_api.catalog import get_order_catalog
+from utils.db_api.orders import create_order, find_claimed_order
+from utils.db_api.lifecycle import transition
+from utils.db_api.users import UserRecord
+from utils.membership import NOT_MEMBER_STATUSES, get_member_status
+from utils.channel_info import get_channel_url
+from utils.db_api.statistics import order_totals, status_distribution
+from utils.channel_posts import publish_later, refresh_later
+from utils import outbox
+from utils.outbox import Priority
+from utils.claim_timeouts import on_claim_expired, track_claim, is_tracked, active_claims, resume_claims
+from data.packages import PACKAGE_TYPES, PACKAGE_SIZES, PACKAGE_TYPE_KEYS, PACKAGE_SIZE_KEYS
+from utils import callback_codec as codec
+from keyboards.order_btns import (
+    regions_markup, districts_markup, package_types_markup, package_sizes_markup,
+    skip_markup, confirm_markup
+)
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,192 +32,25 @@ CHANNEL_ID = int(os.getenv("CHANNEL_ID"))
 OWNER_ID = int(os.getenv("OWNER_ID"))
 BOT_USERNAME = os.getenv("BOT_USERNAME")
 
-# Processing holatidagi pochta buyurtmalari uchun timer
-delivery_processing_timers = {}
-
-# Kanal xabar ID larini saqlash uchun
-delivery_channel_messages = {}
-
-# Paket turlari
-PACKAGE_TYPES = {
-    "DOCUMENT": {"name": "📄 Hujjat", "emoji": "📄"},
-    "PARCEL": {"name": "📦 Posilka", "emoji": "📦"},
-    "FRAGILE": {"name": "🔸 Mo'rt buyum", "emoji": "🔸"},
-    "VALUABLE": {"name": "💎 Qimmatbaho", "emoji": "💎"},
-    "OTHER": {"name": "📋 Boshqa", "emoji": "📋"}
-}
-
-# Paket hajmlari
-PACKAGE_SIZES = {
-    "SMALL": {"name": "📦 Kichik (10kg gacha)", "emoji": "📦", "weight": "10kg gacha"},
-    "MEDIUM": {"name": "📦 O'rta (10-25kg)", "emoji": "📦", "weight": "10-25kg"},
-    "LARGE": {"name": "📦 Katta (25-50kg)", "emoji": "📦", "weight": "25-50kg"},
-    "EXTRA_LARGE": {"name": "📦 Juda katta (50kg+)", "emoji": "📦", "weight": "50kg dan ortiq"}
-}
-
-async def get_regions_and_districts():
-    """Bazadan viloyat va tumanlarni to'g'ridan-to'g'ri o'qib olish"""
-    try:
-        # Viloyatlarni bazadan olish
-        regions = await db.region.find_many(order={"name": "asc"})
-        regions_dict = {region.id: region.name for region in regions}
-        
-        # Tumanlarni bazadan olish va viloyat ID bo'yicha guruhlash
-        districts = await db.district.find_many(
-            include={"region": True},
-            order={"name": "asc"}
-        )
-        
-        districts_dict = {}
-        for district in districts:
-            region_name = district.region.name
-            if region_name not in districts_dict:
-                districts_dict[region_name] = []
-            districts_dict[region_name].append(district.name)
-            
-        logging.info(f"Bazadan {len(regions_dict)} ta viloyat va {sum(len(d) for d in districts_dict.values())} ta tuman yuklandi")
-        return regions_dict, districts_dict
-        
-    except Exception as e:
-        logging.error(f"Viloyat va tumanlarni yuklashda xato: {e}")
-        # Fallback
-        try:
-            with open("regions.json", "r", encoding="utf-8") as file:
-                fallback_data = json.load(file)
-                regions_dict = {i: name for i, name in enumerate(fallback_data.keys(), 1)}
-            logging.info("Fallback: JSON fayldan viloyat va tumanlar yuklandi")
-            return regions_dict, fallback_data
-        except Exception as json_error:
-            logging.error(f"JSON fayldan ham yuklab bo'lmadi: {json_error}")
-            return {}, {}
-
-async def get_channel_url():
-    try:
-        chat = await bot.get_chat(CHANNEL_ID)
-        return f"https://t.me/{chat.username.replace('@', '')}" if chat.username else f"https://t.me/c/{str(CHANNEL_ID)[4:]}"
-    except Exception as e:
-        logging.error(f"Kanal ma'lumotlarini olishda xato: {e}")
-        return f"https://t.me/c/{str(CHANNEL_ID)[4:]}"
+CATALOG_UNAVAILABLE = "❌ Viloyat va tumanlar ro'yxati hozircha mavjud emas. Iltimos, birozdan keyin qayta urinib ko'ring."
 
-async def delivery_processing_timer(order_id, channel_message_id):
-    """5 daqiqa kutib, pochta buyurtmasini yana NEW holatiga o'tkazish"""
-    try:
-        await asyncio.sleep(300)  # 5 daqiqa kutish
-        
-        # Buyurtma holatini tekshirish
-        order = await db.order.find_unique(
-            where={"id": order_id},
-            include={
-                "status": True,
-                "fromDistrict": True,
-                "toDistrict": True
-            }
-        )
-        
-        if not order or not order.status:
-            logging.warning(f"Delivery order {order_id} yoki status topilmadi")
-            return
-            
-        # Agar hali ham processing holatida bo'lsa, NEW ga qaytarish
-        if order.status.status == "processing":
-            await db.orderstatus.update(
-                where={"orderId": order_id},
-                data={"status": "initiated"}
-            )
-            
-            # Yangilangan buyurtmani olish
-            updated_order = await db.order.find_unique(
-                where={"id": order_id},
-                include={
-                    "status": True,
-                    "fromDistrict": True,
-                    "toDistrict": True
-                }
-            )
-            
-            # Kanal xabarini yangilash
-            await update_channel_delivery_status(updated_order, channel_message_id)
-            logging.info(f"Delivery order {order_id} 5 daqiqa o'tgach NEW holatiga qaytarildi")
-            
-        # Timer ro'yxatdan o'chirish
-        if order_id in delivery_processing_timers:
-            del delivery_processing_timers[order_id]
-            
-    except Exception as e:
-        logging.error(f"Delivery processing timer error for order {order_id}: {e}")
-        if order_id in delivery_processing_timers:
-            del delivery_processing_timers[order_id]
+async def _restart_delivery(message: types.Message, state: FSMContext):
+    """Katalog wizard davomida o'zgardi (yoki baza ishlamayapti) - jarayonni qaytadan boshlash"""
+    await state.finish()
+    await message.answer("❌ Viloyat va tumanlar ro'yxati o'zgardi. Iltimos, pochta buyurtmani qaytadan boshlang.")
 
-async def update_channel_delivery_status(order, channel_message_id=None):
-    """Kanal pochta xabarini yangilash"""
-    try:
-        if not channel_message_id:
-            logging.warning(f"Delivery order {order.id} uchun channel_message_id topilmadi")
-            return
-        
-        status_mapping = {
-            "initiated": {"status": "NEW", "emoji": "🆕"},
-            "processing": {"status": "JARAYONDA", "emoji": "🔄"},
-            "completed": {"status": "YAKUNLANDI", "emoji": "✅"},
-            "canceled": {"status": "BEKOR QILINDI", "emoji": "❌"},
-            "failed": {"status": "XATOLIK", "emoji": "⚠️"}
-        }
-        
-        current_status = order.status.status if order.status else "initiated"
-        status_info = status_mapping.get(current_status, {"status": "NOMA'LUM", "emoji": "❓"})
-        
-        from_district_name = order.fromDistrict.name if hasattr(order, 'fromDistrict') and order.fromDistrict else "Noma'lum"
-        to_district_name = order.toDistrict.name if hasattr(order, 'toDistrict') and order.toDistrict else "Noma'lum"
-        
-        # Paket ma'lumotlarini tayyorlash
-        package_info = ""
-        if order.packageType:
-            package_info += f"\n📦 Turi: {PACKAGE_TYPES.get(order.packageType, {}).get('name', 'Nomalum')}"
-        if order.packageSize:
-            package_info += f"\n📏 Hajmi: {PACKAGE_SIZES.get(order.packageSize, {}).get('name', 'Nomalum')}"
-        if order.packageWeight:
-            package_info += f"\n⚖️ Og'irligi: {order.packageWeight} kg"
-        if order.receiverName:
-            package_info += f"\n👤 Qabul qiluvchi: {order.receiverName}"
-        
-        new_text = f"""{status_info['emoji']} *Pochta buyurtma - {status_info['status']}*  
-🚦 Holati: *{status_info['status']}*  
-📍 Qayerdan: {from_district_name}  
-📍 Qayerga: {to_district_name}{package_info}"""
-        
-        reply_markup = None
-        # Faqat initiated holatida tugma ko'rsatish
-        if current_status == "initiated":
-            keyboard = InlineKeyboardMarkup()
-            keyboard.add(InlineKeyboardButton("📞 Jo'natuvchi bilan bog'lanish", callback_data=f"contact_sender_{order.id}"))
-            reply_markup = keyboard
-        
-        # Canceled buyurtmalarni o'chirish
-        if current_status == "canceled":
-            try:
-                await bot.delete_message(chat_id=CHANNEL_ID, message_id=channel_message_id)
-                logging.info(f"Bekor qilingan pochta buyurtma {order.id} kanaldan o'chirildi")
-                return
-            except Exception as delete_error:
-                logging.error(f"Pochta xabarini o'chirishda xato: {delete_error}")
-        
-        await bot.edit_message_text(
-            chat_id=CHANNEL_ID,
-            message_id=channel_message_id,
-            text=new_text,
-            parse_mode="Markdown",
-            reply_markup=reply_markup
-        )
-        
-        logging.info(f"Pochta kanal posti muvaffaqiyatli yangilandi: Order {order.id}, Status: {current_status}")
-        
-    except Exception as e:
-        logging.error(f"Pochta kanal postini yangilashda xato: Order {order.id}, Error: {e}")
+@on_claim_expired("DELIVERY")
+async def revert_claimed_delivery(order):
+    """Haydovchi pochta buyurtmani 5 daqiqada yakunlamadi - kanal postini NEW holatiga qaytarish"""
+    refresh_later(order)
 
 @dp.message_handler(lambda message: message.text == "📦 Pochta jonatish", state="*")
 async def start_delivery(message: types.Message, state: FSMContext):
     """Pochta jo'natish jarayonini boshlash"""
-    regions_dict, districts_dict = await get_regions_and_districts()
+    catalog = await get_order_catalog()
+    if catalog is None:
+        await message.answer(CATALOG_UNAVAILABLE)
+        return
     
     data = await state.get_data()
     old_msg_id = data.get("last_inline_message_id")
@@ -211,100 +60,86 @@ async def start_delivery(message: types.Message, state: FSMContext):
         except:
             pass
 
-    keyboard = InlineKeyboardMarkup(row_width=2)
-    for region_name in districts_dict.keys():
-        keyboard.insert(InlineKeyboardButton(text=region_name, callback_data=f"delivery_from_{region_name}"))
+    keyboard = regions_markup(catalog, codec.DELIVERY_FROM_REGION)
     
     msg = await message.answer("📦 Qaysi viloyatdan pochta jo'natmoqchisiz?", reply_markup=keyboard)
     await state.update_data(last_inline_message_id=msg.message_id)
     await DeliveryState.from_region.set()
 
-@dp.callback_query_handler(lambda c: c.data.startswith("delivery_from_"), state=DeliveryState.from_region)
+@dp.callback_query_handler(codec.on(codec.DELIVERY_FROM_REGION), state=DeliveryState.from_region)
 async def select_delivery_from_district(callback_query: types.CallbackQuery, state: FSMContext):
-    viloyat = callback_query.data.split("_")[2]
-    await state.update_data(from_region=viloyat)
+    region_id = codec.unpack_id(callback_query.data)
+    await state.update_data(from_region_id=region_id)
     
-    regions_dict, districts_dict = await get_regions_and_districts()
-    
-    keyboard = InlineKeyboardMarkup(row_width=2)
-    for district in districts_dict.get(viloyat, []):
-        keyboard.insert(InlineKeyboardButton(text=district, callback_data=f"delivery_from_district_{district}"))
+    catalog = await get_order_catalog()
+    region = catalog and catalog.region_by_id.get(region_id)
+    if not region:
+        await _restart_delivery(callback_query.message, state)
+        return
+    viloyat = region.name
+    keyboard = districts_markup(catalog, region_id, codec.DELIVERY_FROM_DISTRICT)
 
     await callback_query.message.edit_text(f"📦 {viloyat} viloyati, qaysi tumandan pochta jo'natmoqchisiz?", reply_markup=keyboard)
     await DeliveryState.from_district.set()
 
-@dp.callback_query_handler(lambda c: c.data.startswith("delivery_from_district_"), state=DeliveryState.from_district)
+@dp.callback_query_handler(codec.on(codec.DELIVERY_FROM_DISTRICT), state=DeliveryState.from_district)
 async def ask_delivery_to_region(callback_query: types.CallbackQuery, state: FSMContext):
-    tuman = callback_query.data.split("_")[3]
-    await state.update_data(from_district=tuman)
+    district_id = codec.unpack_id(callback_query.data)
+    await state.update_data(from_district_id=district_id)
     
     user_data = await state.get_data()
-    from_region = user_data.get("from_region")
+    from_region_id = user_data.get("from_region_id")
     
-    regions_dict, districts_dict = await get_regions_and_districts()
-    
-    keyboard = InlineKeyboardMarkup(row_width=2)
-    for region_name in districts_dict.keys():
-        if region_name != from_region:
-            keyboard.insert(InlineKeyboardButton(text=region_name, callback_data=f"delivery_to_{region_name}"))
+    catalog = await get_order_catalog()
+    if catalog is None:
+        await _restart_delivery(callback_query.message, state)
+        return
+    keyboard = regions_markup(catalog, codec.DELIVERY_TO_REGION, exclude=from_region_id)
 
     await callback_query.message.edit_text("📦 Qaysi viloyatga pochta jo'natmoqchisiz?", reply_markup=keyboard)
     await DeliveryState.to_region.set()
 
-@dp.callback_query_handler(lambda c: c.data.startswith("delivery_to_"), state=DeliveryState.to_region)
+@dp.callback_query_handler(codec.on(codec.DELIVERY_TO_REGION), state=DeliveryState.to_region)
 async def select_delivery_to_district(callback_query: types.CallbackQuery, state: FSMContext):
-    viloyat = callback_query.data.split("_")[2]
+    region_id = codec.unpack_id(callback_query.data)
     user_data = await state.get_data()
-    from_district = user_data.get("from_district")
+    from_district_id = user_data.get("from_district_id")
     
-    await state.update_data(to_region=viloyat)
+    await state.update_data(to_region_id=region_id)
 
-    regions_dict, districts_dict = await get_regions_and_districts()
-    
-    keyboard = InlineKeyboardMarkup(row_width=2)
-    for district in districts_dict.get(viloyat, []):
-        if district != from_district:
-            keyboard.insert(InlineKeyboardButton(text=district, callback_data=f"delivery_to_district_{district}"))
+    catalog = await get_order_catalog()
+    region = catalog and catalog.region_by_id.get(region_id)
+    if not region:
+        await _restart_delivery(callback_query.message, state)
+        return
+    viloyat = region.name
+    keyboard = districts_markup(catalog, region_id, codec.DELIVERY_TO_DISTRICT, exclude=from_district_id)
 
     await callback_query.message.edit_text(f"📦 {viloyat} viloyati, qaysi tumanga pochta jo'natmoqchisiz?", reply_markup=keyboard)
     await DeliveryState.to_district.set()
 
-@dp.callback_query_handler(lambda c: c.data.startswith("delivery_to_district_"), state=DeliveryState.to_district)
+@dp.callback_query_handler(codec.on(codec.DELIVERY_TO_DISTRICT), state=DeliveryState.to_district)
 async def ask_package_type(callback_query: types.CallbackQuery, state: FSMContext):
-    tuman = callback_query.data.split("_")[3]
-    await state.update_data(to_district=tuman)
+    district_id = codec.unpack_id(callback_query.data)
+    await state.update_data(to_district_id=district_id)
     
-    keyboard = InlineKeyboardMarkup(row_width=2)
-    for key, value in PACKAGE_TYPES.items():
-        keyboard.insert(InlineKeyboardButton(text=value["name"], callback_data=f"package_type_{key}"))
-    
-    await callback_query.message.edit_text("📦 Pochta turini tanlang:", reply_markup=keyboard)
+    await callback_query.message.edit_text("📦 Pochta turini tanlang:", reply_markup=package_types_markup())
     await DeliveryState.package_type.set()
 
-@dp.callback_query_handler(lambda c: c.data.startswith("package_type_"), state=DeliveryState.package_type)
+@dp.callback_query_handler(codec.on(codec.DELIVERY_PACKAGE_TYPE), state=DeliveryState.package_type)
 async def ask_package_size(callback_query: types.CallbackQuery, state: FSMContext):
-    package_type = callback_query.data.split("_")[2]
+    package_type = PACKAGE_TYPE_KEYS[codec.unpack_id(callback_query.data)]
     await state.update_data(package_type=package_type)
     
-    keyboard = InlineKeyboardMarkup(row_width=1)
-    for key, value in PACKAGE_SIZES.items():
-        keyboard.insert(InlineKeyboardButton(text=value["name"], callback_data=f"package_size_{key}"))
-    
-    await callback_query.message.edit_text("📏 Pochta hajmini tanlang:", reply_markup=keyboard)
+    await callback_query.message.edit_text("📏 Pochta hajmini tanlang:", reply_markup=package_sizes_markup())
     await DeliveryState.package_size.set()
 
-@dp.callback_query_handler(lambda c: c.data.startswith("package_size_"), state=DeliveryState.package_size)
+@dp.callback_query_handler(codec.on(codec.DELIVERY_PACKAGE_SIZE), state=DeliveryState.package_size)
 async def ask_package_weight(callback_query: types.CallbackQuery, state: FSMContext):
-    package_size = callback_query.data.split("_")[2]
-    
-    # PackageSize ni to'g'ri formatga keltirish
-    if package_size == "EXTRA":
-        package_size = "EXTRA_LARGE"
-    
+    package_size = PACKAGE_SIZE_KEYS[codec.unpack_id(callback_query.data)]
     await state.update_data(package_size=package_size)
     
-    keyboard = InlineKeyboardMarkup(row_width=1)
-    keyboard.add(InlineKeyboardButton("⏭️ O'tkazib yuborish", callback_data="skip_weight"))
+    keyboard = skip_markup("skip_weight")
     
     await callback_query.message.edit_text(
         "⚖️ Pochta og'irligini kg da kiriting yoki o'tkazib yuboring:\n"
@@ -333,8 +168,7 @@ async def process_package_weight(message: types.Message, state: FSMContext):
 
 async def ask_package_description_step(message_or_callback, state):
     """Paket tavsifi so'rash"""
-    keyboard = InlineKeyboardMarkup(row_width=1)
-    keyboard.add(InlineKeyboardButton("⏭️ O'tkazib yuborish", callback_data="skip_description"))
+    keyboard = skip_markup("skip_description")
     
     if isinstance(message_or_callback, types.CallbackQuery):
         await message_or_callback.message.edit_text(
@@ -366,8 +200,7 @@ async def process_package_description(message: types.Message, state: FSMContext)
 
 async def ask_receiver_info_step(message_or_callback, state):
     """Qabul qiluvchi ma'lumotlarini so'rash"""
-    keyboard = InlineKeyboardMarkup(row_width=1)
-    keyboard.add(InlineKeyboardButton("⏭️ O'tkazib yuborish", callback_data="skip_receiver"))
+    keyboard = skip_markup("skip_receiver")
     
     if isinstance(message_or_callback, types.CallbackQuery):
         await message_or_callback.message.edit_text(
@@ -396,8 +229,7 @@ async def process_receiver_name(message: types.Message, state: FSMContext):
     
     await state.update_data(receiver_name=receiver_name)
     
-    keyboard = InlineKeyboardMarkup(row_width=1)
-    keyboard.add(InlineKeyboardButton("⏭️ O'tkazib yuborish", callback_data="skip_receiver_phone"))
+    keyboard = skip_markup("skip_receiver_phone")
     
     await message.answer(
         "📞 Qabul qiluvchi telefon raqamini kiriting yoki o'tkazib yuboring:\n"
@@ -419,6 +251,20 @@ async def process_receiver_phone(message: types.Message, state: FSMContext):
 async def update_delivery_and_confirm(message_or_callback, state):
     """Pochta buyurtmasini tasdiqlash"""
     user_data = await state.get_data()
+    catalog = await get_order_catalog()
+    route = catalog and (
+        catalog.region_by_id.get(user_data.get('from_region_id')),
+        catalog.district_by_id.get(user_data.get('from_district_id')),
+        catalog.region_by_id.get(user_data.get('to_region_id')),
+        catalog.district_by_id.get(user_data.get('to_district_id'))
+    )
+    if not route or not all(route):
+        message = message_or_callback
+        if isinstance(message, types.CallbackQuery):
+            message = message.message
+        await _restart_delivery(message, state)
+        return
+    from_region, from_district, to_region, to_district = route
     
     # Ma'lumotlarni tayyorlash
     package_type_name = PACKAGE_TYPES.get(user_data.get('package_type', ''), {}).get('name', 'Tanlanmagan')
@@ -426,8 +272,8 @@ async def update_delivery_and_confirm(message_or_callback, state):
     
     order_info = f"""📦 Pochta buyurtma ma'lumotlari:
 
-📍 Jo'natish manzili: {user_data['from_region']}, {user_data['from_district']}
-📍 Qabul qilish manzili: {user_data['to_region']}, {user_data['to_district']}
+📍 Jo'natish manzili: {from_region.name}, {from_district.name}
+📍 Qabul qilish manzili: {to_region.name}, {to_district.name}
 
 📦 Pochta ma'lumotlari:
 • Turi: {package_type_name}
@@ -447,11 +293,7 @@ async def update_delivery_and_confirm(message_or_callback, state):
     
     order_info += "\n\nMa'lumotlar to'g'rimi?"
 
-    keyboard = InlineKeyboardMarkup()
-    keyboard.row(
-        InlineKeyboardButton("✅ Tasdiqlash", callback_data="confirm_delivery"),
-        InlineKeyboardButton("❌ Bekor qilish", callback_data="cancel_delivery")
-    )
+    keyboard = confirm_markup("confirm_delivery", "cancel_delivery")
 
     if isinstance(message_or_callback, types.CallbackQuery):
         await message_or_callback.message.edit_text(order_info, reply_markup=keyboard)
@@ -466,67 +308,21 @@ async def confirm_delivery(callback_query: types.CallbackQuery, state: FSMContex
     data = await state.get_data()
 
     try:
-        user = await db.user.find_unique(where={"telegramId": callback_query.from_user.id})
-
-        if not user:
-            user = await db.user.create({
-                "telegramId": callback_query.from_user.id,
-                "firstName": callback_query.from_user.first_name or "",
-                "lastName": callback_query.from_user.last_name or "",
-                "username": callback_query.from_user.username,
-                "phoneNumber": "",
-                "role": "PASSENGER"
-            })
-
-        # Viloyat va tuman ID larini topish
-        from_region = await db.region.find_first(where={"name": data.get("from_region")})
-        to_region = await db.region.find_first(where={"name": data.get("to_region")})
-        
-        if not from_region or not to_region:
-            await callback_query.message.edit_text("❌ Viloyat ma'lumotlari topilmadi. Iltimos, qayta urinib ko'ring.")
-            await state.finish()
-            return
-        
-        from_district = await db.district.find_first(
-            where={
-                "name": data.get("from_district"),
-                "regionId": from_region.id
-            }
-        )
-        
-        to_district = await db.district.find_first(
-            where={
-                "name": data.get("to_district"),
-                "regionId": to_region.id
-            }
-        )
+        # Viloyat va tuman ID lari wizard davomida saqlangan
+        catalog = await get_order_catalog()
+        from_district = catalog and catalog.district_by_id.get(data.get("from_district_id"))
+        to_district = catalog and catalog.district_by_id.get(data.get("to_district_id"))
 
         if not from_district or not to_district:
             await callback_query.message.edit_text("❌ Tuman ma'lumotlari topilmadi. Iltimos, qayta urinib ko'ring.")
             await state.finish()
             return
 
-        # PackageSize ni to'g'ri formatga keltirish
-        package_size = data.get("package_size")
-        if package_size:
-            # EXTRA ni EXTRA_LARGE ga o'zgartirish
-            if package_size == "EXTRA":
-                package_size = "EXTRA_LARGE"
-            # Boshqa noto'g'ri qiymatlarni tekshirish
-            valid_sizes = ["SMALL", "MEDIUM", "LARGE", "EXTRA_LARGE"]
-            if package_size not in valid_sizes:
-                package_size = None
-
         # Pochta buyurtmasini yaratish
         order_data = {
-            "passengerId": user.id,
             "orderType": "DELIVERY",
-            "fromRegionId": from_region.id,
-            "fromDistrictId": from_district.id,
-            "toRegionId": to_region.id,
-            "toDistrictId": to_district.id,
             "packageType": data.get("package_type"),
-            "packageSize": package_size
+            "packageSize": data.get("package_size")
         }
         
         # Optional fieldlarni qo'shish
@@ -539,46 +335,14 @@ async def confirm_delivery(callback_query: types.CallbackQuery, state: FSMContex
         if data.get("receiver_phone"):
             order_data["receiverPhone"] = data.get("receiver_phone")
 
-        # Null qiymatlarni olib tashlash
-        order_data = {k: v for k, v in order_data.items() if v is not None}
-
-        order = await db.order.create(order_data)
-
-        # Status yaratish (initiated holatida)
-        order_status = await db.orderstatus.create({
-            "status": "initiated",
-            "orderId": order.id,
-            "userId": user.id
-        })
+        # Buyurtma va uning statusi bitta so'rovda yaratiladi (null qiymatlar tashlab yuboriladi)
+        order = await create_order(callback_query.from_user, from_district, to_district, **order_data)
 
-        # Kanalga xabar yuborish uchun ma'lumotlarni tayyorlash
-        package_type_name = PACKAGE_TYPES.get(data.get("package_type", ""), {}).get("name", "Noma'lum")
-        package_size_name = PACKAGE_SIZES.get(data.get("package_size", ""), {}).get("name", "Noma'lum")
-        
-        channel_text = f"""📦 *Yangi pochta buyurtma!*  
-🚦 Holati: *NEW*  
-📍 Qayerdan: {data["from_district"]}  
-📍 Qayerga: {data["to_district"]}  
-📦 Turi: {package_type_name}  
-📏 Hajmi: {package_size_name}"""
+        # Eslatma va avtomatik bekor qilish vazifalari post natijasidan qat'i nazar rejalashtiriladi
+        await send_order_reminder(order.id, order.passenger.telegramId)
 
-        if data.get("package_weight"):
-            channel_text += f"\n⚖️ Og'irligi: {data['package_weight']} kg"
-
-        # Kanal uchun klaviatura
-        keyboard = InlineKeyboardMarkup()
-        keyboard.add(InlineKeyboardButton("📞 Jo'natuvchi bilan bog'lanish", callback_data=f"contact_sender_{order.id}"))
-
-        # Kanalga xabar yuborish
-        channel_message = await bot.send_message(
-            chat_id=CHANNEL_ID,  
-            text=channel_text,
-            parse_mode="Markdown",
-            reply_markup=keyboard
-        )
-
-        # Channel message ID ni saqlash
-        delivery_channel_messages[order.id] = channel_message.message_id
+        # Kanalga post fonda yuboriladi (post ID si ham saqlanadi) - foydalanuvchi kanal navbatini kutmaydi
+        publish_later(order, from_district.name, to_district.name)
 
         # Foydalanuvchi uchun klaviatura
         user_keyboard = InlineKeyboardMarkup(row_width=2)
@@ -595,10 +359,6 @@ async def confirm_delivery(callback_query: types.CallbackQuery, state: FSMContex
             parse_mode="Markdown"
         )
         
-        # Order reminder yuborish
-        bg_task = asyncio.create_task(send_order_reminder(order.id, user.telegramId))
-        bg_task.add_done_callback(lambda t: logging.error(f"Delivery order reminder task error: {t.exception()}") if t.exception() else None)
-        
     except Exception as e:
         logging.error(f"Pochta buyurtma yaratishda xato: {e}")
         await callback_query.message.edit_text("❌ Xatolik yuz berdi! Iltimos, qayta urinib ko'ring.")
@@ -613,13 +373,12 @@ async def cancel_delivery_creation(callback_query: types.CallbackQuery, state: F
     await callback_query.message.edit_text("❌ Pochta buyurtma bekor qilindi.")
 
 @dp.callback_query_handler(lambda c: c.data.startswith("contact_sender_"))
-async def send_sender_info(callback_query: types.CallbackQuery):
+async def send_sender_info(callback_query: types.CallbackQuery, user: UserRecord):
     """Haydovchi jo'natuvchi bilan bog'lanish tugmasini bosganda"""
     user_id = callback_query.from_user.id
     order_id = int(callback_query.data.split("_")[-1])
 
-    # Foydalanuvchini tekshirish
-    user = await db.user.find_unique(where={"telegramId": user_id})
+    # Foydalanuvchini tekshirish (IdentityMiddleware aniqlagan)
     if not user:
         await callback_query.answer(
             f"❌ Siz botda ro'yxatdan o'tmagansiz. Iltimos, botni ishlatish uchun ro'yxatdan o'ting: {BOT_USERNAME}",
@@ -637,8 +396,8 @@ async def send_sender_info(callback_query: types.CallbackQuery):
 
     # Kanal a'zoligini tekshirish
     try:
-        member = await bot.get_chat_member(chat_id=CHANNEL_ID, user_id=user_id)
-        if member.status in ["left", "kicked", "restricted"] and user_id != OWNER_ID:
+        status = await get_member_status(user_id)
+        if status in NOT_MEMBER_STATUSES and user_id != OWNER_ID:
             channel_url = await get_channel_url()
             await callback_query.answer(
                 f"❌ Siz kanalga obuna bo'lmagansiz! Iltimos, avval kanalga obuna bo'ling: {channel_url}",
@@ -650,61 +409,10 @@ async def send_sender_info(callback_query: types.CallbackQuery):
         await callback_query.answer("⚠️ Obunani tekshirishda xatolik yuz berdi.", show_alert=True)
         return
 
-    # Buyurtmani olish
-    order = await db.order.find_unique(
-        where={"id": order_id},
-        include={
-            "passenger": True,
-            "status": True,
-            "fromRegion": True,
-            "fromDistrict": True,
-            "toRegion": True,
-            "toDistrict": True
-        }
-    )
+    # Buyurtmani atomar olish: faqat hali hech kim olmagan bo'lsa (bitta so'rov)
+    order = await transition(order_id, "claim", user_id=user.id)
 
-    if not order:
-        await callback_query.answer("❌ Buyurtma topilmadi yoki allaqachon o'chirilgan.", show_alert=True)
-        return
-    
-    current_status = order.status.status if order.status else "initiated"
-    
-    # Faqat initiated holatidagi buyurtmalarga ruxsat
-    if current_status == "initiated":
-        # Status ni processing ga o'zgartirish
-        await db.orderstatus.update(
-            where={"orderId": order_id},
-            data={
-                "status": "processing",
-                "userId": user.id  # Kim processing qilayotganini belgilash
-            }
-        )
-        
-        # Yangilangan buyurtmani olish
-        updated_order = await db.order.find_unique(
-            where={"id": order_id},
-            include={
-                "passenger": True,
-                "status": True,
-                "fromRegion": True,
-                "fromDistrict": True,
-                "toRegion": True,
-                "toDistrict": True
-            }
-        )
-        
-        # Kanal xabarini yangilash (tugmani o'chirish)
-        channel_message_id = delivery_channel_messages.get(order_id)
-        if channel_message_id:
-            await update_channel_delivery_status(updated_order, channel_message_id)
-        
-        # 5 daqiqaalik timer o'rnatish
-        if order_id in delivery_processing_timers:
-            delivery_processing_timers[order_id].cancel()
-        
-        timer_task = asyncio.create_task(delivery_processing_timer(order_id, channel_message_id))
-        delivery_processing_timers[order_id] = timer_task
-        
+    if order:
         # Haydovchiga jo'natuvchi ma'lumotlarini yuborish
         package_type_name = PACKAGE_TYPES.get(order.packageType, {}).get('name', 'Nomalum')
         package_size_name = PACKAGE_SIZES.get(order.packageSize, {}).get('name', 'Nomalum')
@@ -734,9 +442,23 @@ async def send_sender_info(callback_query: types.CallbackQuery):
         if order.passenger.username:
             sender_info += f"\n🔗 Telegram: @{order.passenger.username}"
 
-        await bot.send_message(callback_query.from_user.id, sender_info, parse_mode="Markdown")
+        # Kanal xabarini fonda yangilash (tugmani o'chirish)
+        refresh_later(order)
         await callback_query.answer("✅ Pochta buyurtma jarayonga olindi! Jo'natuvchi ma'lumotlari yuborildi. 5 daqiqa vaqtingiz bor.", show_alert=True)
-    
+        await outbox.send_message(callback_query.from_user.id, sender_info, priority=Priority.CHANNEL, parse_mode="Markdown")
+        return
+
+    # Yutqazgan bosish: buyurtma kimda yoki qaysi holatda ekanini ko'rsatish
+    order = await find_claimed_order(order_id)
+    if not order:
+        await callback_query.answer("❌ Buyurtma topilmadi yoki allaqachon o'chirilgan.", show_alert=True)
+        return
+
+    current_status = order.status.status if order.status else "initiated"
+
+    if current_status == "initiated":
+        # Oraliqda muddati tugab qaytarilgan yoki statusi yo'q eski buyurtma
+        await callback_query.answer("⏳ Buyurtma holati o'zgardi. Iltimos, qayta urinib ko'ring.", show_alert=True)
     elif current_status == "processing":
         # Agar boshqa haydovchi processing qilayotgan bo'lsa
         processing_user = order.status.user
@@ -747,11 +469,8 @@ async def send_sender_info(callback_query: types.CallbackQuery):
             await callback_query.answer("⏳ Siz allaqachon bu pochta buyurtmani jarayonga oldingiz.", show_alert=True)
     
     else:
-        # Boshqa statuslar uchun
-        channel_message_id = delivery_channel_messages.get(order_id)
-        if channel_message_id:
-            await update_channel_delivery_status(order, channel_message_id)
-        
+        # Boshqa statuslar uchun (kanal posti fonda yangilanadi)
+        refresh_later(order)
         status_messages = {
             "canceled": "❌ Pochta buyurtma bekor qilindi! (CANCELED)",
             "completed": "❗️😢 Pochta buyurtma yakunlandi! \nJo'natuvchi haydovchi bilan kelishib bo'ldi. (COMPLETED)",
@@ -761,47 +480,19 @@ async def send_sender_info(callback_query: types.CallbackQuery):
         status_message = status_messages.get(current_status, "Holati noma'lum")
         await callback_query.answer(status_message, show_alert=True)
 
-async def get_delivery_channel_message_id(order_id):
-    """Pochta buyurtma uchun channel message ID ni olish"""
-    return delivery_channel_messages.get(order_id)
-
 @dp.callback_query_handler(lambda c: c.data.startswith("complete_delivery_"))
 async def complete_delivery(callback_query: types.CallbackQuery, state: FSMContext):
     """Pochta buyurtmasini yakunlash"""
     order_id = int(callback_query.data.split("_")[-1])
 
-    order = await db.order.find_unique(
-        where={"id": order_id}, 
-        include={"status": True, "fromDistrict": True, "toDistrict": True}
-    )
-    
-    if not order or (order.status and order.status.status not in ["initiated", "processing"]):
+    # Status ni completed ga o'zgartirish (muddat nazorati hook orqali to'xtaydi)
+    order = await transition(order_id, "complete")
+    if not order:
         await callback_query.answer("❌ Pochta buyurtma allaqachon o'zgartirilgan yoki mavjud emas.", show_alert=True)
         return
 
-    # Timer ni to'xtatish
-    if order_id in delivery_processing_timers:
-        delivery_processing_timers[order_id].cancel()
-        del delivery_processing_timers[order_id]
-
-    # Status ni completed ga o'zgartirish
-    await db.orderstatus.update(
-        where={"orderId": order_id},
-        data={"status": "completed"}
-    )
-
-    # Yangilangan buyurtmani olish
-    updated_order = await db.order.find_unique(
-        where={"id": order_id}, 
-        include={"status": True, "fromDistrict": True, "toDistrict": True}
-    )
-
-    # Kanal xabarini yangilash
-    channel_message_id = await get_delivery_channel_message_id(order_id)
-    if channel_message_id:
-        await update_channel_delivery_status(updated_order, channel_message_id)
-    else:
-        logging.warning(f"Delivery order {order_id} uchun channel_message_id topilmadi")
+    # Kanal xabarini fonda yangilash
+    refresh_later(order)
 
     await callback_query.message.edit_text("✅ Pochta buyurtma muvaffaqiyatli yakunlandi!", reply_markup=None)
     await callback_query.answer()
@@ -811,77 +502,31 @@ async def cancel_delivery_status(callback_query: types.CallbackQuery, state: FSM
     """Pochta buyurtmasini bekor qilish"""
     order_id = int(callback_query.data.split("_")[-1])
 
-    order = await db.order.find_unique(
-        where={"id": order_id}, 
-        include={"status": True, "fromDistrict": True, "toDistrict": True}
-    )
-    
-    if not order or (order.status and order.status.status not in ["initiated", "processing"]):
+    # Status ni canceled ga o'zgartirish (muddat nazorati hook orqali to'xtaydi)
+    order = await transition(order_id, "cancel")
+    if not order:
         await callback_query.answer("❌ Pochta buyurtma allaqachon o'zgartirilgan yoki mavjud emas.", show_alert=True)
         return
 
-    # Timer ni to'xtatish
-    if order_id in delivery_processing_timers:
-        delivery_processing_timers[order_id].cancel()
-        del delivery_processing_timers[order_id]
-
-    # Status ni canceled ga o'zgartirish
-    await db.orderstatus.update(
-        where={"orderId": order_id},
-        data={"status": "canceled"}
-    )
-
-    # Yangilangan buyurtmani olish
-    updated_order = await db.order.find_unique(
-        where={"id": order_id}, 
-        include={"status": True, "fromDistrict": True, "toDistrict": True}
-    )
-
-    # Kanal xabarini yangilash (canceled xabarlar avtomatik o'chiriladi)
-    channel_message_id = await get_delivery_channel_message_id(order_id)
-    if channel_message_id:
-        await update_channel_delivery_status(updated_order, channel_message_id)
-        # Channel messages ro'yxatdan o'chirish
-        if order_id in delivery_channel_messages:
-            del delivery_channel_messages[order_id]
-    else:
-        logging.warning(f"Delivery order {order_id} uchun channel_message_id topilmadi")
+    # Kanal xabarini fonda yangilash (canceled xabarlar avtomatik o'chiriladi)
+    refresh_later(order)
 
     await callback_query.message.edit_text("❌ Pochta buyurtma bekor qilindi.", reply_markup=None)
     await callback_query.answer()
 
 # Utility funksiyalar
 
-async def cleanup_expired_delivery_timers():
-    """Eskirgan pochta timerlarini tozalash"""
-    expired_orders = []
-    for order_id, task in delivery_processing_timers.items():
-        if task.done():
-            expired_orders.append(order_id)
-    
-    for order_id in expired_orders:
-        del delivery_processing_timers[order_id]
-        logging.info(f"Expired delivery timer cleaned up for order {order_id}")
-
 async def get_delivery_statistics():
     """Pochta buyurtma statistikalarini olish"""
     try:
-        total_deliveries = await db.order.count(where={"orderType": "DELIVERY"})
-        
-        status_counts = {}
-        for status in ["initiated", "processing", "completed", "canceled", "failed"]:
-            count = await db.orderstatus.count(
-                where={
-                    "status": status,
-                    "order": {"orderType": "DELIVERY"}
-                }
-            )
-            status_counts[status] = count
+        totals, distribution = await asyncio.gather(order_totals(), status_distribution())
+        total_deliveries = totals["delivery"]
+        status_counts = distribution["DELIVERY"]
         
         return {
             "total_deliveries": total_deliveries,
             "status_distribution": status_counts,
-            "active_processing": len(delivery_processing_timers)
+            "active_processing": active_claims("DELIVERY")
         }
     except Exception as e:
         logging.error(f"Pochta statistika olishda xato: {e}")
@@ -902,44 +547,19 @@ async def monitor_processing_deliveries():
         
         for status in processing_deliveries:
             order_id = status.orderId
-            if order_id not in delivery_processing_timers:
+            if not is_tracked(order_id):
                 logging.warning(f"Processing delivery order {order_id} uchun timer topilmadi, qayta ishga tushirilmoqda")
-                # Timer qayta ishga tushirish
-                channel_message_id = delivery_channel_messages.get(order_id)
-                if channel_message_id:
-                    timer_task = asyncio.create_task(delivery_processing_timer(order_id, channel_message_id))
-                    delivery_processing_timers[order_id] = timer_task
+                track_claim(order_id, "DELIVERY")
                     
     except Exception as e:
         logging.error(f"Processing deliveries monitoring xato: {e}")
 
 async def cleanup_orphaned_processing_deliveries():
-    """Dastur qayta ishga tushganda orphaned processing pochta orderlarni tozalash"""
+    """Dastur qayta ishga tushganda processing pochta orderlarni muddat nazoratiga qaytarish"""
     try:
-        orphaned_deliveries = await db.orderstatus.find_many(
-            where={
-                "status": "processing",
-                "order": {"orderType": "DELIVERY"}
-            },
-            include={
-                "order": {
-                    "include": {
-                        "fromDistrict": True,
-                        "toDistrict": True
-                    }
-                }
-            }
-        )
-        
-        for status in orphaned_deliveries:
-            order_id = status.orderId
-            # Bu orderlarni initiated ga qaytarish
-            await db.orderstatus.update(
-                where={"orderId": order_id},
-                data={"status": "initiated"}
-            )
-            
-            logging.info(f"Orphaned processing delivery order {order_id} initiated holatiga qaytarildi")
+        # Haydovchi band qilgan buyurtma darhol emas, muddati tugaganda (kanal posti bilan birga) qaytariladi
+        resumed = await resume_claims("DELIVERY")
+        logging.info(f"{resumed} ta processing pochta buyurtma muddat nazoratiga qaytarildi")
             
     except Exception as e:
         logging.error(f"Orphaned delivery orders cleanup xato: {e}")
@@ -947,5 +567,4 @@ async def cleanup_orphaned_processing_deliveries():
 async def initialize_delivery_module():
     """Delivery moduli ishga tushirilganda chaqiriladigan funksiya"""
     await cleanup_orphaned_processing_deliveries()
-    await cleanup_expired_delivery_timers()
     logging.info("Delivery module initialized successfully")
\ No newline at end of file
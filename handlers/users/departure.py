@@ -1,14 +1,26 @@
-import logging
 import asyncio
-import json
+import logging
 import os
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
 from aiogram import types
-from loader import dp, db, bot
+from loader import dp, db
 from aiogram.dispatcher import FSMContext
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from states.registerstates import OrderState
 from utils.userordercontrol import send_order_reminder
+from utils.db_api.catalog import get_order_catalog
+from utils.db_api.orders import create_order, find_claimed_order
+from utils.db_api.lifecycle import transition
+from utils.db_api.users import UserRecord
+from utils.membership import NOT_MEMBER_STATUSES, get_member_status
+from utils.channel_info import get_channel_url
+from utils.db_api.statistics import STATUSES, order_totals, status_distribution
+from utils.channel_posts import publish_later, refresh_later
+from utils import outbox
+from utils.outbox import Priority
+from utils.claim_timeouts import on_claim_expired, track_claim, is_tracked, active_claims, resume_claims
+from utils import callback_codec as codec
+from keyboards.order_btns import regions_markup, districts_markup, passengers_markup, dates_markup, confirm_markup
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,185 +28,25 @@ CHANNEL_ID = int(os.getenv("CHANNEL_ID"))
 OWNER_ID = int(os.getenv("OWNER_ID"))
 BOT_USERNAME = os.getenv("BOT_USERNAME")
 
-# Processing holatidagi buyurtmalar uchun timer
-processing_timers = {}
-
-async def get_regions_and_districts():
-    """Bazadan viloyat va tumanlarni to'g'ridan-to'g'ri o'qib olish"""
-    try:
-        # Viloyatlarni bazadan olish
-        regions = await db.region.find_many(order={"name": "asc"})
-        regions_dict = {region.id: region.name for region in regions}
-        
-        # Tumanlarni bazadan olish va viloyat ID bo'yicha guruhlash
-        districts = await db.district.find_many(
-            include={"region": True},
-            order={"name": "asc"}
-        )
-        
-        districts_dict = {}
-        for district in districts:
-            region_name = district.region.name
-            if region_name not in districts_dict:
-                districts_dict[region_name] = []
-            districts_dict[region_name].append(district.name)
-            
-        logging.info(f"Bazadan {len(regions_dict)} ta viloyat va {sum(len(d) for d in districts_dict.values())} ta tuman yuklandi")
-        return regions_dict, districts_dict
-        
-    except Exception as e:
-        logging.error(f"Viloyat va tumanlarni yuklashda xato: {e}")
-        # Fallback
-        try:
-            with open("regions.json", "r", encoding="utf-8") as file:
-                fallback_data = json.load(file)
-                regions_dict = {i: name for i, name in enumerate(fallback_data.keys(), 1)}
-            logging.info("Fallback: JSON fayldan viloyat va tumanlar yuklandi")
-            return regions_dict, fallback_data
-        except Exception as json_error:
-            logging.error(f"JSON fayldan ham yuklab bo'lmadi: {json_error}")
-            return {}, {}
-
-async def get_channel_url():
-    try:
-        chat = await bot.get_chat(CHANNEL_ID)
-        return f"https://t.me/{chat.username.replace('@', '')}" if chat.username else f"https://t.me/c/{str(CHANNEL_ID)[4:]}"
-    except Exception as e:
-        logging.error(f"Kanal ma'lumotlarini olishda xato: {e}")
-        return f"https://t.me/c/{str(CHANNEL_ID)[4:]}"
-
-async def processing_timer(order_id, channel_message_id):
-    """5 daqiqa kutib, buyurtmani yana NEW holatiga o'tkazish"""
-    try:
-        await asyncio.sleep(300)  # 5 daqiqa kutish
-        
-        # Buyurtma holatini tekshirish
-        order = await db.order.find_unique(
-            where={"id": order_id},
-            include={
-                "status": True,
-                "fromDistrict": True,
-                "toDistrict": True
-            }
-        )
-        
-        if not order or not order.status:
-            logging.warning(f"Order {order_id} yoki status topilmadi")
-            return
-            
-        # Agar hali ham processing holatida bo'lsa, NEW ga qaytarish
-        if order.status.status == "processing":
-            await db.orderstatus.update(
-                where={"orderId": order_id},
-                data={"status": "initiated"}
-            )
-            
-            # Yangilangan buyurtmani olish
-            updated_order = await db.order.find_unique(
-                where={"id": order_id},
-                include={
-                    "status": True,
-                    "fromDistrict": True,
-                    "toDistrict": True
-                }
-            )
-            
-            # Kanal xabarini yangilash
-            await update_channel_order_status(updated_order, channel_message_id)
-            logging.info(f"Order {order_id} 5 daqiqa o'tgach NEW holatiga qaytarildi")
-            
-        # Timer ro'yxatdan o'chirish
-        if order_id in processing_timers:
-            del processing_timers[order_id]
-            
-    except Exception as e:
-        logging.error(f"Processing timer error for order {order_id}: {e}")
-        if order_id in processing_timers:
-            del processing_timers[order_id]
+CATALOG_UNAVAILABLE = "❌ Viloyat va tumanlar ro'yxati hozircha mavjud emas. Iltimos, birozdan keyin qayta urinib ko'ring."
 
-async def update_channel_order_status(order, channel_message_id=None):
-    """Kanal xabarini yangilash - TUGMA TO'G'RI ISHLASHI UCHUN YANGILANDI"""
-    try:
-        if not channel_message_id:
-            logging.warning(f"Order {order.id} uchun channel_message_id topilmadi")
-            return
-        
-        status_mapping = {
-            "initiated": {"status": "NEW", "emoji": "🆕"},
-            "processing": {"status": "JARAYONDA", "emoji": "🔄"},
-            "completed": {"status": "YAKUNLANDI", "emoji": "✅"},
-            "canceled": {"status": "BEKOR QILINDI", "emoji": "❌"},
-            "failed": {"status": "XATOLIK", "emoji": "⚠️"}
-        }
-        
-        current_status = order.status.status if order.status else "initiated"
-        status_info = status_mapping.get(current_status, {"status": "NOMA'LUM", "emoji": "❓"})
-        
-        from_district_name = order.fromDistrict.name if hasattr(order, 'fromDistrict') and order.fromDistrict else "Noma'lum"
-        to_district_name = order.toDistrict.name if hasattr(order, 'toDistrict') and order.toDistrict else "Noma'lum"
-        
-        new_text = f"""{status_info['emoji']} *Buyurtma - {status_info['status']}*  
-🚦 Holati: *{status_info['status']}*  
-📍 Qayerdan: {from_district_name}  
-📍 Qayerga: {to_district_name}  
-🕒 Chiqish vaqti: {order.departureTime.strftime('%Y-%m-%d %H:%M')}  
-👥 Yo'lovchilar soni: {order.passengers}"""
-        
-        reply_markup = None
-        # Faqat initiated holatida tugma ko'rsatish
-        if current_status == "initiated":
-            keyboard = InlineKeyboardMarkup()
-            keyboard.add(InlineKeyboardButton("📞 Yo'lovchi bilan bog'lanish", callback_data=f"contact_passenger_{order.id}"))
-            reply_markup = keyboard
-        
-        # Canceled buyurtmalarni o'chirish
-        if current_status == "canceled":
-            try:
-                await bot.delete_message(chat_id=CHANNEL_ID, message_id=channel_message_id)
-                logging.info(f"Bekor qilingan buyurtma {order.id} kanaldan o'chirildi")
-                # Channel messages ro'yxatdan o'chirish
-                if order.id in order_channel_messages:
-                    del order_channel_messages[order.id]
-                return
-            except Exception as delete_error:
-                logging.error(f"Xabarni o'chirishda xato: {delete_error}")
-                # Agar o'chirish muvaffaqiyatsiz bo'lsa, oddiy yangilash
-        
-        # Xabarni yangilash
-        try:
-            await bot.edit_message_text(
-                chat_id=CHANNEL_ID,
-                message_id=channel_message_id,
-                text=new_text,
-                parse_mode="Markdown",
-                reply_markup=reply_markup
-            )
-            logging.info(f"Kanal posti muvaffaqiyatli yangilandi: Order {order.id}, Status: {current_status}")
-        except Exception as edit_error:
-            logging.error(f"Kanal postini yangilashda xato: Order {order.id}, Error: {edit_error}")
-            # Agar xabar yangilanmasa, yangi xabar yuborish
-            try:
-                new_message = await bot.send_message(
-                    chat_id=CHANNEL_ID,
-                    text=new_text,
-                    parse_mode="Markdown",
-                    reply_markup=reply_markup
-                )
-                order_channel_messages[order.id] = new_message.message_id
-                logging.info(f"Yangi kanal posti yaratildi: Order {order.id}")
-            except Exception as send_error:
-                logging.error(f"Yangi kanal posti yaratishda xato: {send_error}")
-        
-    except Exception as e:
-        logging.error(f"Kanal postini yangilashda xato: Order {order.id}, Error: {e}")
+async def _restart_trip(message: types.Message, state: FSMContext):
+    """Katalog wizard davomida o'zgardi (yoki baza ishlamayapti) - jarayonni qaytadan boshlash"""
+    await state.finish()
+    await message.answer("❌ Viloyat va tumanlar ro'yxati o'zgardi. Iltimos, buyurtmani qaytadan boshlang.")
 
-# Kanal xabar ID larini saqlash uchun
-order_channel_messages = {}
+@on_claim_expired("PASSENGER")
+async def revert_claimed_order(order):
+    """Haydovchi buyurtmani 5 daqiqada yakunlamadi - kanal postini NEW holatiga qaytarish"""
+    refresh_later(order)
 
 @dp.message_handler(lambda message: message.text == "🚕 Yo'lga otlanish", state="*")
 async def start_trip(message: types.Message, state: FSMContext):
     """Yo'lga otlanish jarayonini boshlash"""
-    regions_dict, districts_dict = await get_regions_and_districts()
+    catalog = await get_order_catalog()
+    if catalog is None:
+        await message.answer(CATALOG_UNAVAILABLE)
+        return
     
     data = await state.get_data()
     old_msg_id = data.get("last_inline_message_id")
@@ -204,54 +56,49 @@ async def start_trip(message: types.Message, state: FSMContext):
         except:
             pass
 
-    keyboard = InlineKeyboardMarkup(row_width=2)
-    for region_name in districts_dict.keys():
-        keyboard.insert(InlineKeyboardButton(text=region_name, callback_data=f"from_{region_name}"))
+    keyboard = regions_markup(catalog, codec.TRIP_FROM_REGION)
     
     msg = await message.answer("Qaysi viloyatdan ketmoqchisiz?", reply_markup=keyboard)
     await state.update_data(last_inline_message_id=msg.message_id)
     await OrderState.from_region.set()
 
-@dp.callback_query_handler(lambda c: c.data.startswith("from_"), state=OrderState.from_region)
+@dp.callback_query_handler(codec.on(codec.TRIP_FROM_REGION), state=OrderState.from_region)
 async def select_from_district(callback_query: types.CallbackQuery, state: FSMContext):
-    viloyat = callback_query.data.split("_")[1]
-    await state.update_data(from_region=viloyat)
-    
-    regions_dict, districts_dict = await get_regions_and_districts()
+    region_id = codec.unpack_id(callback_query.data)
+    await state.update_data(from_region_id=region_id)
     
-    keyboard = InlineKeyboardMarkup(row_width=2)
-    for district in districts_dict.get(viloyat, []):
-        keyboard.insert(InlineKeyboardButton(text=district, callback_data=f"from_district_{district}"))
+    catalog = await get_order_catalog()
+    region = catalog and catalog.region_by_id.get(region_id)
+    if not region:
+        await _restart_trip(callback_query.message, state)
+        return
+    viloyat = region.name
+    keyboard = districts_markup(catalog, region_id, codec.TRIP_FROM_DISTRICT)
 
     await callback_query.message.edit_text(f"{viloyat} viloyati, qaysi tumandan ketmoqchisiz?", reply_markup=keyboard)
     await OrderState.from_district.set()
 
-@dp.callback_query_handler(lambda c: c.data.startswith("from_district_"), state=OrderState.from_district)
+@dp.callback_query_handler(codec.on(codec.TRIP_FROM_DISTRICT), state=OrderState.from_district)
 async def ask_passengers(callback_query: types.CallbackQuery, state: FSMContext):
-    tuman = callback_query.data.split("_")[2]
-    await state.update_data(from_district=tuman)
+    district_id = codec.unpack_id(callback_query.data)
+    await state.update_data(from_district_id=district_id)
     
-    keyboard = InlineKeyboardMarkup(row_width=4)
-    for i in range(1, 5):
-        keyboard.insert(InlineKeyboardButton(text=str(i), callback_data=f"passengers_{i}"))
-    
-    await callback_query.message.edit_text("Necha kishi ketmoqchisiz?", reply_markup=keyboard)
+    await callback_query.message.edit_text("Necha kishi ketmoqchisiz?", reply_markup=passengers_markup())
     await OrderState.passengers.set()
 
-@dp.callback_query_handler(lambda c: c.data.startswith("passengers_"), state=OrderState.passengers)
+@dp.callback_query_handler(codec.on(codec.TRIP_PASSENGERS), state=OrderState.passengers)
 async def set_passengers(callback_query: types.CallbackQuery, state: FSMContext):
-    passengers = int(callback_query.data.split("_")[1])
+    passengers = codec.unpack_id(callback_query.data)
     user_data = await state.get_data()
-    from_region = user_data.get("from_region")
+    from_region_id = user_data.get("from_region_id")
 
     await state.update_data(passengers=passengers)
 
-    regions_dict, districts_dict = await get_regions_and_districts()
-    
-    keyboard = InlineKeyboardMarkup(row_width=2)
-    for region_name in districts_dict.keys():
-        if region_name != from_region:
-            keyboard.insert(InlineKeyboardButton(text=region_name, callback_data=f"to_{region_name}"))
+    catalog = await get_order_catalog()
+    if catalog is None:
+        await _restart_trip(callback_query.message, state)
+        return
+    keyboard = regions_markup(catalog, codec.TRIP_TO_REGION, exclude=from_region_id)
 
     await callback_query.message.edit_text(
         f"👥 Passajirlar soni: {passengers}\n\n"
@@ -260,48 +107,39 @@ async def set_passengers(callback_query: types.CallbackQuery, state: FSMContext)
     )
     await OrderState.to_region.set()
 
-@dp.callback_query_handler(lambda c: c.data.startswith("to_"), state=OrderState.to_region)
+@dp.callback_query_handler(codec.on(codec.TRIP_TO_REGION), state=OrderState.to_region)
 async def select_to_district(callback_query: types.CallbackQuery, state: FSMContext):
-    viloyat = callback_query.data.split("_")[1]
+    region_id = codec.unpack_id(callback_query.data)
     user_data = await state.get_data()
-    from_district = user_data.get("from_district")
+    from_district_id = user_data.get("from_district_id")
     
-    await state.update_data(to_region=viloyat)
+    await state.update_data(to_region_id=region_id)
 
-    regions_dict, districts_dict = await get_regions_and_districts()
-    
-    keyboard = InlineKeyboardMarkup(row_width=2)
-    for district in districts_dict.get(viloyat, []):
-        if district != from_district:
-            keyboard.insert(InlineKeyboardButton(text=district, callback_data=f"to_district_{district}"))
+    catalog = await get_order_catalog()
+    region = catalog and catalog.region_by_id.get(region_id)
+    if not region:
+        await _restart_trip(callback_query.message, state)
+        return
+    viloyat = region.name
+    keyboard = districts_markup(catalog, region_id, codec.TRIP_TO_DISTRICT, exclude=from_district_id)
 
     await callback_query.message.edit_text(f"{viloyat} viloyati, qaysi tumanga borasiz?", reply_markup=keyboard)
     await OrderState.to_district.set()
 
-@dp.callback_query_handler(lambda c: c.data.startswith("to_district_"), state=OrderState.to_district)
+@dp.callback_query_handler(codec.on(codec.TRIP_TO_DISTRICT), state=OrderState.to_district)
 async def ask_datetime(callback_query: types.CallbackQuery, state: FSMContext):
-    tuman = callback_query.data.split("_")[2]
-    await state.update_data(to_district=tuman)
-    
-    today = date.today()
-    keyboard = InlineKeyboardMarkup(row_width=2)
-    
-    for i in range(5):
-        departure_date = today + timedelta(days=i)
-        keyboard.insert(InlineKeyboardButton(
-            text=departure_date.strftime("%Y-%m-%d"),
-            callback_data=f"date_{departure_date}"
-        ))
+    district_id = codec.unpack_id(callback_query.data)
+    await state.update_data(to_district_id=district_id)
     
     await callback_query.message.edit_text(
         "📆 Jo'natish sanasini tanlang yoki YYYY-MM-DD formatida yozing:",
-        reply_markup=keyboard
+        reply_markup=dates_markup(date.today())
     )
     await OrderState.datetime.set()
 
-@dp.callback_query_handler(lambda c: c.data.startswith("date_"), state=OrderState.datetime)
+@dp.callback_query_handler(codec.on(codec.TRIP_DATE), state=OrderState.datetime)
 async def process_date(callback_query: types.CallbackQuery, state: FSMContext):
-    selected_date = callback_query.data.split("_")[1]
+    selected_date = datetime.strptime(str(codec.unpack_id(callback_query.data)), "%Y%m%d").strftime("%Y-%m-%d")
     await state.update_data(departure_date=selected_date)
     
     await callback_query.message.edit_text("⏰ Jo'natish vaqtini HH:MM formatida kiriting (masalan, 14:30):")
@@ -320,23 +158,27 @@ async def process_manual_time(message: types.Message, state: FSMContext):
 async def update_order_and_confirm(message, state, departure_datetime):
     await state.update_data(departure_time=departure_datetime)
     user_data = await state.get_data()
+    catalog = await get_order_catalog()
+    route = catalog and (
+        catalog.region_by_id.get(user_data.get('from_region_id')),
+        catalog.district_by_id.get(user_data.get('from_district_id')),
+        catalog.region_by_id.get(user_data.get('to_region_id')),
+        catalog.district_by_id.get(user_data.get('to_district_id'))
+    )
+    if not route or not all(route):
+        await _restart_trip(message, state)
+        return
+    from_region, from_district, to_region, to_district = route
 
     order_info = (
         f"📋 Buyurtma ma'lumotlari:\n"
-        f"📍 Yo'nalish: {user_data['from_region']}, {user_data['from_district']} -> "
-        f"{user_data['to_region']}, {user_data['to_district']}\n"
+        f"📍 Yo'nalish: {from_region.name}, {from_district.name} -> {to_region.name}, {to_district.name}\n"
         f"👥 Passajirlar soni: {user_data['passengers']}\n"
         f"⏰ Jo'nash vaqti: {departure_datetime}\n\n"
         f"Ma'lumotlar to'g'rimi?"
     )
 
-    keyboard = InlineKeyboardMarkup()
-    keyboard.row(
-        InlineKeyboardButton("✅ Tasdiqlash", callback_data="confirm_order"),
-        InlineKeyboardButton("❌ Bekor qilish", callback_data="cancel_order")
-    )
-
-    await message.answer(order_info, reply_markup=keyboard)
+    await message.answer(order_info, reply_markup=confirm_markup("confirm_order", "cancel_order"))
     await OrderState.confirmation.set()
 
 @dp.callback_query_handler(lambda c: c.data == "confirm_order", state=OrderState.confirmation)
@@ -345,73 +187,30 @@ async def confirm_order(callback_query: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
 
     try:
-        user = await db.user.find_unique(where={"telegramId": callback_query.from_user.id})
-
-        if not user:
-            user = await db.user.create({
-                "telegramId": callback_query.from_user.id,
-                "firstName": callback_query.from_user.first_name or "",
-                "lastName": callback_query.from_user.last_name or "",
-                "username": callback_query.from_user.username,
-                "phoneNumber": "",
-                "role": "PASSENGER"
-            })
-
-        # Viloyat va tuman ID larini topish
-        from_region = await db.region.find_first(where={"name": data.get("from_region")})
-        to_region = await db.region.find_first(where={"name": data.get("to_region")})
-        
-        from_district = await db.district.find_first(
-            where={
-                "name": data.get("from_district"),
-                "regionId": from_region.id
-            }
-        )
-        
-        to_district = await db.district.find_first(
-            where={
-                "name": data.get("to_district"),
-                "regionId": to_region.id
-            }
-        )
+        # Viloyat va tuman ID lari wizard davomida saqlangan
+        catalog = await get_order_catalog()
+        from_district = catalog and catalog.district_by_id.get(data.get("from_district_id"))
+        to_district = catalog and catalog.district_by_id.get(data.get("to_district_id"))
+
+        if not from_district or not to_district:
+            await callback_query.message.edit_text("❌ Tuman ma'lumotlari topilmadi. Iltimos, qayta urinib ko'ring.")
+            await state.finish()
+            return
 
-        # Buyurtma yaratish
-        order = await db.order.create({
-            "passengerId": user.id,
-            "fromRegionId": from_region.id,
-            "fromDistrictId": from_district.id,
-            "toRegionId": to_region.id,
-            "toDistrictId": to_district.id,
-            "passengers": data.get("passengers"),
-            "departureTime": datetime.strptime(data.get("departure_time"), "%Y-%m-%d %H:%M")
-        })
-
-        # Status yaratish (initiated holatida)
-        order_status = await db.orderstatus.create({
-            "status": "initiated",
-            "orderId": order.id,
-            "userId": user.id
-        })
-
-        # Kanal uchun klaviatura
-        keyboard = InlineKeyboardMarkup()
-        keyboard.add(InlineKeyboardButton("📞 Yo'lovchi bilan bog'lanish", callback_data=f"contact_passenger_{order.id}"))
-
-        # Kanalga xabar yuborish
-        channel_message = await bot.send_message(
-            chat_id=CHANNEL_ID,  
-            text=f"""🆕 *Yangi buyurtma!*  
-🚦 Holati: *NEW*  
-📍 Qayerdan: {data["from_district"]}  
-📍 Qayerga: {data["to_district"]}  
-🕒 Chiqish vaqti: {data["departure_time"]}  
-👥 Yo'lovchilar soni: {data["passengers"]}""",
-            parse_mode="Markdown",
-            reply_markup=keyboard
+        # Buyurtma va uning statusi bitta so'rovda yaratiladi
+        order = await create_order(
+            callback_query.from_user,
+            from_district,
+            to_district,
+            passengers=data.get("passengers"),
+            departureTime=datetime.strptime(data.get("departure_time"), "%Y-%m-%d %H:%M")
         )
 
-        # Channel message ID ni saqlash
-        order_channel_messages[order.id] = channel_message.message_id
+        # Eslatma va avtomatik bekor qilish vazifalari post natijasidan qat'i nazar rejalashtiriladi
+        await send_order_reminder(order.id, order.passenger.telegramId)
+
+        # Kanalga post fonda yuboriladi (post ID si ham saqlanadi) - foydalanuvchi kanal navbatini kutmaydi
+        publish_later(order, from_district.name, to_district.name)
 
         # Foydalanuvchi uchun klaviatura
         user_keyboard = InlineKeyboardMarkup(row_width=2)
@@ -428,10 +227,6 @@ async def confirm_order(callback_query: types.CallbackQuery, state: FSMContext):
             parse_mode="Markdown"
         )
         
-        # Order reminder yuborish
-        bg_task = asyncio.create_task(send_order_reminder(order.id, user.telegramId))
-        bg_task.add_done_callback(lambda t: logging.error(f"Order reminder task error: {t.exception()}") if t.exception() else None)
-        
     except Exception as e:
         logging.error(f"Buyurtma yaratishda xato: {e}")
         await callback_query.message.edit_text("❌ Xatolik yuz berdi! Iltimos, qayta urinib ko'ring.")
@@ -444,13 +239,12 @@ async def cancel_order_creation(callback_query: types.CallbackQuery, state: FSMC
     await callback_query.message.edit_text("❌ Buyurtma bekor qilindi.")
 
 @dp.callback_query_handler(lambda c: c.data.startswith("contact_passenger_"))
-async def send_passenger_info(callback_query: types.CallbackQuery):
+async def send_passenger_info(callback_query: types.CallbackQuery, user: UserRecord):
     """Haydovchi yo'lovchi bilan bog'lanish tugmasini bosganda"""
     user_id = callback_query.from_user.id
     order_id = int(callback_query.data.split("_")[-1])
 
-    # Foydalanuvchini tekshirish
-    user = await db.user.find_unique(where={"telegramId": user_id})
+    # Foydalanuvchini tekshirish (IdentityMiddleware aniqlagan)
     if not user:
         await callback_query.answer(
             f"❌ Siz botda ro'yxatdan o'tmagansiz. Iltimos, botni ishlatish uchun ro'yxatdan o'ting: {BOT_USERNAME}",
@@ -468,8 +262,8 @@ async def send_passenger_info(callback_query: types.CallbackQuery):
 
     # Kanal a'zoligini tekshirish
     try:
-        member = await bot.get_chat_member(chat_id=CHANNEL_ID, user_id=user_id)
-        if member.status in ["left", "kicked", "restricted"] and user_id != OWNER_ID:
+        status = await get_member_status(user_id)
+        if status in NOT_MEMBER_STATUSES and user_id != OWNER_ID:
             channel_url = await get_channel_url()
             await callback_query.answer(
                 f"❌ Siz kanalga obuna bo'lmagansiz! Iltimos, avval kanalga obuna bo'ling: {channel_url}",
@@ -481,61 +275,10 @@ async def send_passenger_info(callback_query: types.CallbackQuery):
         await callback_query.answer("⚠️ Obunani tekshirishda xatolik yuz berdi.", show_alert=True)
         return
 
-    # Buyurtmani olish
-    order = await db.order.find_unique(
-        where={"id": order_id},
-        include={
-            "passenger": True,
-            "status": True,
-            "fromRegion": True,
-            "fromDistrict": True,
-            "toRegion": True,
-            "toDistrict": True
-        }
-    )
+    # Buyurtmani atomar olish: faqat hali hech kim olmagan bo'lsa (bitta so'rov)
+    order = await transition(order_id, "claim", user_id=user.id)
 
-    if not order:
-        await callback_query.answer("❌ Buyurtma topilmadi yoki allaqachon o'chirilgan.", show_alert=True)
-        return
-    
-    current_status = order.status.status if order.status else "initiated"
-    
-    # Faqat initiated holatidagi buyurtmalarga ruxsat
-    if current_status == "initiated":
-        # Status ni processing ga o'zgartirish
-        await db.orderstatus.update(
-            where={"orderId": order_id},
-            data={
-                "status": "processing",
-                "userId": user.id  # Kim processing qilayotganini belgilash
-            }
-        )
-        
-        # Yangilangan buyurtmani olish
-        updated_order = await db.order.find_unique(
-            where={"id": order_id},
-            include={
-                "passenger": True,
-                "status": True,
-                "fromRegion": True,
-                "fromDistrict": True,
-                "toRegion": True,
-                "toDistrict": True
-            }
-        )
-        
-        # Kanal xabarini yangilash (tugmani o'chirish)
-        channel_message_id = order_channel_messages.get(order_id)
-        if channel_message_id:
-            await update_channel_order_status(updated_order, channel_message_id)
-        
-        # 5 daqiqalik timer o'rnatish
-        if order_id in processing_timers:
-            processing_timers[order_id].cancel()
-        
-        timer_task = asyncio.create_task(processing_timer(order_id, channel_message_id))
-        processing_timers[order_id] = timer_task
-        
+    if order:
         # Haydovchiga yo'lovchi ma'lumotlarini yuborish
         passenger_info = (
             f"🚖 *Yo'lovchi ma'lumotlari:*\n"
@@ -550,9 +293,23 @@ async def send_passenger_info(callback_query: types.CallbackQuery):
         if order.passenger.username:
             passenger_info += f"🔗 Telegram: @{order.passenger.username}"
 
-        await bot.send_message(callback_query.from_user.id, passenger_info, parse_mode="Markdown")
+        # Kanal xabarini fonda yangilash (tugmani o'chirish)
+        refresh_later(order)
         await callback_query.answer("✅ Buyurtma jarayonga olindi! Yo'lovchi ma'lumotlari yuborildi. 5 daqiqa vaqtingiz bor.", show_alert=True)
-    
+        await outbox.send_message(callback_query.from_user.id, passenger_info, priority=Priority.CHANNEL, parse_mode="Markdown")
+        return
+
+    # Yutqazgan bosish: buyurtma kimda yoki qaysi holatda ekanini ko'rsatish
+    order = await find_claimed_order(order_id)
+    if not order:
+        await callback_query.answer("❌ Buyurtma topilmadi yoki allaqachon o'chirilgan.", show_alert=True)
+        return
+
+    current_status = order.status.status if order.status else "initiated"
+
+    if current_status == "initiated":
+        # Oraliqda muddati tugab qaytarilgan yoki statusi yo'q eski buyurtma
+        await callback_query.answer("⏳ Buyurtma holati o'zgardi. Iltimos, qayta urinib ko'ring.", show_alert=True)
     elif current_status == "processing":
         # Agar boshqa haydovchi processing qilayotgan bo'lsa
         processing_user = order.status.user
@@ -563,11 +320,8 @@ async def send_passenger_info(callback_query: types.CallbackQuery):
             await callback_query.answer("⏳ Siz allaqachon bu buyurtmani jarayonga oldingiz.", show_alert=True)
     
     else:
-        # Boshqa statuslar uchun
-        channel_message_id = order_channel_messages.get(order_id)
-        if channel_message_id:
-            await update_channel_order_status(order, channel_message_id)
-        
+        # Boshqa statuslar uchun (kanal posti fonda yangilanadi)
+        refresh_later(order)
         status_messages = {
             "canceled": "❌ Buyurtma bekor qilindi! (CANCELED)",
             "completed": "❗️😢 Buyurtma yakunlandi! \nMijoz haydovchi bilan kelishib bo'ldi. (COMPLETED)",
@@ -577,47 +331,19 @@ async def send_passenger_info(callback_query: types.CallbackQuery):
         status_message = status_messages.get(current_status, "Holati noma'lum")
         await callback_query.answer(status_message, show_alert=True)
 
-async def get_channel_message_id(order_id):
-    """Order uchun channel message ID ni olish"""
-    return order_channel_messages.get(order_id)
-
 @dp.callback_query_handler(lambda c: c.data.startswith("complete_order_"))
 async def complete_order(callback_query: types.CallbackQuery, state: FSMContext):
     """Buyurtmani yakunlash"""
     order_id = int(callback_query.data.split("_")[-1])
 
-    order = await db.order.find_unique(
-        where={"id": order_id}, 
-        include={"status": True, "fromDistrict": True, "toDistrict": True}
-    )
-    
-    if not order or (order.status and order.status.status not in ["initiated", "processing"]):
+    # Status ni completed ga o'zgartirish (muddat nazorati hook orqali to'xtaydi)
+    order = await transition(order_id, "complete")
+    if not order:
         await callback_query.answer("❌ Buyurtma allaqachon o'zgartirilgan yoki mavjud emas.", show_alert=True)
         return
 
-    # Timer ni to'xtatish
-    if order_id in processing_timers:
-        processing_timers[order_id].cancel()
-        del processing_timers[order_id]
-
-    # Status ni completed ga o'zgartirish
-    await db.orderstatus.update(
-        where={"orderId": order_id},
-        data={"status": "completed"}
-    )
-
-    # Yangilangan buyurtmani olish
-    updated_order = await db.order.find_unique(
-        where={"id": order_id}, 
-        include={"status": True, "fromDistrict": True, "toDistrict": True}
-    )
-
-    # Kanal xabarini yangilash
-    channel_message_id = await get_channel_message_id(order_id)
-    if channel_message_id:
-        await update_channel_order_status(updated_order, channel_message_id)
-    else:
-        logging.warning(f"Order {order_id} uchun channel_message_id topilmadi")
+    # Kanal xabarini fonda yangilash
+    refresh_later(order)
 
     await callback_query.message.edit_text("✅ Buyurtma muvaffaqiyatli yakunlandi!", reply_markup=None)
     await callback_query.answer()
@@ -627,72 +353,36 @@ async def cancel_order_status(callback_query: types.CallbackQuery, state: FSMCon
     """Buyurtmani bekor qilish"""
     order_id = int(callback_query.data.split("_")[-1])
 
-    order = await db.order.find_unique(
-        where={"id": order_id}, 
-        include={"status": True, "fromDistrict": True, "toDistrict": True}
-    )
-    
-    if not order or (order.status and order.status.status not in ["initiated", "processing"]):
+    # Status ni canceled ga o'zgartirish (muddat nazorati hook orqali to'xtaydi)
+    order = await transition(order_id, "cancel")
+    if not order:
         await callback_query.answer("❌ Buyurtma allaqachon o'zgartirilgan yoki mavjud emas.", show_alert=True)
         return
 
-    # Timer ni to'xtatish
-    if order_id in processing_timers:
-        processing_timers[order_id].cancel()
-        del processing_timers[order_id]
-
-    # Status ni canceled ga o'zgartirish
-    await db.orderstatus.update(
-        where={"orderId": order_id},
-        data={"status": "canceled"}
-    )
-
-    # Yangilangan buyurtmani olish
-    updated_order = await db.order.find_unique(
-        where={"id": order_id}, 
-        include={"status": True, "fromDistrict": True, "toDistrict": True}
-    )
-
-    # Kanal xabarini yangilash (canceled xabarlar avtomatik o'chiriladi)
-    channel_message_id = await get_channel_message_id(order_id)
-    if channel_message_id:
-        await update_channel_order_status(updated_order, channel_message_id)
-        # Channel messages ro'yxatdan o'chirish
-        if order_id in order_channel_messages:
-            del order_channel_messages[order_id]
-    else:
-        logging.warning(f"Order {order_id} uchun channel_message_id topilmadi")
+    # Kanal xabarini fonda yangilash (canceled xabarlar avtomatik o'chiriladi)
+    refresh_later(order)
 
     await callback_query.message.edit_text("❌ Buyurtma bekor qilindi.", reply_markup=None)
     await callback_query.answer()
 
 # Qo'shimcha utility funksiyalar
 
-async def cleanup_expired_timers():
-    """Eskirgan timerlarni tozalash"""
-    expired_orders = []
-    for order_id, task in processing_timers.items():
-        if task.done():
-            expired_orders.append(order_id)
-    
-    for order_id in expired_orders:
-        del processing_timers[order_id]
-        logging.info(f"Expired timer cleaned up for order {order_id}")
-
 async def get_order_statistics():
     """Buyurtma statistikalarini olish"""
     try:
-        total_orders = await db.order.count()
+        totals, distribution = await asyncio.gather(order_totals(), status_distribution())
+        total_orders = totals["total"]
         
-        status_counts = {}
-        for status in ["initiated", "processing", "completed", "canceled", "failed"]:
-            count = await db.orderstatus.count(where={"status": status})
-            status_counts[status] = count
+        # Barcha turdagi buyurtmalar holatlari yig'indisi
+        status_counts = dict.fromkeys(STATUSES, 0)
+        for counts in distribution.values():
+            for status, count in counts.items():
+                status_counts[status] = status_counts.get(status, 0) + count
         
         return {
             "total_orders": total_orders,
             "status_distribution": status_counts,
-            "active_processing": len(processing_timers)
+            "active_processing": active_claims("PASSENGER")
         }
     except Exception as e:
         logging.error(f"Statistika olishda xato: {e}")
@@ -711,42 +401,20 @@ async def monitor_processing_orders():
         
         for status in processing_orders:
             order_id = status.orderId
-            if order_id not in processing_timers:
+            if not is_tracked(order_id):
                 logging.warning(f"Processing order {order_id} uchun timer topilmadi, qayta ishga tushirilmoqda")
-                # Timer qayta ishga tushirish
-                channel_message_id = order_channel_messages.get(order_id)
-                if channel_message_id:
-                    timer_task = asyncio.create_task(processing_timer(order_id, channel_message_id))
-                    processing_timers[order_id] = timer_task
+                track_claim(order_id, "PASSENGER")
                     
     except Exception as e:
         logging.error(f"Processing orders monitoring xato: {e}")
 
 # Startup cleanup function
 async def cleanup_orphaned_processing_orders():
-    """Dastur qayta ishga tushganda orphaned processing orderlarni tozalash"""
+    """Dastur qayta ishga tushganda processing orderlarni muddat nazoratiga qaytarish"""
     try:
-        orphaned_orders = await db.orderstatus.find_many(
-            where={"status": "processing"},
-            include={
-                "order": {
-                    "include": {
-                        "fromDistrict": True,
-                        "toDistrict": True
-                    }
-                }
-            }
-        )
-        
-        for status in orphaned_orders:
-            order_id = status.orderId
-            # Bu orderlarni initiated ga qaytarish
-            await db.orderstatus.update(
-                where={"orderId": order_id},
-                data={"status": "initiated"}
-            )
-            
-            logging.info(f"Orphaned processing order {order_id} initiated holatiga qaytarildi")
+        # Haydovchi band qilgan buyurtma darhol emas, muddati tugaganda (kanal posti bilan birga) qaytariladi
+        resumed = await resume_claims("PASSENGER")
+        logging.info(f"{resumed} ta processing buyurtma muddat nazoratiga qaytarildi")
             
     except Exception as e:
         logging.error(f"Orphaned orders cleanup xato: {e}")
@@ -770,5 +438,4 @@ def handle_errors(func):
 async def initialize_departure_module():
     """Departure moduli ishga tushirilganda chaqiriladigan funksiya"""
     await cleanup_orphaned_processing_orders()
-    await cleanup_expired_timers()
     logging.info("Departure module initialized successfully")
\ No newline at end of file
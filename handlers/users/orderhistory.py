@@ -4,6 +4,11 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from loader import dp, db, bot
 from states.registerstates import OrderState, HistoryState
 from datetime import datetime
+from utils import callback_codec as codec
+from utils.db_api.orders import count_passenger_orders, passenger_history_page
+from utils.db_api.users import UserRecord
+
+ITEMS_PER_PAGE = 3
 
 
 def get_order_status_text(status):
@@ -111,44 +116,40 @@ def format_order_info(order):
     return '\n'.join(order_info)
 
 @dp.message_handler(lambda message: message.text == "📋 Buyurtma tarixi", state="*")
-async def show_history(message: types.Message, state: FSMContext):
-    user = await db.user.find_unique(where={'telegramId': str(message.from_user.id)})
+async def show_history(message: types.Message, state: FSMContext, user: UserRecord):
     
     if not user or user.role != "PASSENGER":
         await message.answer("Bu funksiya faqat yo'lovchilar uchun mavjud.")
         return
 
-    orders = await db.order.find_many(
-        where={'passengerId': user.id},
-        include={
-            'driver': True, 
-            'status': True, 
-            'fromRegion': True, 
-            'fromDistrict': True, 
-            'toRegion': True, 
-            'toDistrict': True
-        }
-    )
-    orders = sorted(orders, key=lambda x: x.createdAt, reverse=True)
-
-    if not orders:
+    if not await count_passenger_orders(user.id):
         await message.answer("⭕️ Sizda hech qanday buyurtma tarixi yo'q.")
         return
 
-    await state.update_data(orders=orders, page=0, items_per_page=3)
+    # Holatda faqat kursor va sahifa raqami saqlanadi, buyurtmalar har safar bazadan olinadi
+    await state.update_data(passenger_id=user.id, page=0, cursor=None)
     await show_paginated_history(message.chat.id, state)
     await HistoryState.pagination.set()
 
-async def show_paginated_history(chat_id, state: FSMContext, message_id=None):
+async def show_paginated_history(chat_id, state: FSMContext, message_id=None, target_page=0):
     data = await state.get_data()
-    orders = data.get('orders', [])
-    page = data.get('page', 0)
-    items_per_page = data.get('items_per_page', 3)
+    passenger_id = data.get('passenger_id')
+    items_per_page = ITEMS_PER_PAGE
 
-    start_idx = page * items_per_page
-    end_idx = start_idx + items_per_page
-    current_page_orders = orders[start_idx:end_idx]
-    total_pages = (len(orders) + items_per_page - 1) // items_per_page
+    total = await count_passenger_orders(passenger_id)
+    if not total:
+        await bot.send_message(chat_id, "⭕️ Sizda hech qanday buyurtma tarixi yo'q.")
+        return
+    page, current_page_orders = await passenger_history_page(
+        passenger_id, target_page, items_per_page, total,
+        cursor=data.get('cursor'), current_page=data.get('page')
+    )
+    total_pages = (total + items_per_page - 1) // items_per_page
+    if current_page_orders:
+        cursor = {'first': current_page_orders[0].id, 'last': current_page_orders[-1].id}
+    else:
+        cursor = None
+    await state.update_data(page=page, cursor=cursor)
 
     order_messages = []
     for order in current_page_orders:
@@ -161,7 +162,7 @@ async def show_paginated_history(chat_id, state: FSMContext, message_id=None):
     if total_pages > 1:
         nav_row = []
         if page > 0:
-            nav_row.append(InlineKeyboardButton("⬅️", callback_data=f"history_page:{page - 1}"))
+            nav_row.append(InlineKeyboardButton("⬅️", callback_data=codec.pack(codec.HISTORY_PAGE, page - 1)))
         
         max_buttons = min(5, total_pages)
         start_page = max(0, page - 2)
@@ -172,21 +173,21 @@ async def show_paginated_history(chat_id, state: FSMContext, message_id=None):
         page_buttons = []
         for p in range(start_page, end_page):
             text = f"• {p + 1} •" if p == page else f"{p + 1}"
-            page_buttons.append(InlineKeyboardButton(text, callback_data=f"history_page:{p}"))
+            page_buttons.append(InlineKeyboardButton(text, callback_data=codec.pack(codec.HISTORY_PAGE, p)))
         
         if page < total_pages - 1:
-            nav_row.append(InlineKeyboardButton("➡️", callback_data=f"history_page:{page + 1}"))
+            nav_row.append(InlineKeyboardButton("➡️", callback_data=codec.pack(codec.HISTORY_PAGE, page + 1)))
         
         if total_pages > 5:
             first_last_row = []
             if page > 2:
-                first_last_row.append(InlineKeyboardButton("1️⃣", callback_data="history_page:0"))
+                first_last_row.append(InlineKeyboardButton("1️⃣", callback_data=codec.pack(codec.HISTORY_PAGE, 0)))
                 if start_page > 1:
-                    first_last_row.append(InlineKeyboardButton("...", callback_data="history_none"))
+                    first_last_row.append(InlineKeyboardButton("...", callback_data=codec.HISTORY_NONE))
             if page < total_pages - 3 and total_pages > 6:
                 if end_page < total_pages - 1:
-                    first_last_row.append(InlineKeyboardButton("...", callback_data="history_none"))
-                first_last_row.append(InlineKeyboardButton(f"{total_pages}", callback_data=f"history_page:{total_pages - 1}"))
+                    first_last_row.append(InlineKeyboardButton("...", callback_data=codec.HISTORY_NONE))
+                first_last_row.append(InlineKeyboardButton(f"{total_pages}", callback_data=codec.pack(codec.HISTORY_PAGE, total_pages - 1)))
             if first_last_row:
                 markup.row(*first_last_row)
         
@@ -194,29 +195,29 @@ async def show_paginated_history(chat_id, state: FSMContext, message_id=None):
         if nav_row:
             markup.row(*nav_row)
     
-    markup.row(InlineKeyboardButton("❌ Yopish", callback_data="history_close"))
+    markup.row(InlineKeyboardButton("❌ Yopish", callback_data=codec.HISTORY_CLOSE))
 
     if message_id is None:
         await bot.send_message(chat_id, full_history, reply_markup=markup)
     else:
         await bot.edit_message_text(full_history, chat_id, message_id, reply_markup=markup)
 
-@dp.callback_query_handler(lambda c: c.data.startswith('history_'), state=HistoryState.pagination)
+@dp.callback_query_handler(codec.on(codec.HISTORY_PAGE, codec.HISTORY_NONE, codec.HISTORY_CLOSE), state=HistoryState.pagination)
 async def process_pagination_callback(callback_query: types.CallbackQuery, state: FSMContext):
-    action = callback_query.data.split(':')[0]
+    action, ids = codec.unpack(callback_query.data)
     
-    if action == "history_close":
+    if action == codec.HISTORY_CLOSE:
         await callback_query.message.delete()
         await callback_query.answer("Buyurtmalar tarixi yopildi")
         await state.finish()
         return
     
-    if action == "history_none":
+    if action == codec.HISTORY_NONE:
         await callback_query.answer()
         return
     
-    if action == "history_page":
-        page = int(callback_query.data.split(':')[1])
-        await state.update_data(page=page)
-        await show_paginated_history(callback_query.message.chat.id, state, callback_query.message.message_id)
+    if action == codec.HISTORY_PAGE:
+        await show_paginated_history(
+            callback_query.message.chat.id, state, callback_query.message.message_id, target_page=ids[0]
+        )
         await callback_query.answer()
\ No newline at end of file
@@ -1,11 +1,12 @@
 from aiogram import types
 from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters.state import State, StatesGroup
-from loader import dp, db, bot
+from loader import dp, bot
 from keyboards.defaultbtns import get_driver_keyboard, get_passenger_keyboard, get_phone_keyboard
 from keyboards.edit_profile import get_profile_keyboard, get_edit_field_keyboard, get_back_to_profile_keyboard
 from utils.validators import normalize_phone, validate_phone
 from states.registerstates import EditProfile
+from utils.db_api.users import UserRecord, update_user
 from dotenv import load_dotenv
 import os
 import logging
@@ -31,12 +32,10 @@ async def format_profile_text(user):
 
 # Profile handlers
 @dp.message_handler(lambda message: message.text == "⚙️ Profilim", state="*")
-async def show_profile(message: types.Message, state: FSMContext):
+async def show_profile(message: types.Message, state: FSMContext, user: UserRecord):
     """Display user profile with edit options"""
     await state.finish()  # Clear any previous states
     
-    user = await db.user.find_unique(where={'telegramId': str(message.from_user.id)})
-    
     if not user:
         await message.answer("Siz ro'yxatdan o'tmagansiz. /start buyrug'ini bosing.")
         return
@@ -88,10 +87,7 @@ async def process_first_name(message: types.Message, state: FSMContext):
         return
     
     try:
-        user = await db.user.update(
-            where={'telegramId': str(message.from_user.id)},
-            data={'firstName': new_first_name}
-        )
+        user = await update_user(message.from_user.id, firstName=new_first_name)
         
         await message.answer("✅ Ismingiz muvaffaqiyatli yangilandi!", 
                            reply_markup=get_back_to_profile_keyboard())
@@ -113,10 +109,7 @@ async def process_last_name(message: types.Message, state: FSMContext):
         return
     
     try:
-        user = await db.user.update(
-            where={'telegramId': str(message.from_user.id)},
-            data={'lastName': new_last_name}
-        )
+        user = await update_user(message.from_user.id, lastName=new_last_name)
         
         await message.answer("✅ Familiyangiz muvaffaqiyatli yangilandi!", 
                            reply_markup=get_back_to_profile_keyboard())
@@ -144,10 +137,7 @@ async def process_phone(message: types.Message, state: FSMContext):
         return
     
     try:
-        user = await db.user.update(
-            where={'telegramId': str(message.from_user.id)},
-            data={'phoneNumber': phone}
-        )
+        user = await update_user(message.from_user.id, phoneNumber=phone)
         
         await message.answer("✅ Telefon raqamingiz muvaffaqiyatli yangilandi!", 
                            reply_markup=get_back_to_profile_keyboard())
@@ -161,12 +151,10 @@ async def process_phone(message: types.Message, state: FSMContext):
 
 # Cancel edit handlers
 @dp.callback_query_handler(lambda c: c.data.startswith("cancel_edit_"), state="*")
-async def cancel_edit(callback_query: types.CallbackQuery, state: FSMContext):
+async def cancel_edit(callback_query: types.CallbackQuery, state: FSMContext, user: UserRecord):
     """Cancel editing and return to profile"""
     await state.finish()
     
-    user = await db.user.find_unique(where={'telegramId': str(callback_query.from_user.id)})
-    
     if not user:
         await callback_query.message.edit_text("Siz ro'yxatdan o'tmagansiz.")
         return
@@ -179,12 +167,10 @@ async def cancel_edit(callback_query: types.CallbackQuery, state: FSMContext):
 
 # Back to profile handler
 @dp.callback_query_handler(lambda c: c.data == "back_to_profile")
-async def back_to_profile(callback_query: types.CallbackQuery, state: FSMContext):
+async def back_to_profile(callback_query: types.CallbackQuery, state: FSMContext, user: UserRecord):
     """Return to profile view"""
     await state.finish()
     
-    user = await db.user.find_unique(where={'telegramId': str(callback_query.from_user.id)})
-    
     if not user:
         await callback_query.message.edit_text("Siz ro'yxatdan o'tmagansiz.")
         return
@@ -197,7 +183,7 @@ async def back_to_profile(callback_query: types.CallbackQuery, state: FSMContext
 
 # Back to main menu handler
 @dp.callback_query_handler(lambda c: c.data == "back_to_main")
-async def back_to_main_menu(callback_query: types.CallbackQuery, state: FSMContext):
+async def back_to_main_menu(callback_query: types.CallbackQuery, state: FSMContext, user: UserRecord):
     """Return to main menu"""
     await state.finish()
     
@@ -206,8 +192,6 @@ async def back_to_main_menu(callback_query: types.CallbackQuery, state: FSMConte
     except Exception as e:
         logging.error(f"Xabarni o'chirishda xato: {e}")
 
-    user = await db.user.find_unique(where={'telegramId': str(callback_query.from_user.id)})
-    
     if not user:
         await bot.send_message(
             chat_id=callback_query.from_user.id,
@@ -2,11 +2,15 @@ import logging
 from aiogram import types
 from aiogram.dispatcher import FSMContext
 from aiogram.types import ReplyKeyboardRemove, InlineKeyboardButton, InlineKeyboardMarkup
-from loader import dp, db, bot
+from loader import dp, bot
 from states.registerstates import RegistrationForm, DriverState
 from keyboards.defaultbtns import get_role_keyboard, get_phone_keyboard, get_driver_keyboard, get_passenger_keyboard
 from keyboards.admin_btns import admin_main_menu
 from utils.validators import normalize_phone, validate_phone
+from utils.notify_admins import invalidate_admin_roster
+from utils.db_api.users import UserRecord, create_user as create_db_user, update_user
+from utils.membership import is_channel_member
+from utils.channel_info import get_channel_url
 from dotenv import load_dotenv
 import os
 
@@ -14,20 +18,11 @@ load_dotenv()
 CHANNEL_ID = os.getenv("CHANNEL_ID")
 OWNER_IDS = list(map(int, os.getenv("OWNER_ID", "").split(','))) if os.getenv("OWNER_ID") else []
 
-async def get_channel_url():
-    """Kanalning URL manzilini olish"""
-    try:
-        chat = await bot.get_chat(CHANNEL_ID)
-        return f"https://t.me/{chat.username.replace('@', '')}" if chat.username else f"https://t.me/c/{str(CHANNEL_ID)[4:]}"
-    except Exception as e:
-        logging.error(f"Kanal ma'lumotlarini olishda xato: {e}")
-        return f"https://t.me/c/{str(CHANNEL_ID)[4:]}"
-
 async def create_admin_user(user_id, first_name, last_name, username):
     """Admin foydalanuvchini yaratish"""
     try:
         # Prisma orqali foydalanuvchini yaratish
-        user = await db.user.create({
+        user = await create_db_user({
             'firstName': first_name,
             'lastName': last_name or '',
             'telegramId': user_id,
@@ -35,13 +30,14 @@ async def create_admin_user(user_id, first_name, last_name, username):
             'username': username,
             'role': 'ADMIN'
         })
+        invalidate_admin_roster()
         return user
     except Exception as e:
         logging.error(f"Admin foydalanuvchini yaratishda xato: {e}")
         return None
 
 @dp.message_handler(commands=['start'])
-async def cmd_start(message: types.Message):
+async def cmd_start(message: types.Message, user: UserRecord):
     user_id = message.from_user.id
     first_name = message.from_user.first_name
     last_name = message.from_user.last_name or ""
@@ -49,10 +45,6 @@ async def cmd_start(message: types.Message):
     
     # Agar foydalanuvchi OWNER_ID lar ro'yxatida bo'lsa
     if user_id in OWNER_IDS:
-        user = await db.user.find_unique(
-            where={'telegramId': str(user_id)}
-        )
-        
         # Agar foydalanuvchi bazada yo'q bo'lsa, uni admin sifatida yaratish
         if not user:
             user = await create_admin_user(str(user_id), first_name, last_name, username)
@@ -71,19 +63,13 @@ async def cmd_start(message: types.Message):
                                 reply_markup=admin_main_menu())
         else:
             # Agar foydalanuvchi admin emas bo'lsa, rolini yangilash
-            await db.user.update(
-                where={'telegramId': str(user_id)},
-                data={'role': 'ADMIN'}
-            )
+            await update_user(user_id, role='ADMIN')
+            invalidate_admin_roster()
             await message.answer(f"Salom {first_name}! Sizning profilingiz admin sifatida yangilandi. Admin paneliga xush kelibsiz!", 
                                 reply_markup=admin_main_menu())
         return
     
     # Oddiy foydalanuvchilar uchun
-    user = await db.user.find_unique(
-        where={'telegramId': str(user_id)}
-    )
-    
     if user:
         if user.role == "DRIVER":
             await message.answer(f"Salom, {user.firstName}! Haydovchi sifatida tizimga kirdingiz.", 
@@ -148,8 +134,8 @@ async def create_user(message: types.Message, state: FSMContext, phone_number: s
     
     try:
         role_value = user_data['role']
-        new_user = await db.user.create(
-            data={
+        new_user = await create_db_user(
+            {
                 'firstName': user_data['first_name'],
                 'lastName': user_data['last_name'],
                 'telegramId': str(message.from_user.id),
@@ -200,9 +186,8 @@ async def check_driver_subscription(callback_query: types.CallbackQuery, state:
     user_name = state_data.get('user_name', 'Haydovchi')
     
     try:
-        member = await bot.get_chat_member(chat_id=drivers_channel, user_id=user_id)
-        
-        if member.status in ["member", "administrator", "creator"]:
+        # Haydovchi hozirgina obuna bo'lgan bo'lishi mumkin - keshsiz tekshiriladi
+        if await is_channel_member(user_id, fresh=True):
             success_text = (
                 f"✅ Tabriklaymiz, {user_name}!\n\n"
                 f"Kanalga muvaffaqiyatli obuna bo'ldingiz. "
@@ -250,20 +235,14 @@ async def check_driver_subscription(callback_query: types.CallbackQuery, state:
         )
 
 @dp.message_handler(commands=['check_subscription'])
-async def manual_subscription_check(message: types.Message):
+async def manual_subscription_check(message: types.Message, user: UserRecord):
     """Haydovchi qo'lda obunani tekshirish uchun"""
-    user = await db.user.find_unique(
-        where={'telegramId': str(message.from_user.id)}
-    )
-    
     if not user or user.role != "DRIVER":
         await message.answer("Bu buyruq faqat haydovchilar uchun!")
         return
     
     try:
-        member = await bot.get_chat_member(chat_id=CHANNEL_ID, user_id=message.from_user.id)
-        
-        if member.status in ["member", "administrator", "creator"]:
+        if await is_channel_member(message.from_user.id, fresh=True):
             await message.answer(
                 f"✅ {user.firstName}, siz kanalga obuna bo'lgansiz!\n"
                 f"Haydovchi paneliga xush kelibsiz:",
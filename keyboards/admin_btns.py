@@ -1,6 +1,13 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from keyboards.prebuilt import prebuilt, from_catalog
+from utils.callback_codec import (
+    pack, ADMIN_REGION, ADMIN_REGIONS_PAGE, ADMIN_EDIT_REGION, ADMIN_DELETE_REGION,
+    ADMIN_REGION_DISTRICTS, ADMIN_BACK_TO_REGION, ADMIN_ADD_DISTRICT, ADMIN_DISTRICT,
+    ADMIN_DISTRICTS_PAGE, ADMIN_EDIT_DISTRICT, ADMIN_DELETE_DISTRICT
+)
 
+@prebuilt()
 def admin_main_menu():
     keyboard = ReplyKeyboardMarkup(
         resize_keyboard=True,
@@ -12,11 +19,13 @@ def admin_main_menu():
     )
     return keyboard
 
+@prebuilt()
 def cancel_keyboard():
     keyboard = ReplyKeyboardMarkup(resize_keyboard=True)
     keyboard.add(KeyboardButton("❌ Bekor qilish"))
     return keyboard
 
+@prebuilt()
 def confirmation_keyboard():
     keyboard = InlineKeyboardMarkup()
     keyboard.add(
@@ -25,11 +34,13 @@ def confirmation_keyboard():
     )
     return keyboard
 
+@prebuilt(maxsize=256)
 def back_keyboard(callback_data="back"):
     keyboard = InlineKeyboardMarkup()
     keyboard.add(InlineKeyboardButton("🔙 Orqaga", callback_data=callback_data))
     return keyboard
 
+@prebuilt()
 def region_main_keyboard():
     keyboard = InlineKeyboardMarkup(row_width=2)
     keyboard.add(
@@ -39,76 +50,83 @@ def region_main_keyboard():
     keyboard.add(InlineKeyboardButton("🔙 Orqaga", callback_data="back_to_main"))
     return keyboard
 
+@prebuilt(maxsize=256)
 def region_actions_keyboard(region_id, has_districts=False):
     keyboard = InlineKeyboardMarkup(row_width=2)
     keyboard.add(
-        InlineKeyboardButton("✏️ Tahrirlash", callback_data=f"edit_region_{region_id}"),
-        InlineKeyboardButton("🗑️ O'chirish", callback_data=f"delete_region_{region_id}")
+        InlineKeyboardButton("✏️ Tahrirlash", callback_data=pack(ADMIN_EDIT_REGION, region_id)),
+        InlineKeyboardButton("🗑️ O'chirish", callback_data=pack(ADMIN_DELETE_REGION, region_id))
     )
     keyboard.add(
-        InlineKeyboardButton("🏘️ Tumanlar", callback_data=f"region_districts_{region_id}"),
-        InlineKeyboardButton("➕ Tuman qo'shish", callback_data=f"add_district_{region_id}")
+        InlineKeyboardButton("🏘️ Tumanlar", callback_data=pack(ADMIN_REGION_DISTRICTS, region_id)),
+        InlineKeyboardButton("➕ Tuman qo'shish", callback_data=pack(ADMIN_ADD_DISTRICT, region_id))
     )
     keyboard.add(InlineKeyboardButton("🔙 Orqaga", callback_data="back_to_regions"))
     return keyboard
 
+@prebuilt(maxsize=1024)
 def district_actions_keyboard(district_id):
     keyboard = InlineKeyboardMarkup(row_width=2)
     keyboard.add(
-        InlineKeyboardButton("✏️ Tahrirlash", callback_data=f"edit_district_{district_id}"),
-        InlineKeyboardButton("🗑️ O'chirish", callback_data=f"delete_district_{district_id}")
+        InlineKeyboardButton("✏️ Tahrirlash", callback_data=pack(ADMIN_EDIT_DISTRICT, district_id)),
+        InlineKeyboardButton("🗑️ O'chirish", callback_data=pack(ADMIN_DELETE_DISTRICT, district_id))
     )
     keyboard.add(InlineKeyboardButton("🔙 Orqaga", callback_data="back_to_region_districts"))
     return keyboard
 
-def regions_list_keyboard(regions, page=0, items_per_page=8):
-    keyboard = InlineKeyboardMarkup(row_width=2)
-    
-    start_idx = page * items_per_page
-    end_idx = start_idx + items_per_page
-    paginated_regions = regions[start_idx:end_idx]
-    
-    for region in paginated_regions:
-        has_districts = hasattr(region, 'districts') and len(region.districts) > 0
-        btn_text = f"{region.name} {'⚠️' if not has_districts else ''}"
-        keyboard.add(InlineKeyboardButton(btn_text, callback_data=f"region_{region.id}"))
-    
-    # Navigation buttons
-    row_buttons = []
-    if page > 0:
-        row_buttons.append(InlineKeyboardButton("⬅️ Oldingi", callback_data=f"regions_page_{page-1}"))
-    if end_idx < len(regions):
-        row_buttons.append(InlineKeyboardButton("Keyingi ➡️", callback_data=f"regions_page_{page+1}"))
-    
-    if row_buttons:
-        keyboard.row(*row_buttons)
-    
-    keyboard.add(InlineKeyboardButton("🔙 Orqaga", callback_data="back_to_region_menu"))
-    return keyboard
+def regions_list_keyboard(catalog, page=0, items_per_page=8):
+    def build():
+        keyboard = InlineKeyboardMarkup(row_width=2)
 
-# keyboards/admin_btns.py da quyidagilarni qo'shamiz yoki yangilaymiz
+        regions = catalog.regions
+        start_idx = page * items_per_page
+        end_idx = start_idx + items_per_page
+        paginated_regions = regions[start_idx:end_idx]
 
-def districts_list_keyboard(districts, region_id, page=0, items_per_page=8):
-    keyboard = InlineKeyboardMarkup(row_width=2)
-    
-    start_idx = page * items_per_page
-    end_idx = start_idx + items_per_page
-    paginated_districts = districts[start_idx:end_idx]
-    
-    for district in paginated_districts:
-        keyboard.add(InlineKeyboardButton(district.name, callback_data=f"district_{district.id}"))
-    
-    # Navigation buttons
-    row_buttons = []
-    if page > 0:
-        row_buttons.append(InlineKeyboardButton("⬅️ Oldingi", callback_data=f"districts_page_{page-1}_{region_id}"))
-    if end_idx < len(districts):
-        row_buttons.append(InlineKeyboardButton("Keyingi ➡️", callback_data=f"districts_page_{page+1}_{region_id}"))
-    
-    if row_buttons:
-        keyboard.row(*row_buttons)
-    
-    # To'g'ri callback_data format
-    keyboard.add(InlineKeyboardButton("🔙 Orqaga", callback_data=f"back_to_region_{region_id}"))
-    return keyboard
-    return keyboard
\ No newline at end of file
+        for region in paginated_regions:
+            has_districts = bool(catalog.districts_of(region.id))
+            btn_text = f"{region.name} {'⚠️' if not has_districts else ''}"
+            keyboard.add(InlineKeyboardButton(btn_text, callback_data=pack(ADMIN_REGION, region.id)))
+
+        # Navigation buttons
+        row_buttons = []
+        if page > 0:
+            row_buttons.append(InlineKeyboardButton("⬅️ Oldingi", callback_data=pack(ADMIN_REGIONS_PAGE, page - 1)))
+        if end_idx < len(regions):
+            row_buttons.append(InlineKeyboardButton("Keyingi ➡️", callback_data=pack(ADMIN_REGIONS_PAGE, page + 1)))
+
+        if row_buttons:
+            keyboard.row(*row_buttons)
+
+        keyboard.add(InlineKeyboardButton("🔙 Orqaga", callback_data="back_to_region_menu"))
+        return keyboard.as_json()
+
+    return from_catalog(catalog, ("admin_regions", page, items_per_page), build)
+
+def districts_list_keyboard(catalog, region_id, page=0, items_per_page=8):
+    def build():
+        keyboard = InlineKeyboardMarkup(row_width=2)
+
+        districts = catalog.districts_of(region_id)
+        start_idx = page * items_per_page
+        end_idx = start_idx + items_per_page
+        paginated_districts = districts[start_idx:end_idx]
+
+        for district in paginated_districts:
+            keyboard.add(InlineKeyboardButton(district.name, callback_data=pack(ADMIN_DISTRICT, district.id)))
+
+        # Navigation buttons
+        row_buttons = []
+        if page > 0:
+            row_buttons.append(InlineKeyboardButton("⬅️ Oldingi", callback_data=pack(ADMIN_DISTRICTS_PAGE, page - 1, region_id)))
+        if end_idx < len(districts):
+            row_buttons.append(InlineKeyboardButton("Keyingi ➡️", callback_data=pack(ADMIN_DISTRICTS_PAGE, page + 1, region_id)))
+
+        if row_buttons:
+            keyboard.row(*row_buttons)
+
+        # To'g'ri callback_data format
+        keyboard.add(InlineKeyboardButton("🔙 Orqaga", callback_data=pack(ADMIN_BACK_TO_REGION, region_id)))
+        return keyboard.as_json()
+
+    return from_catalog(catalog, ("admin_districts", region_id, page, items_per_page), build)
\ No newline at end of file
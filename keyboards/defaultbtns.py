@@ -1,17 +1,21 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
+from keyboards.prebuilt import prebuilt
 
+@prebuilt()
 def get_role_keyboard():
     """Rol tanlash uchun klaviatura"""
     keyboard = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
     keyboard.add(KeyboardButton("Haydovchi"), KeyboardButton("Yo'lovchi"))
     return keyboard
 
+@prebuilt()
 def get_phone_keyboard():
     """Telefon raqamni jo'natish uchun klaviatura"""
     keyboard = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
     keyboard.add(KeyboardButton("Telefon raqamni jo'natish", request_contact=True))
     return keyboard
 
+@prebuilt()
 def get_driver_keyboard():
     """Haydovchi uchun asosiy klaviatura"""
     keyboard = ReplyKeyboardMarkup(resize_keyboard=True, row_width=1)
@@ -19,6 +23,7 @@ def get_driver_keyboard():
     # keyboard.add(KeyboardButton("Foydalanish qo'llanmasi"))
     return keyboard
 
+@prebuilt()
 def get_passenger_keyboard():
     """Yo'lovchi uchun asosiy klaviatura"""
     keyboard = ReplyKeyboardMarkup(resize_keyboard=True, row_width=2)
@@ -1,6 +1,8 @@
 from aiogram import types
+from keyboards.prebuilt import prebuilt
 
 # Inline keyboardlarni to'g'ridan-to'g'ri shu faylda yaratamiz
+@prebuilt()
 def get_profile_keyboard():
     """Profil uchun inline keyboard"""
     markup = types.InlineKeyboardMarkup(row_width=2)
@@ -12,12 +14,14 @@ def get_profile_keyboard():
     )
     return markup
 
+@prebuilt(maxsize=8)
 def get_edit_field_keyboard(field):
     """Maydonni tahrirlash uchun keyboard"""
     markup = types.InlineKeyboardMarkup()
     markup.add(types.InlineKeyboardButton("⬅️ Bekor qilish", callback_data=f"cancel_edit_{field}"))
     return markup
 
+@prebuilt()
 def get_back_to_profile_keyboard():
     """Profilga qaytish uchun keyboard"""
     markup = types.InlineKeyboardMarkup()
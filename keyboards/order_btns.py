@@ -0,0 +1,99 @@
+import json
+from datetime import date, timedelta
+from functools import lru_cache
+
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from data.packages import PACKAGE_TYPES, PACKAGE_SIZES, PACKAGE_TYPE_KEYS, PACKAGE_SIZE_KEYS
+from utils.callback_codec import pack, TRIP_DATE, TRIP_PASSENGERS, DELIVERY_PACKAGE_TYPE, DELIVERY_PACKAGE_SIZE
+from keyboards.prebuilt import prebuilt, from_catalog
+
+
+def _button(text, callback_data):
+    return {"text": text, "callback_data": callback_data}
+
+
+def _serialize(buttons, row_width=2):
+    """Tugmalarni qatorlarga bo'lib, tayyor JSON ko'rinishiga keltirish"""
+    rows = [buttons[i:i + row_width] for i in range(0, len(buttons), row_width)]
+    return json.dumps({"inline_keyboard": rows}, ensure_ascii=False)
+
+
+def regions_markup(catalog, action, exclude=None):
+    """Viloyatlar ro'yxati (ixtiyoriy ravishda bitta viloyatsiz)"""
+    def build():
+        buttons = [
+            _button(region.name, pack(action, region.id))
+            for region in catalog.active_regions
+            if region.id != exclude
+        ]
+        return _serialize(buttons)
+
+    return from_catalog(catalog, ("regions", action, exclude), build)
+
+
+def districts_markup(catalog, region_id, action, exclude=None):
+    """Viloyat tumanlari ro'yxati (ixtiyoriy ravishda bitta tumansiz)"""
+    def build():
+        buttons = [
+            _button(district.name, pack(action, district.id))
+            for district in catalog.districts_of(region_id)
+            if district.id != exclude
+        ]
+        return _serialize(buttons)
+
+    return from_catalog(catalog, ("districts", region_id, action, exclude), build)
+
+
+@lru_cache(maxsize=2)
+def dates_markup(today: date, days=5):
+    """Bugundan boshlab bir necha kunlik sana tanlash klaviaturasi"""
+    buttons = []
+    for i in range(days):
+        departure_date = today + timedelta(days=i)
+        buttons.append(_button(
+            departure_date.strftime("%Y-%m-%d"),
+            pack(TRIP_DATE, int(departure_date.strftime("%Y%m%d")))
+        ))
+    return _serialize(buttons)
+
+
+@prebuilt()
+def passengers_markup():
+    keyboard = InlineKeyboardMarkup(row_width=4)
+    for i in range(1, 5):
+        keyboard.insert(InlineKeyboardButton(text=str(i), callback_data=pack(TRIP_PASSENGERS, i)))
+    return keyboard
+
+
+@prebuilt()
+def package_types_markup():
+    keyboard = InlineKeyboardMarkup(row_width=2)
+    for index, key in enumerate(PACKAGE_TYPE_KEYS):
+        keyboard.insert(InlineKeyboardButton(text=PACKAGE_TYPES[key]["name"], callback_data=pack(DELIVERY_PACKAGE_TYPE, index)))
+    return keyboard
+
+
+@prebuilt()
+def package_sizes_markup():
+    keyboard = InlineKeyboardMarkup(row_width=1)
+    for index, key in enumerate(PACKAGE_SIZE_KEYS):
+        keyboard.insert(InlineKeyboardButton(text=PACKAGE_SIZES[key]["name"], callback_data=pack(DELIVERY_PACKAGE_SIZE, index)))
+    return keyboard
+
+
+@prebuilt(maxsize=16)
+def skip_markup(callback_data):
+    keyboard = InlineKeyboardMarkup(row_width=1)
+    keyboard.add(InlineKeyboardButton("⏭️ O'tkazib yuborish", callback_data=callback_data))
+    return keyboard
+
+
+@prebuilt(maxsize=4)
+def confirm_markup(confirm_data, cancel_data):
+    keyboard = InlineKeyboardMarkup()
+    keyboard.row(
+        InlineKeyboardButton("✅ Tasdiqlash", callback_data=confirm_data),
+        InlineKeyboardButton("❌ Bekor qilish", callback_data=cancel_data)
+    )
+    return keyboard
@@ -0,0 +1,40 @@
+import functools
+
+
+def prebuilt(maxsize=None):
+    """Klaviaturani bir marta yig'ib, tayyor JSON ko'rinishida qaytaruvchi dekorator.
+
+    aiogram reply_markup sifatida berilgan satrni o'zgartirmasdan yuboradi,
+    shuning uchun har bir chaqiruvda obyekt yig'ish va uni serializatsiya
+    qilish takrorlanmaydi.
+    """
+    def decorator(func):
+        @functools.lru_cache(maxsize=maxsize)
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return func(*args, **kwargs).as_json()
+        return wrapper
+    return decorator
+
+
+# Katalogga bog'liq klaviaturalar shu versiya uchun yig'ilgan
+_catalog_version = None
+_catalog_markups = {}
+
+
+def from_catalog(catalog, key, build):
+    """Katalog versiyasi bo'yicha keshlangan klaviatura"""
+    global _catalog_version
+
+    # Zaxira (JSON) katalog vaqtinchalik - uni keshlamaymiz
+    if catalog.is_fallback:
+        return build()
+
+    if catalog.version != _catalog_version:
+        _catalog_markups.clear()
+        _catalog_version = catalog.version
+
+    markup = _catalog_markups.get(key)
+    if markup is None:
+        markup = _catalog_markups[key] = build()
+    return markup
@@ -5,6 +5,13 @@ from prisma import Prisma
 from data import config
 
 bot = Bot(token=config.BOT_TOKEN, parse_mode=types.ParseMode.HTML)
-storage = MemoryStorage()
-dp = Dispatcher(bot, storage=storage)
-db = Prisma()
\ No newline at end of file
+db = Prisma()
+
+# utils paketidagi modullar loader dan bot va db ni oladi, shuning uchun ular oldinroq yaratiladi
+from utils.fsm_storage import SQLiteStorage
+
+if config.FSM_STORAGE == "memory":
+    storage = MemoryStorage()
+else:
+    storage = SQLiteStorage(config.FSM_STORAGE_PATH, ttl=config.FSM_STATE_TTL, cache_size=config.FSM_CACHE_SIZE)
+dp = Dispatcher(bot, storage=storage)
\ No newline at end of file
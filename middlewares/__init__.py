@@ -2,7 +2,9 @@ from aiogram import Dispatcher
 
 from loader import dp
 from .throttling import ThrottlingMiddleware
+from .identity import IdentityMiddleware
 
 
 if __name__ == "middlewares":
     dp.middleware.setup(ThrottlingMiddleware())
+    dp.middleware.setup(IdentityMiddleware())
@@ -0,0 +1,21 @@
+from aiogram import types
+from aiogram.dispatcher.middlewares import BaseMiddleware
+
+from utils.db_api.users import get_user
+
+
+class IdentityMiddleware(BaseMiddleware):
+    """
+    Har bir update uchun foydalanuvchini bir marta aniqlab, handlerlarga
+    ``user`` argumenti sifatida uzatadi (ro'yxatdan o'tmagan bo'lsa ``None``).
+    Rol filtrlari ham shu qiymatdan foydalanadi.
+    """
+
+    async def _resolve(self, from_user: types.User, data: dict):
+        data["user"] = await get_user(from_user.id) if from_user else None
+
+    async def on_pre_process_message(self, message: types.Message, data: dict):
+        await self._resolve(message.from_user, data)
+
+    async def on_pre_process_callback_query(self, callback_query: types.CallbackQuery, data: dict):
+        await self._resolve(callback_query.from_user, data)
@@ -0,0 +1,26 @@
+-- CreateIndex
+CREATE INDEX "Order_passengerId_createdAt_idx" ON "Order"("passengerId", "createdAt" DESC);
+
+-- CreateIndex
+CREATE INDEX "Order_driverId_idx" ON "Order"("driverId");
+
+-- CreateIndex
+CREATE INDEX "Order_createdAt_idx" ON "Order"("createdAt");
+
+-- CreateIndex
+CREATE INDEX "Order_orderType_createdAt_idx" ON "Order"("orderType", "createdAt");
+
+-- CreateIndex
+CREATE INDEX "Order_fromRegionId_idx" ON "Order"("fromRegionId");
+
+-- CreateIndex
+CREATE INDEX "Order_toRegionId_idx" ON "Order"("toRegionId");
+
+-- CreateIndex
+CREATE INDEX "Order_fromDistrictId_idx" ON "Order"("fromDistrictId");
+
+-- CreateIndex
+CREATE INDEX "Order_toDistrictId_idx" ON "Order"("toDistrictId");
+
+-- CreateIndex
+CREATE INDEX "OrderStatus_status_orderId_idx" ON "OrderStatus"("status", "orderId");
@@ -0,0 +1,22 @@
+-- CreateTable
+CREATE TABLE "OrderStatsDaily" (
+    "day" DATE NOT NULL,
+    "orderType" "OrderType" NOT NULL,
+    "status" "OrderStatusEnum" NOT NULL,
+    "fromRegionId" INTEGER NOT NULL,
+    "toRegionId" INTEGER NOT NULL,
+    "count" INTEGER NOT NULL DEFAULT 0,
+
+    CONSTRAINT "OrderStatsDaily_pkey" PRIMARY KEY ("day","orderType","status","fromRegionId","toRegionId")
+);
+
+-- CreateIndex
+CREATE INDEX "OrderStatsDaily_orderType_day_idx" ON "OrderStatsDaily"("orderType", "day");
+
+-- Mavjud buyurtmalardan boshlang'ich qiymatlar
+INSERT INTO "OrderStatsDaily" ("day", "orderType", "status", "fromRegionId", "toRegionId", "count")
+SELECT o."createdAt"::date, o."orderType", COALESCE(s."status", 'initiated'::"OrderStatusEnum"),
+       o."fromRegionId", o."toRegionId", COUNT(*)::int
+FROM "Order" o
+LEFT JOIN "OrderStatus" s ON s."orderId" = o."id"
+GROUP BY 1, 2, 3, 4, 5;
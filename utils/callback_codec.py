@@ -0,0 +1,76 @@
+"""Inline tugmalar uchun ixcham callback_data kodeki.
+
+Callback ko'rinishi: ``<amal>:<id>:<id>...`` (masalan ``t.fr:12``).
+Nomlar o'rniga faqat raqamli ID lar yoziladi, shuning uchun pastki chiziqli
+yoki uzun nomlar Telegramning 64 baytlik chegarasiga ta'sir qilmaydi.
+"""
+from typing import Tuple
+
+SEPARATOR = ":"
+MAX_LENGTH = 64
+
+# Yo'lga otlanish
+TRIP_FROM_REGION = "t.fr"
+TRIP_FROM_DISTRICT = "t.fd"
+TRIP_PASSENGERS = "t.ps"
+TRIP_TO_REGION = "t.tr"
+TRIP_TO_DISTRICT = "t.td"
+TRIP_DATE = "t.dt"
+
+# Pochta jo'natish
+DELIVERY_FROM_REGION = "d.fr"
+DELIVERY_FROM_DISTRICT = "d.fd"
+DELIVERY_TO_REGION = "d.tr"
+DELIVERY_TO_DISTRICT = "d.td"
+DELIVERY_PACKAGE_TYPE = "d.pt"
+DELIVERY_PACKAGE_SIZE = "d.pz"
+
+# Buyurtmalar tarixi
+HISTORY_PAGE = "h.pg"
+HISTORY_NONE = "h.no"
+HISTORY_CLOSE = "h.cl"
+
+# Admin: viloyat va tumanlar boshqaruvi
+ADMIN_REGION = "a.r"
+ADMIN_REGIONS_PAGE = "a.rp"
+ADMIN_EDIT_REGION = "a.re"
+ADMIN_DELETE_REGION = "a.rx"
+ADMIN_REGION_DISTRICTS = "a.rd"
+ADMIN_BACK_TO_REGION = "a.rb"
+ADMIN_ADD_DISTRICT = "a.da"
+ADMIN_DISTRICT = "a.d"
+ADMIN_DISTRICTS_PAGE = "a.dp"
+ADMIN_EDIT_DISTRICT = "a.de"
+ADMIN_DELETE_DISTRICT = "a.dx"
+
+
+def pack(action: str, *ids: int) -> str:
+    """Amal va raqamli ID larni callback_data satriga yig'ish"""
+    data = SEPARATOR.join((action, *(str(int(i)) for i in ids)))
+    if len(data.encode()) > MAX_LENGTH:
+        raise ValueError(f"callback_data {MAX_LENGTH} baytdan oshib ketdi: {data}")
+    return data
+
+
+def action_of(data: str) -> str:
+    """callback_data dagi amal kodini qaytarish"""
+    return data.partition(SEPARATOR)[0]
+
+
+def unpack(data: str) -> Tuple[str, Tuple[int, ...]]:
+    """callback_data ni (amal, ID lar) juftligiga ajratish"""
+    action, _, rest = data.partition(SEPARATOR)
+    if not rest:
+        return action, ()
+    return action, tuple(int(part) for part in rest.split(SEPARATOR))
+
+
+def unpack_id(data: str) -> int:
+    """Bitta ID li callback_data dan ID ni olish"""
+    return unpack(data)[1][0]
+
+
+def on(*actions: str):
+    """Handler filtri: callback_data berilgan amallardan biri bo'lsa o'tkazadi"""
+    expected = frozenset(actions)
+    return lambda c: c.data is not None and action_of(c.data) in expected
@@ -0,0 +1,41 @@
+"""Haydovchilar kanali ma'lumotlari (havola).
+
+Kanal havolasi bir marta ``get_chat`` bilan olinib saqlanadi - har bir
+buyurtma olishda Bot API ga murojaat qilinmaydi. Xato bo'lsa ichki
+``t.me/c/...`` havolasi qaytariladi va keyingi safar qayta urinib ko'riladi.
+"""
+import logging
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from loader import bot
+
+load_dotenv()
+CHANNEL_ID = int(os.getenv("CHANNEL_ID", 0))
+
+_channel_url: Optional[str] = None
+
+
+def _fallback_url() -> str:
+    return f"https://t.me/c/{str(CHANNEL_ID)[4:]}"
+
+
+async def load_channel_url() -> str:
+    """Kanal havolasini Bot API dan olish (xato bo'lsa istisno ko'tariladi)"""
+    global _channel_url
+    chat = await bot.get_chat(CHANNEL_ID)
+    _channel_url = f"https://t.me/{chat.username.replace('@', '')}" if chat.username else _fallback_url()
+    return _channel_url
+
+
+async def get_channel_url() -> str:
+    """Kanalning URL manzilini olish"""
+    if _channel_url is not None:
+        return _channel_url
+    try:
+        return await load_channel_url()
+    except Exception as e:
+        logging.error(f"Kanal ma'lumotlarini olishda xato: {e}")
+        return _fallback_url()
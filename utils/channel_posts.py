@@ -0,0 +1,325 @@
+"""Haydovchilar kanalidagi buyurtma postlari.
+
+Yo'lovchi va pochta postlari bitta joyda chiziladi: har bir (buyurtma turi,
+holat) uchun sarlavha va qatorlar shabloni modul yuklanganda bir marta
+tayyorlanadi. Har bir kanal xabari uchun oxirgi chizilgan matn va
+klaviaturaning xeshi saqlanadi - ko'rinishi o'zgarmagan tahrir Bot API ga
+umuman yuborilmaydi (``MessageNotModified`` ham bo'lmaydi).
+
+Bitta post qisqa vaqt ichida bir necha marta o'zgarishi mumkin (olindi,
+muddati tugadi, yana olindi, yakunlandi). Oxirgi tahrirdan ``CHANNEL_EDIT_WINDOW``
+sekund o'tmagan bo'lsa, yangi holat darhol yuborilmaydi: oyna oxirigacha
+faqat eng so'nggi holat saqlanadi va bitta tahrir yuboriladi. Bekor qilingan
+buyurtma posti esa kutmasdan o'chiriladi.
+
+Handlerlar kanal navbatini (daqiqasiga ~20 ta) kutmasligi uchun
+``publish_later``/``refresh_later`` bilan post fonda yuboriladi. Bitta
+buyurtmaning fon vazifalari ketma-ket bajariladi: yangi post yuborilib
+bo'lmaguncha uning tahriri boshlanmaydi va eski holat yangisidan keyin
+yetib bormaydi.
+
+Xeshlar shu jarayon xotirasida turadi: restartdan keyingi birinchi tahrir
+odatdagidek yuboriladi.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Awaitable, Dict, NamedTuple, Optional, Set, Tuple
+
+from aiogram.utils.exceptions import MessageNotModified
+from dotenv import load_dotenv
+
+from data.packages import PACKAGE_SIZES, PACKAGE_TYPES
+from utils import outbox
+from utils.db_api.channel_messages import (
+    forget_channel_message_id, get_channel_message_id, invalidate, set_channel_message_id
+)
+from utils.outbox import Priority
+
+load_dotenv()
+CHANNEL_ID = int(os.getenv("CHANNEL_ID", 0))
+CACHE_SIZE = int(os.getenv("CHANNEL_MESSAGE_CACHE_SIZE", 10000))
+EDIT_WINDOW = float(os.getenv("CHANNEL_EDIT_WINDOW", 2))  # sekundlarda
+
+STATUS_LABELS = {
+    "initiated": ("🆕", "NEW"),
+    "processing": ("🔄", "JARAYONDA"),
+    "completed": ("✅", "YAKUNLANDI"),
+    "canceled": ("❌", "BEKOR QILINDI"),
+    "failed": ("⚠️", "XATOLIK")
+}
+UNKNOWN_LABEL = ("❓", "NOMA'LUM")
+
+# Buyurtma turi -> (post nomi, yangi post sarlavhasi, kontakt tugmasi matni, callback prefiksi)
+ORDER_KINDS = {
+    "PASSENGER": ("Buyurtma", "🆕 *Yangi buyurtma!*", "📞 Yo'lovchi bilan bog'lanish", "contact_passenger_"),
+    "DELIVERY": ("Pochta buyurtma", "📦 *Yangi pochta buyurtma!*", "📞 Jo'natuvchi bilan bog'lanish", "contact_sender_")
+}
+
+_STATUS_LINE = "🚦 Holati: *{label}*  \n"
+_ROUTE = "📍 Qayerdan: {from_name}  \n📍 Qayerga: {to_name}"
+_TRIP = "  \n🕒 Chiqish vaqti: {departure}  \n👥 Yo'lovchilar soni: {passengers}"
+_PACKAGE = "  \n📦 Turi: {package_type}  \n📏 Hajmi: {package_size}"
+# Post "Markdown" (legacy) rejimida: faqat shu belgilar ``\`` bilan ekranlanadi
+_MARKDOWN_SPECIAL = re.compile(r"([_*`\[])")
+
+
+def _compile():
+    headers = {}
+    for kind, (title, created, _, _) in ORDER_KINDS.items():
+        for status, (emoji, label) in [*STATUS_LABELS.items(), (None, UNKNOWN_LABEL)]:
+            headers[(kind, status)] = f"{emoji} *{title} - {label}*  \n" + _STATUS_LINE.format(label=label)
+        headers[(kind, "created")] = f"{created}  \n" + _STATUS_LINE.format(label=STATUS_LABELS["initiated"][1])
+    return headers
+
+
+_HEADERS = _compile()
+# Kontakt tugmasi faqat NEW holatida; aiogram tayyor JSON satrni o'zgartirmasdan yuboradi
+_CONTACT_MARKUPS = {
+    kind: json.dumps(
+        {"inline_keyboard": [[{"text": text, "callback_data": prefix + "%d"}]]}, ensure_ascii=False
+    )
+    for kind, (_, _, text, prefix) in ORDER_KINDS.items()
+}
+
+
+class _Pending(NamedTuple):
+    order: object
+    text: str
+    markup: Optional[str]
+    digest: bytes
+    timer: asyncio.TimerHandle
+
+
+# message_id -> (oxirgi yuborilgan ko'rinish xeshi, yuborilgan vaqt)
+_hashes: "OrderedDict[int, Tuple[bytes, float]]" = OrderedDict()
+_pending: Dict[int, _Pending] = {}
+_tasks: Set[asyncio.Task] = set()
+# order_id -> shu buyurtmaning oxirgi fon vazifasi
+_chains: Dict[int, asyncio.Task] = {}
+_stats = {"sent": 0, "edited": 0, "skipped": 0, "coalesced": 0, "deleted": 0}
+
+
+def _escape(value) -> str:
+    """Foydalanuvchi/admin kiritgan matnni Markdown belgilaridan himoyalash"""
+    return _MARKDOWN_SPECIAL.sub(r"\\\1", str(value))
+
+
+def _name(relation, default: str = "Noma'lum") -> str:
+    return relation.name if relation else default
+
+
+def render_post(order, created: bool = False, from_name: Optional[str] = None,
+                to_name: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """Kanal posti matni va klaviaturasi (tayyor JSON yoki ``None``).
+
+    ``from_name``/``to_name`` - buyurtma tumanlari yuklanmagan bo'lsa (yangi post).
+    """
+    kind = "DELIVERY" if order.orderType == "DELIVERY" else "PASSENGER"
+    status = order.status.status if order.status else "initiated"
+    header = _HEADERS.get((kind, "created" if created else status)) or _HEADERS[(kind, None)]
+
+    text = header + _ROUTE.format(
+        from_name=_escape(from_name or _name(order.fromDistrict)),
+        to_name=_escape(to_name or _name(order.toDistrict))
+    )
+    if kind == "PASSENGER":
+        text += _TRIP.format(departure=order.departureTime.strftime('%Y-%m-%d %H:%M'), passengers=order.passengers)
+    else:
+        text += _PACKAGE.format(
+            package_type=PACKAGE_TYPES.get(order.packageType, {}).get('name', 'Nomalum'),
+            package_size=PACKAGE_SIZES.get(order.packageSize, {}).get('name', 'Nomalum')
+        )
+        if order.packageWeight:
+            text += f"\n⚖️ Og'irligi: {order.packageWeight} kg"
+        if order.receiverName:
+            text += f"\n👤 Qabul qiluvchi: {_escape(order.receiverName)}"
+
+    markup = _CONTACT_MARKUPS[kind] % order.id if created or status == "initiated" else None
+    return text, markup
+
+
+def _digest(text: str, markup: Optional[str]) -> bytes:
+    return hashlib.blake2b(f"{text}\0{markup or ''}".encode(), digest_size=8).digest()
+
+
+def _remember(message_id: int, digest: bytes):
+    _hashes[message_id] = (digest, time.monotonic())
+    _hashes.move_to_end(message_id)
+    while len(_hashes) > CACHE_SIZE:
+        _hashes.popitem(last=False)
+
+
+def _drop_pending(message_id: int, counter: str = "coalesced"):
+    pending = _pending.pop(message_id, None)
+    if pending is not None:
+        pending.timer.cancel()
+        _stats[counter] += 1
+
+
+def post_stats() -> dict:
+    """Yuborilgan, tahrirlangan, o'tkazib yuborilgan (o'zgarmagan), birlashtirilgan
+    (oynada keyingisi bilan almashgan) va o'chirilgan postlar soni"""
+    return {**_stats, "tracked": len(_hashes), "pending": len(_pending)}
+
+
+async def publish_post(order, from_name: str, to_name: str):
+    """Yangi buyurtma postini kanalga yuborish va uning ID sini saqlash"""
+    text, markup = render_post(order, created=True, from_name=from_name, to_name=to_name)
+    message = await outbox.send_message(
+        CHANNEL_ID, text, priority=Priority.CHANNEL, parse_mode="Markdown", reply_markup=markup
+    )
+    _stats["sent"] += 1
+    _remember(message.message_id, _digest(text, markup))
+    await set_channel_message_id(order.id, message.message_id)
+    return message
+
+
+def _spawn(coro: Awaitable) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+
+def _flush(message_id: int):
+    pending = _pending.pop(message_id, None)
+    if pending is None:
+        return
+    _spawn(_edit(pending.order, message_id, pending.text, pending.markup, pending.digest))
+
+
+async def flush_posts():
+    """Fondagi va oynada kutayotgan tahrirlarni darhol yuborish (bot o'chirilayotganda)"""
+    while _tasks or _pending:
+        for message_id in list(_pending):
+            _pending[message_id].timer.cancel()
+            _flush(message_id)
+        if _tasks:
+            await asyncio.wait(set(_tasks))
+
+
+def _chain(order_id: int, coro: Awaitable):
+    previous = _chains.get(order_id)
+
+    async def run():
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            await coro
+        except Exception as e:
+            logging.error(f"Kanal posti fon vazifasida xato: Order {order_id}, Error: {e}")
+
+    task = _spawn(run())
+    _chains[order_id] = task
+    task.add_done_callback(lambda done: _chains.pop(order_id) if _chains.get(order_id) is done else None)
+
+
+def publish_later(order, from_name: str, to_name: str):
+    """``publish_post`` ni fonda bajarish - handler kanal navbatini kutmaydi"""
+    _chain(order.id, publish_post(order, from_name, to_name))
+
+
+async def _refresh(order):
+    channel_message_id = await get_channel_message_id(order.id, order)
+    if channel_message_id:
+        await update_post(order, channel_message_id)
+    else:
+        logging.warning(f"Order {order.id} uchun channel_message_id topilmadi")
+
+
+def refresh_later(order):
+    """Kanal postini fonda buyurtmaning joriy holatiga keltirish (post ID si ham fonda topiladi)"""
+    _chain(order.id, _refresh(order))
+
+
+async def update_post(order, channel_message_id: Optional[int] = None):
+    """Kanal postini buyurtmaning joriy holatiga keltirish (bekor qilingani o'chiriladi)"""
+    try:
+        if not channel_message_id:
+            logging.warning(f"Order {order.id} uchun channel_message_id topilmadi")
+            return
+
+        status = order.status.status if order.status else "initiated"
+        if status == "canceled":
+            # Kutayotgan tahrir endi kerak emas - post darhol o'chiriladi
+            _drop_pending(channel_message_id)
+            try:
+                await outbox.delete_message(CHANNEL_ID, channel_message_id, priority=Priority.CHANNEL)
+                _stats["deleted"] += 1
+                _hashes.pop(channel_message_id, None)
+                await forget_channel_message_id(order.id)
+                logging.info(f"Bekor qilingan buyurtma {order.id} kanaldan o'chirildi")
+                return
+            except Exception as delete_error:
+                # O'chirib bo'lmasa, oddiy yangilash
+                logging.error(f"Xabarni o'chirishda xato: {delete_error}")
+
+        text, markup = render_post(order)
+        digest = _digest(text, markup)
+        sent = _hashes.get(channel_message_id)
+
+        pending = _pending.get(channel_message_id)
+        if pending is not None:
+            if sent and digest == sent[0]:
+                # Post oynada yana ko'rinib turgan holatiga qaytdi - hech narsa yuborilmaydi
+                _drop_pending(channel_message_id, "skipped")
+            else:
+                _pending[channel_message_id] = pending._replace(order=order, text=text, markup=markup, digest=digest)
+                _stats["coalesced"] += 1
+            return
+
+        if sent and digest == sent[0]:
+            _hashes.move_to_end(channel_message_id)
+            _stats["skipped"] += 1
+            return
+
+        wait = EDIT_WINDOW - (time.monotonic() - sent[1]) if sent else 0
+        if wait > 0:
+            timer = asyncio.get_running_loop().call_later(wait, _flush, channel_message_id)
+            _pending[channel_message_id] = _Pending(order, text, markup, digest, timer)
+            return
+
+        await _edit(order, channel_message_id, text, markup, digest)
+    except Exception as e:
+        logging.error(f"Kanal postini yangilashda xato: Order {order.id}, Error: {e}")
+
+
+async def _edit(order, channel_message_id: int, text: str, markup: Optional[str], digest: bytes):
+    try:
+        await outbox.edit_message_text(
+            CHANNEL_ID, channel_message_id, text,
+            priority=Priority.CHANNEL, parse_mode="Markdown", reply_markup=markup
+        )
+        _stats["edited"] += 1
+        logging.info(f"Kanal posti muvaffaqiyatli yangilandi: Order {order.id}")
+    except MessageNotModified:
+        pass
+    except Exception as edit_error:
+        logging.error(f"Kanal postini yangilashda xato: Order {order.id}, Error: {edit_error}")
+        _hashes.pop(channel_message_id, None)
+        # Post boshqa bot nusxasi tomonidan qayta yuborilgan bo'lishi mumkin - bazadagi ID ni tekshirish
+        invalidate(order.id)
+        stored_message_id = await get_channel_message_id(order.id)
+        if stored_message_id and stored_message_id != channel_message_id:
+            await update_post(order, stored_message_id)
+            return
+        # Agar xabar yangilanmasa, yangi xabar yuborish
+        try:
+            message = await outbox.send_message(
+                CHANNEL_ID, text, priority=Priority.CHANNEL, parse_mode="Markdown", reply_markup=markup
+            )
+            _stats["sent"] += 1
+            _remember(message.message_id, digest)
+            await set_channel_message_id(order.id, message.message_id)
+            logging.info(f"Yangi kanal posti yaratildi: Order {order.id}")
+        except Exception as send_error:
+            logging.error(f"Yangi kanal posti yaratishda xato: {send_error}")
+        return
+
+    _remember(channel_message_id, digest)
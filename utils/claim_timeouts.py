@@ -0,0 +1,133 @@
+"""Haydovchi buyurtmani jarayonga olgandan keyingi muddat nazorati.
+
+Har bir band qilingan (processing) buyurtma vaqt g'ildiragida yengil yozuv
+sifatida turadi: ``claim`` o'tishida qo'shiladi, ``complete``/``cancel`` da
+olib tashlanadi. Har tickda muddati tugagan buyurtmalar bitta ``release``
+o'tishi bilan yana ``initiated`` holatiga qaytariladi, so'ng buyurtma turiga
+qarab ro'yxatdan o'tgan listenerlarga (kanal postini yangilash) uzatiladi.
+Restartdan keyin processing buyurtmalar ``resume_claims`` bilan qolgan
+muddati bilan g'ildirakka qaytariladi.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from loader import db
+from utils.timing_wheel import TimingWheel
+from utils.db_api.lifecycle import on_transition, transition_many
+
+load_dotenv()
+CLAIM_TIMEOUT = int(os.getenv("CLAIM_TIMEOUT", 300))  # 5 daqiqa
+TICK = 1.0
+
+ClaimListener = Callable[..., Awaitable[None]]
+
+_wheel = TimingWheel(tick=TICK)
+_listeners: Dict[str, ClaimListener] = {}
+_ticker: Optional[asyncio.Task] = None
+
+
+def on_claim_expired(order_type: str):
+    """Muddati tugab initiated ga qaytarilgan buyurtma uchun listener (dekorator)"""
+    def decorator(func: ClaimListener) -> ClaimListener:
+        _listeners[order_type] = func
+        return func
+    return decorator
+
+
+def track_claim(order_id: int, order_type: str, delay: Optional[float] = None):
+    """Buyurtma band qilindi - CLAIM_TIMEOUT (yoki ``delay``) dan keyin qaytariladi"""
+    _wheel.add(order_id, CLAIM_TIMEOUT if delay is None else delay, order_type)
+
+
+async def resume_claims(order_type: str) -> int:
+    """Restartdan keyin ``order_type`` turidagi processing buyurtmalarni g'ildirakka qaytarish.
+
+    Qolgan muddat status oxirgi o'zgargan (band qilingan) vaqtdan hisoblanadi.
+    Muddati o'tib bo'lganlari birinchi tickda odatdagi yo'l bilan (listener
+    kanal postini tiklaydi) qaytariladi.
+    """
+    statuses = await db.orderstatus.find_many(
+        where={"status": "processing", "order": {"is": {"orderType": order_type}}}
+    )
+    now = datetime.now(timezone.utc)
+    for status in statuses:
+        track_claim(status.orderId, order_type, CLAIM_TIMEOUT - (now - status.updatedAt).total_seconds())
+    return len(statuses)
+
+
+def release_claim(order_id: int):
+    """Buyurtma yakunlandi yoki bekor qilindi - muddat nazorati kerak emas"""
+    _wheel.cancel(order_id)
+
+
+def is_tracked(order_id: int) -> bool:
+    return order_id in _wheel
+
+
+def active_claims(order_type: Optional[str] = None) -> int:
+    if order_type is None:
+        return len(_wheel)
+    return sum(1 for _, kind in _wheel.items() if kind == order_type)
+
+
+@on_transition("claim")
+async def _track(event, order, previous):
+    track_claim(order.id, order.orderType)
+
+
+@on_transition("complete", "cancel")
+async def _release(event, order, previous):
+    release_claim(order.id)
+
+
+async def _revert(expired):
+    # Faqat hali processing holatida qolganlari qaytadi (yakunlangan buyurtma o'zgarmaydi)
+    orders = await transition_many("release", [order_id for order_id, _ in expired])
+    if not orders:
+        return
+    logging.info(f"{len(orders)} ta buyurtma {CLAIM_TIMEOUT // 60} daqiqa o'tgach NEW holatiga qaytarildi")
+
+    for order in orders:
+        listener = _listeners.get(order.orderType)
+        if listener is None:
+            continue
+        try:
+            await listener(order)
+        except Exception as e:
+            logging.error(f"Claim timeout listener xato: Order {order.id}, Error: {e}")
+
+
+async def _run():
+    while True:
+        await asyncio.sleep(TICK)
+        expired = _wheel.advance()
+        if not expired:
+            continue
+        try:
+            await _revert(expired)
+        except Exception as e:
+            logging.error(f"Muddati tugagan buyurtmalarni qaytarishda xato: {e}")
+
+
+def start_claim_timeouts():
+    """Tick vazifasini ishga tushirish (db.connect() dan keyin chaqiriladi)"""
+    global _ticker
+    if _ticker is None or _ticker.done():
+        _ticker = asyncio.create_task(_run())
+
+
+async def stop_claim_timeouts():
+    global _ticker
+    if _ticker is None:
+        return
+    _ticker.cancel()
+    try:
+        await _ticker
+    except asyncio.CancelledError:
+        pass
+    _ticker = None
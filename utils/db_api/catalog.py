@@ -0,0 +1,153 @@
+import asyncio
+import json
+import logging
+from types import MappingProxyType
+from typing import NamedTuple, Optional, Tuple
+
+from loader import db
+from utils.sharding import broadcast, on_broadcast
+
+
+class Region(NamedTuple):
+    id: int
+    name: str
+
+
+class District(NamedTuple):
+    id: int
+    name: str
+    region_id: int
+
+
+class Catalog:
+    """Viloyat va tumanlarning o'zgarmas (immutable) nusxasi.
+
+    Bir marta yig'iladi va keyin faqat o'qiladi - yangilanishda butunlay
+    yangi nusxa yaratilib, eskisi bilan almashtiriladi.
+    """
+
+    __slots__ = (
+        "version", "is_fallback", "regions", "active_regions",
+        "region_by_id", "region_by_name", "district_by_id", "districts_by_region",
+    )
+
+    def __init__(self, version: int, regions, districts, is_fallback: bool = False):
+        grouped = {}
+        for district in sorted(districts, key=lambda d: d.name):
+            grouped.setdefault(district.region_id, []).append(district)
+
+        ordered_regions = tuple(sorted(regions, key=lambda r: r.name))
+
+        set_attr = super().__setattr__
+        set_attr("version", version)
+        set_attr("is_fallback", is_fallback)
+        set_attr("regions", ordered_regions)
+        # Tumani yo'q viloyatlar yo'lovchilar ro'yxatida ko'rinmaydi
+        set_attr("active_regions", tuple(r for r in ordered_regions if r.id in grouped))
+        set_attr("region_by_id", MappingProxyType({r.id: r for r in ordered_regions}))
+        set_attr("region_by_name", MappingProxyType({r.name: r for r in ordered_regions}))
+        set_attr("district_by_id", MappingProxyType({d.id: d for d in districts}))
+        set_attr("districts_by_region", MappingProxyType({k: tuple(v) for k, v in grouped.items()}))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Catalog o'zgarmas obyekt")
+
+    def districts_of(self, region_id: int) -> Tuple[District, ...]:
+        """Viloyatga tegishli tumanlar (nomi bo'yicha tartiblangan)"""
+        return self.districts_by_region.get(region_id, ())
+
+    def district_count(self) -> int:
+        return len(self.district_by_id)
+
+
+_catalog: Optional[Catalog] = None
+_version = 0
+_lock = asyncio.Lock()
+
+
+def _load_fallback() -> Catalog:
+    """regions.json fayldan zaxira katalog yig'ish (bazaga ulanib bo'lmaganda)"""
+    try:
+        with open("regions.json", "r", encoding="utf-8") as file:
+            fallback_data = json.load(file)
+    except Exception as json_error:
+        logging.error(f"JSON fayldan ham yuklab bo'lmadi: {json_error}")
+        return Catalog(_version, (), (), is_fallback=True)
+
+    regions, districts = [], []
+    district_id = 1
+    for region_id, (region_name, district_names) in enumerate(fallback_data.items(), 1):
+        regions.append(Region(region_id, region_name))
+        for district_name in district_names:
+            districts.append(District(district_id, district_name, region_id))
+            district_id += 1
+
+    logging.info("Fallback: JSON fayldan viloyat va tumanlar yuklandi")
+    return Catalog(_version, regions, districts, is_fallback=True)
+
+
+async def _load() -> Catalog:
+    global _catalog, _version
+
+    try:
+        region_rows, district_rows = await asyncio.gather(
+            db.region.find_many(order={"name": "asc"}),
+            db.district.find_many(order={"name": "asc"}),
+        )
+    except Exception as e:
+        logging.error(f"Viloyat va tumanlarni yuklashda xato: {e}")
+        # Zaxira katalog saqlab qo'yilmaydi - keyingi so'rovda baza qayta sinab ko'riladi
+        return _load_fallback()
+
+    _version += 1
+    catalog = Catalog(
+        _version,
+        [Region(r.id, r.name) for r in region_rows],
+        [District(d.id, d.name, d.regionId) for d in district_rows],
+    )
+    _catalog = catalog
+    logging.info(
+        f"Katalog v{catalog.version}: {len(catalog.regions)} ta viloyat va "
+        f"{catalog.district_count()} ta tuman yuklandi"
+    )
+    return catalog
+
+
+async def get_catalog() -> Catalog:
+    """Joriy katalogni qaytarish - tayyor bo'lsa bazaga murojaat qilinmaydi"""
+    catalog = _catalog
+    if catalog is not None:
+        return catalog
+
+    async with _lock:
+        # Lock kutilayotganda boshqa korutina yuklab qo'ygan bo'lishi mumkin
+        if _catalog is not None:
+            return _catalog
+        return await _load()
+
+
+async def get_order_catalog() -> Optional[Catalog]:
+    """Buyurtma wizardlari uchun katalog (ID lar callback va FSM da saqlanadi).
+
+    Zaxira katalog ID lari o'ylab topilgan - ular bazadagi tumanlarga mos
+    kelmaydi, shuning uchun baza ishlamayotganda ``None`` qaytadi.
+    """
+    catalog = await get_catalog()
+    return None if catalog.is_fallback else catalog
+
+
+async def reload_catalog() -> Catalog:
+    """Katalogni bazadan qayta yig'ib, atomar almashtirish (admin o'zgarishlaridan keyin)"""
+    async with _lock:
+        invalidate_catalog()
+        catalog = await _load()
+    # Boshqa shard ishchilari keyingi murojaatda bazadan qayta yuklaydi
+    broadcast("catalog")
+    return catalog
+
+
+@on_broadcast("catalog")
+def invalidate_catalog():
+    """Katalogni bekor qilish - keyingi murojaatda qayta yuklanadi"""
+    global _catalog
+    _catalog = None
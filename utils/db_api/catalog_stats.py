@@ -0,0 +1,96 @@
+"""Admin panel uchun viloyat/tuman ko'rsatkichlari.
+
+Tumanlar va buyurtmalar soni ``count()`` so'rovlari bilan olinadi - bog'liq
+buyurtmalar ro'yxati bazadan yuklanmaydi. Natija har bir viloyat/tuman uchun
+qisqa muddat (TTL) keshlanadi: admin sahifalar orasida yurganda bir xil
+sonlar qayta hisoblanmaydi.
+"""
+import asyncio
+import os
+import time
+from typing import Dict, NamedTuple, Tuple
+
+from dotenv import load_dotenv
+
+from loader import db
+
+load_dotenv()
+CACHE_TTL = float(os.getenv("CATALOG_STATS_TTL", 30))  # sekundlarda
+
+
+class RegionCounts(NamedTuple):
+    districts: int
+    orders_from: int
+    orders_to: int
+
+    @property
+    def orders(self) -> int:
+        return self.orders_from + self.orders_to
+
+
+class DistrictCounts(NamedTuple):
+    orders_from: int
+    orders_to: int
+
+    @property
+    def orders(self) -> int:
+        return self.orders_from + self.orders_to
+
+
+_cache: Dict[Tuple[str, int], Tuple[float, NamedTuple]] = {}
+
+
+def _cached(key: Tuple[str, int]):
+    entry = _cache.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    _cache.pop(key, None)
+    return None
+
+
+def _remember(key: Tuple[str, int], value):
+    _cache[key] = (time.monotonic() + CACHE_TTL, value)
+    return value
+
+
+def invalidate_region(region_id: int):
+    _cache.pop(("region", region_id), None)
+
+
+def invalidate_district(district_id: int):
+    _cache.pop(("district", district_id), None)
+
+
+def invalidate_all():
+    _cache.clear()
+
+
+async def region_counts(region_id: int, fresh: bool = False) -> RegionCounts:
+    """Viloyatdagi tumanlar va undan chiqqan/unga kelgan buyurtmalar soni"""
+    key = ("region", region_id)
+    if not fresh:
+        cached = _cached(key)
+        if cached is not None:
+            return cached
+
+    districts, orders_from, orders_to = await asyncio.gather(
+        db.district.count(where={"regionId": region_id}),
+        db.order.count(where={"fromRegionId": region_id}),
+        db.order.count(where={"toRegionId": region_id})
+    )
+    return _remember(key, RegionCounts(districts, orders_from, orders_to))
+
+
+async def district_counts(district_id: int, fresh: bool = False) -> DistrictCounts:
+    """Tumandan chiqqan va tumanga kelgan buyurtmalar soni"""
+    key = ("district", district_id)
+    if not fresh:
+        cached = _cached(key)
+        if cached is not None:
+            return cached
+
+    orders_from, orders_to = await asyncio.gather(
+        db.order.count(where={"fromDistrictId": district_id}),
+        db.order.count(where={"toDistrictId": district_id})
+    )
+    return _remember(key, DistrictCounts(orders_from, orders_to))
@@ -0,0 +1,72 @@
+"""Buyurtmalarning kanal posti ID lari.
+
+ID ``Order.channelMessageId`` ustunida saqlanadi (restartdan keyin ham va
+bir nechta bot nusxasi uchun ham umumiy). Oldida cheklangan hajmli
+write-through LRU kesh turadi: yozish avval bazaga, keyin keshga tushadi,
+o'qish esa odatda keshdan qaytadi.
+"""
+import logging
+import os
+from collections import OrderedDict
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from loader import db
+
+load_dotenv()
+CACHE_SIZE = int(os.getenv("CHANNEL_MESSAGE_CACHE_SIZE", 10000))
+
+_cache: "OrderedDict[int, int]" = OrderedDict()
+
+
+def _remember(order_id: int, message_id: int):
+    _cache[order_id] = message_id
+    _cache.move_to_end(order_id)
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def invalidate(order_id: int):
+    """Keshdagi yozuvni tashlash - keyingi o'qish bazadan bo'ladi"""
+    _cache.pop(order_id, None)
+
+
+async def get_channel_message_id(order_id: int, order=None) -> Optional[int]:
+    """Buyurtmaning kanal posti ID si.
+
+    ``order`` berilsa (bazadan allaqachon o'qilgan bo'lsa), qo'shimcha so'rov
+    yuborilmaydi - ustun qiymati undan olinadi.
+    """
+    message_id = _cache.get(order_id)
+    if message_id is not None:
+        _cache.move_to_end(order_id)
+        return message_id
+
+    if order is None:
+        order = await db.order.find_unique(where={"id": order_id})
+    message_id = order.channelMessageId if order else None
+
+    if message_id is not None:
+        _remember(order_id, message_id)
+    return message_id
+
+
+async def set_channel_message_id(order_id: int, message_id: int):
+    """Kanal posti ID sini bazaga va keshga yozish"""
+    try:
+        await db.order.update(where={"id": order_id}, data={"channelMessageId": message_id})
+    except Exception as e:
+        logging.error(f"Order {order_id} uchun kanal xabar ID sini saqlashda xato: {e}")
+        invalidate(order_id)
+        return
+    _remember(order_id, message_id)
+
+
+async def forget_channel_message_id(order_id: int):
+    """Kanal posti o'chirilganda ID ni bazadan va keshdan olib tashlash"""
+    invalidate(order_id)
+    try:
+        await db.order.update(where={"id": order_id}, data={"channelMessageId": None})
+    except Exception as e:
+        logging.error(f"Order {order_id} uchun kanal xabar ID sini o'chirishda xato: {e}")
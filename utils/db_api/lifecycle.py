@@ -0,0 +1,144 @@
+"""Buyurtma holatlari mashinasi (lifecycle).
+
+Ruxsat etilgan o'tishlar ``TRANSITIONS`` da bir joyda e'lon qilingan:
+
+* ``claim``    initiated -> processing (haydovchi oldi)
+* ``release``  processing -> initiated (muddati tugadi yoki bot qayta ishga tushdi)
+* ``complete`` initiated/processing -> completed
+* ``cancel``   initiated/processing -> canceled
+* ``expire``   initiated -> canceled (yo'lovchi tasdiqlamadi)
+
+Har bir o'tish bitta shartli so'rov: holat faqat manba holatlardan birida
+bo'lsa o'zgaradi va o'zgargan buyurtma (status, yo'lovchi, manzillar bilan)
+shu so'rovning o'zida qaytadi. Qator qulflanadi, shuning uchun bir vaqtda
+bosilgan ikkinchi tugma shartni qayta tekshiradi va hech narsa o'zgartirmaydi.
+Statistika hisoblagichlari shu yerda yangilanadi, qolgan qo'shimcha ishlar
+(muddat nazorati va h.k.) ``on_transition`` hooklari orqali bajariladi.
+"""
+import json
+import logging
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from prisma.models import Order
+
+from loader import db
+from utils.db_api.stats_rollup import record_transition
+
+
+class Transition(NamedTuple):
+    sources: Tuple[str, ...]
+    target: str
+
+
+TRANSITIONS: Dict[str, Transition] = {
+    "claim": Transition(("initiated",), "processing"),
+    "release": Transition(("processing",), "initiated"),
+    "complete": Transition(("initiated", "processing"), "completed"),
+    "cancel": Transition(("initiated", "processing"), "canceled"),
+    "expire": Transition(("initiated",), "canceled"),
+}
+
+# $1 - buyurtma ID lari (NULL - manba holatdagi barchasi), $2 - yangi holat, $3 - manba holatlar,
+# $4 - statusga yoziladigan foydalanuvchi (NULL - o'zgarmaydi), $5 - buyurtma turi (NULL - hammasi).
+# Vaqtlar Prisma kabi UTC (timezone bilan) qaytariladi.
+TRANSITION_SQL = """
+WITH "previous" AS (
+    SELECT s."id", s."status"::text AS "status"
+    FROM "OrderStatus" s
+    JOIN "Order" o ON o."id" = s."orderId"
+    WHERE s."status"::text = ANY($3::text[])
+      AND ($1::int[] IS NULL OR s."orderId" = ANY($1::int[]))
+      AND ($5::text IS NULL OR o."orderType"::text = $5::text)
+    FOR UPDATE OF s
+), "changed" AS (
+    UPDATE "OrderStatus" s
+    SET "status" = $2::"OrderStatusEnum",
+        "userId" = COALESCE($4::int, s."userId"),
+        "updatedAt" = NOW() AT TIME ZONE 'UTC'
+    FROM "previous" p
+    WHERE s."id" = p."id"
+    RETURNING s.*, p."status" AS "previous"
+)
+SELECT c."previous", to_jsonb(o) || jsonb_build_object(
+    'departureTime', o."departureTime" AT TIME ZONE 'UTC',
+    'createdAt', o."createdAt" AT TIME ZONE 'UTC',
+    'updatedAt', o."updatedAt" AT TIME ZONE 'UTC',
+    'status', to_jsonb(c) - 'previous',
+    'passenger', to_jsonb(p),
+    'fromRegion', to_jsonb(fr),
+    'fromDistrict', to_jsonb(fd),
+    'toRegion', to_jsonb(tr),
+    'toDistrict', to_jsonb(td)
+) AS "order"
+FROM "changed" c
+JOIN "Order" o ON o."id" = c."orderId"
+JOIN "User" p ON p."id" = o."passengerId"
+JOIN "Region" fr ON fr."id" = o."fromRegionId"
+JOIN "District" fd ON fd."id" = o."fromDistrictId"
+JOIN "Region" tr ON tr."id" = o."toRegionId"
+JOIN "District" td ON td."id" = o."toDistrictId"
+"""
+
+# (event, buyurtma, oldingi holat)
+TransitionHook = Callable[[str, Order, str], Awaitable[None]]
+
+_hooks: Dict[str, List[TransitionHook]] = defaultdict(list)
+
+
+def on_transition(*events: str):
+    """O'tishdan keyin chaqiriladigan hook (dekorator)"""
+    unknown = [event for event in events if event not in TRANSITIONS]
+    if unknown:
+        raise ValueError(f"Noma'lum o'tish: {', '.join(unknown)}")
+
+    def decorator(func: TransitionHook) -> TransitionHook:
+        for event in events:
+            _hooks[event].append(func)
+        return func
+    return decorator
+
+
+def _parse(data) -> Order:
+    return Order.model_validate(json.loads(data) if isinstance(data, str) else data)
+
+
+async def _emit(event: str, order: Order, previous: str):
+    for hook in _hooks.get(event, ()):
+        try:
+            await hook(event, order, previous)
+        except Exception as e:
+            logging.error(f"Lifecycle hook xato: {event}, Order {order.id}, Error: {e}")
+
+
+async def transition_many(event: str, order_ids: Optional[Iterable[int]] = None, user_id: Optional[int] = None,
+                          order_type: Optional[str] = None) -> List[Order]:
+    """Buyurtmalarni ``event`` bo'yicha o'tkazish; faqat haqiqatan o'zgarganlari qaytadi.
+
+    ``order_ids`` berilmasa manba holatdagi barcha (``order_type`` turidagi)
+    buyurtmalar o'tkaziladi.
+    """
+    rule = TRANSITIONS[event]
+    if order_ids is not None:
+        order_ids = list(order_ids)
+        if not order_ids:
+            return []
+
+    rows = await db.query_raw(TRANSITION_SQL, order_ids, rule.target, list(rule.sources), user_id, order_type)
+    changed = [(_parse(row["order"]), row["previous"]) for row in rows]
+
+    by_previous: Dict[str, List[int]] = defaultdict(list)
+    for order, previous in changed:
+        by_previous[previous].append(order.id)
+    for previous, ids in by_previous.items():
+        await record_transition(ids, previous, rule.target)
+
+    for order, previous in changed:
+        await _emit(event, order, previous)
+    return [order for order, _ in changed]
+
+
+async def transition(order_id: int, event: str, user_id: Optional[int] = None) -> Optional[Order]:
+    """Bitta buyurtmani o'tkazish. Holat mos kelmasa yoki buyurtma topilmasa ``None``"""
+    orders = await transition_many(event, [order_id], user_id=user_id)
+    return orders[0] if orders else None
@@ -0,0 +1,137 @@
+import logging
+from typing import Optional
+
+from aiogram import types
+from prisma.errors import RecordNotFoundError
+from prisma.models import Order
+
+from loader import db
+from utils.db_api.catalog import District
+from utils.db_api.stats_rollup import record_created
+from utils.db_api.users import invalidate_user
+
+
+def _user_defaults(tg_user: types.User) -> dict:
+    """Botda hali ro'yxatdan o'tmagan foydalanuvchi uchun boshlang'ich ma'lumotlar"""
+    return {
+        "telegramId": tg_user.id,
+        "firstName": tg_user.first_name or "",
+        "lastName": tg_user.last_name or "",
+        "username": tg_user.username,
+        "phoneNumber": "",
+        "role": "PASSENGER"
+    }
+
+
+def _nested_order(tg_user: types.User, from_district: District, to_district: District, fields: dict) -> dict:
+    """Buyurtma va uning statusini bitta nested write ko'rinishida yig'ish.
+
+    Foydalanuvchi telegramId (unique) orqali ulanadi, shuning uchun uning
+    ichki ID sini oldindan so'rab olish shart emas.
+    """
+    passenger = {"telegramId": tg_user.id}
+    data = {
+        "passenger": {"connect": passenger},
+        "fromRegion": {"connect": {"id": from_district.region_id}},
+        "fromDistrict": {"connect": {"id": from_district.id}},
+        "toRegion": {"connect": {"id": to_district.region_id}},
+        "toDistrict": {"connect": {"id": to_district.id}},
+        "status": {
+            "create": {
+                "status": "initiated",
+                "user": {"connect": passenger}
+            }
+        }
+    }
+    data.update({k: v for k, v in fields.items() if v is not None})
+    return data
+
+
+async def create_order(tg_user: types.User, from_district: District, to_district: District, **fields):
+    """Buyurtma va 'initiated' statusini bitta so'rovda yaratish.
+
+    Ro'yxatdan o'tgan foydalanuvchi uchun bu bazaga bitta murojaat (va statistika
+    hisoblagichi). Foydalanuvchi hali bazada bo'lmasa, u upsert qilinadi va
+    buyurtma qayta yaratiladi.
+    """
+    data = _nested_order(tg_user, from_district, to_district, fields)
+    include = {"passenger": True}
+
+    try:
+        order = await db.order.create(data=data, include=include)
+    except RecordNotFoundError:
+        logging.info(f"Foydalanuvchi {tg_user.id} bazada topilmadi, yangi profil yaratilmoqda")
+        await db.user.upsert(
+            where={"telegramId": tg_user.id},
+            data={"create": _user_defaults(tg_user), "update": {}}
+        )
+        invalidate_user(tg_user.id)
+        order = await db.order.create(data=data, include=include)
+
+    await record_created(order.id)
+    return order
+
+
+CLAIM_INCLUDE = {
+    "passenger": True,
+    "status": {"include": {"user": True}},
+    "fromRegion": True,
+    "fromDistrict": True,
+    "toRegion": True,
+    "toDistrict": True
+}
+
+
+async def find_claimed_order(order_id: int) -> Optional[Order]:
+    """Yutqazgan bosish uchun buyurtmaning joriy holati (kim olgani bilan)"""
+    return await db.order.find_unique(where={"id": order_id}, include=CLAIM_INCLUDE)
+
+
+HISTORY_INCLUDE = {
+    "driver": True,
+    "status": True,
+    "fromRegion": True,
+    "fromDistrict": True,
+    "toRegion": True,
+    "toDistrict": True
+}
+# createdAt bir xil bo'lsa tartib id bo'yicha aniqlanadi
+HISTORY_ORDER = [{"createdAt": "desc"}, {"id": "desc"}]
+
+
+async def count_passenger_orders(passenger_id: int) -> int:
+    return await db.order.count(where={"passengerId": passenger_id})
+
+
+async def passenger_history_page(passenger_id: int, page: int, per_page: int, total: int, cursor: dict = None,
+                                 current_page: int = None):
+    """Yo'lovchi buyurtmalarining bitta sahifasini bazadan olish (keyset pagination).
+
+    ``cursor`` - joriy sahifaning birinchi va oxirgi buyurtma ID lari
+    (``{"first": .., "last": ..}``). Qo'shni sahifalar shu kursordan boshlab
+    olinadi, shuning uchun baza oldingi qatorlarni sanab o'tirmaydi. Birinchi
+    va oxirgi sahifa kursorsiz, ro'yxat boshidan yoki oxiridan olinadi.
+    """
+    where = {"passengerId": passenger_id}
+    total_pages = max(1, (total + per_page - 1) // per_page)
+    page = max(0, min(page, total_pages - 1))
+    query = {"where": where, "include": HISTORY_INCLUDE, "order": HISTORY_ORDER}
+
+    if page == 0:
+        query.update(take=per_page)
+    elif page == total_pages - 1:
+        query.update(take=-(total - page * per_page))
+    elif cursor and current_page is not None and page > current_page:
+        query.update(cursor={"id": cursor["last"]}, skip=1 + (page - current_page - 1) * per_page, take=per_page)
+    elif cursor and current_page is not None and page < current_page:
+        query.update(cursor={"id": cursor["first"]}, skip=1 + (current_page - page - 1) * per_page, take=-per_page)
+    else:
+        query.update(skip=page * per_page, take=per_page)
+
+    orders = await db.order.find_many(**query)
+    if not orders and "cursor" in query:
+        # Kursor buyurtmasi o'chirilgan bo'lishi mumkin - oddiy offset bilan qayta urinish
+        orders = await db.order.find_many(
+            where=where, include=HISTORY_INCLUDE, order=HISTORY_ORDER, skip=page * per_page, take=per_page
+        )
+    return page, orders
@@ -0,0 +1,74 @@
+"""Admin va modul statistikasi uchun yig'ma so'rovlar.
+
+Har bir ko'rsatkich uchun alohida ``count()`` o'rniga uchta so'rov
+parallel yuboriladi: rollar bo'yicha ``group_by``, buyurtmalar jami va
+vaqt oralig'idagi sonlari (``SUM(...) FILTER``) hamda turi va holati
+bo'yicha guruhlangan statuslar. Buyurtmalar ko'rsatkichlari ``Order``
+jadvalidan emas, kunlik ``OrderStatsDaily`` hisoblagichlaridan o'qiladi
+(qarang: ``utils.db_api.stats_rollup``), shuning uchun narxi buyurtmalar
+soniga emas, kunlar soniga bog'liq. Vaqt oraliqlari kun aniqligida.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from loader import db
+
+ORDER_TYPES = ("PASSENGER", "DELIVERY")
+STATUSES = ("initiated", "processing", "completed", "canceled", "failed")
+ADMIN_ROLES = ("ADMIN", "SUPER_ADMIN")
+
+ORDER_TOTALS_SQL = """
+SELECT COALESCE(SUM("count"), 0) AS "total",
+       COALESCE(SUM("count") FILTER (WHERE "orderType" = 'PASSENGER'), 0) AS "passenger",
+       COALESCE(SUM("count") FILTER (WHERE "orderType" = 'DELIVERY'), 0) AS "delivery",
+       COALESCE(SUM("count") FILTER (WHERE "day" >= $1::date), 0) AS "today",
+       COALESCE(SUM("count") FILTER (WHERE "day" >= $2::date), 0) AS "week"
+FROM "OrderStatsDaily"
+"""
+
+STATUS_DISTRIBUTION_SQL = """
+SELECT "orderType"::text AS "orderType", "status"::text AS "status", SUM("count") AS "count"
+FROM "OrderStatsDaily"
+GROUP BY 1, 2
+"""
+
+
+async def role_distribution() -> Dict[str, int]:
+    """Har bir rol bo'yicha foydalanuvchilar soni"""
+    rows = await db.user.group_by(by=["role"], count={"_all": True})
+    return {str(row["role"]): row["_count"]["_all"] for row in rows}
+
+
+async def order_totals(now: Optional[datetime] = None) -> Dict[str, int]:
+    """Buyurtmalar jami, turlari bo'yicha, bugun va oxirgi 7 kunda"""
+    # createdAt UTC da saqlanadi, kunlar ham UTC bo'yicha
+    today = (now or datetime.utcnow()).date()
+    week_ago = today - timedelta(days=6)  # bugun bilan birga 7 kun
+    rows = await db.query_raw(ORDER_TOTALS_SQL, today.isoformat(), week_ago.isoformat())
+    return {key: int(value) for key, value in rows[0].items()}
+
+
+async def status_distribution() -> Dict[str, Dict[str, int]]:
+    """Buyurtma turi -> holat -> soni (barcha holatlar 0 bilan to'ldiriladi)"""
+    result = {order_type: dict.fromkeys(STATUSES, 0) for order_type in ORDER_TYPES}
+    for row in await db.query_raw(STATUS_DISTRIBUTION_SQL):
+        result.setdefault(row["orderType"], dict.fromkeys(STATUSES, 0))[row["status"]] = int(row["count"])
+    return result
+
+
+async def collect_statistics(now: Optional[datetime] = None) -> dict:
+    """Admin statistikasi uchun barcha ko'rsatkichlar (so'rovlar parallel)"""
+    roles, orders, statuses = await asyncio.gather(
+        role_distribution(), order_totals(now), status_distribution()
+    )
+    return {
+        "users": {
+            "total": sum(roles.values()),
+            "drivers": roles.get("DRIVER", 0),
+            "passengers": roles.get("PASSENGER", 0),
+            "admins": sum(roles.get(role, 0) for role in ADMIN_ROLES)
+        },
+        "orders": orders,
+        "statuses": statuses
+    }
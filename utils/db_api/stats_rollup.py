@@ -0,0 +1,114 @@
+"""Buyurtmalar statistikasi uchun kunlik yig'ma jadval (``OrderStatsDaily``).
+
+Har bir qator: buyurtma yaratilgan kun, turi, joriy holati va yo'nalishi
+(viloyatdan -> viloyatga) bo'yicha buyurtmalar soni. Buyurtma yaratilganda
+va har bir holat o'zgarishida tegishli hisoblagichlar bitta so'rov bilan
+o'zgartiriladi, shuning uchun statistika O(kunlar) qatordan o'qiladi.
+
+Hisoblagichlar holat o'zgarishi bilan bitta tranzaksiyada yozilmaydi -
+vaqti-vaqti bilan ishlaydigan solishtirish vazifasi jadvalni ``Order`` dan
+qayta hisoblab, farqlarni tuzatadi.
+"""
+import logging
+import os
+from typing import Dict, Iterable, Union
+
+from dotenv import load_dotenv
+
+from loader import db
+from utils.scheduler import job_handler, schedule
+
+load_dotenv()
+RECONCILE_INTERVAL = int(os.getenv("STATS_RECONCILE_INTERVAL", 3600))  # sekundlarda
+STATS_RECONCILE = "stats_reconcile"
+
+# Bir xil qatorga tushadigan o'zgarishlar oldindan yig'iladi (ON CONFLICT bir qatorni ikki marta o'zgartira olmaydi)
+CHANGE_SQL = """
+INSERT INTO "OrderStatsDaily" ("day", "orderType", "status", "fromRegionId", "toRegionId", "count")
+SELECT o."createdAt"::date, o."orderType", c."status"::"OrderStatusEnum", o."fromRegionId", o."toRegionId",
+       SUM(c."delta")
+FROM "Order" o
+CROSS JOIN unnest($2::text[], $3::int[]) AS c("status", "delta")
+WHERE o."id" = ANY($1::int[])
+GROUP BY 1, 2, 3, 4, 5
+ON CONFLICT ("day", "orderType", "status", "fromRegionId", "toRegionId")
+DO UPDATE SET "count" = "OrderStatsDaily"."count" + excluded."count"
+"""
+
+RECONCILE_SQL = """
+WITH "fresh" AS (
+    SELECT o."createdAt"::date AS "day", o."orderType",
+           COALESCE(s."status", 'initiated'::"OrderStatusEnum") AS "status",
+           o."fromRegionId", o."toRegionId", COUNT(*)::int AS "count"
+    FROM "Order" o
+    LEFT JOIN "OrderStatus" s ON s."orderId" = o."id"
+    GROUP BY 1, 2, 3, 4, 5
+), "removed" AS (
+    DELETE FROM "OrderStatsDaily" r
+    WHERE NOT EXISTS (
+        SELECT 1 FROM "fresh" f
+        WHERE f."day" = r."day" AND f."orderType" = r."orderType" AND f."status" = r."status"
+          AND f."fromRegionId" = r."fromRegionId" AND f."toRegionId" = r."toRegionId"
+    )
+    RETURNING 1
+), "fixed" AS (
+    INSERT INTO "OrderStatsDaily" ("day", "orderType", "status", "fromRegionId", "toRegionId", "count")
+    SELECT * FROM "fresh"
+    ON CONFLICT ("day", "orderType", "status", "fromRegionId", "toRegionId")
+    DO UPDATE SET "count" = excluded."count"
+    WHERE "OrderStatsDaily"."count" <> excluded."count"
+    RETURNING 1
+)
+SELECT (SELECT COUNT(*) FROM "removed") AS "removed", (SELECT COUNT(*) FROM "fixed") AS "fixed"
+"""
+
+OrderIds = Union[int, Iterable[int]]
+
+
+async def _apply(order_ids: OrderIds, deltas: Dict[str, int]):
+    order_ids = [order_ids] if isinstance(order_ids, int) else list(order_ids)
+    if not order_ids:
+        return
+    try:
+        await db.execute_raw(CHANGE_SQL, order_ids, list(deltas), list(deltas.values()))
+    except Exception as e:
+        # Statistika xatosi buyurtma jarayonini to'xtatmasligi kerak - farqni solishtirish vazifasi tuzatadi
+        logging.error(f"Statistika hisoblagichlarini yangilashda xato: {order_ids}, {e}")
+
+
+async def record_created(order_ids: OrderIds):
+    """Yangi buyurtma(lar) - 'initiated' hisoblagichi +1"""
+    await _apply(order_ids, {"initiated": 1})
+
+
+async def record_transition(order_ids: OrderIds, old_status: str, new_status: str):
+    """Buyurtma(lar) holati o'zgardi - eski holat -1, yangisi +1"""
+    if old_status != new_status:
+        await _apply(order_ids, {old_status: -1, new_status: 1})
+
+
+@job_handler(STATS_RECONCILE)
+async def reconcile_rollup():
+    """Yig'ma jadvalni Order/OrderStatus bilan solishtirib tuzatish va keyingi tekshiruvni rejalashtirish"""
+    # Keyingi tekshiruv oldindan qo'yiladi - xato bo'lsa ham zanjir uzilmaydi
+    await _schedule_once(RECONCILE_INTERVAL, ["pending"])
+    try:
+        rows = await db.query_raw(RECONCILE_SQL)
+    except Exception as e:
+        logging.error(f"Statistika jadvalini solishtirishda xato: {e}")
+        return
+    removed, fixed = int(rows[0]["removed"]), int(rows[0]["fixed"])
+    if removed or fixed:
+        logging.warning(f"Statistika jadvali tuzatildi: {fixed} ta qator yangilandi, {removed} ta o'chirildi")
+
+
+async def _schedule_once(delay: float, statuses):
+    # Bir nechta nusxa yoki qayta olingan vazifa ikkinchi zanjirni boshlamasligi uchun
+    queued = await db.job.find_first(where={"kind": STATS_RECONCILE, "status": {"in": statuses}})
+    if queued is None:
+        await schedule(STATS_RECONCILE, delay)
+
+
+async def schedule_reconciliation():
+    """Solishtirish vazifasi navbatda bo'lmasa, darhol rejalashtirish (startupda chaqiriladi)"""
+    await _schedule_once(0, ["pending", "running"])
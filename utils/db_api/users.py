@@ -0,0 +1,119 @@
+"""Foydalanuvchilar repozitoriyasi (Telegram ID bo'yicha).
+
+Deyarli har bir handler foydalanuvchining kimligi va rolini bilishi kerak.
+Yozuvlar ixcham ``UserRecord`` ko'rinishida cheklangan hajmli LRU keshda
+TTL bilan saqlanadi, shuning uchun ko'p updatelar bazaga murojaat qilmaydi.
+Ro'yxatdan o'tmagan foydalanuvchi ham (``None``) keshlanadi.
+
+Foydalanuvchi ma'lumotlarini o'zgartiradigan joylar ``update_user`` /
+``create_user`` dan foydalanadi yoki ``invalidate_user`` ni chaqiradi.
+"""
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple, Union
+
+from dotenv import load_dotenv
+
+from loader import db
+
+load_dotenv()
+CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 300))  # sekundlarda
+
+ADMIN_ROLES = ("ADMIN", "SUPER_ADMIN")
+
+TelegramId = Union[int, str]
+
+
+class UserRecord(NamedTuple):
+    """``User`` modelining handlerlarga kerakli maydonlari (nomlari model bilan bir xil)"""
+    id: int
+    telegramId: int
+    firstName: str
+    lastName: str
+    phoneNumber: str
+    username: Optional[str]
+    role: str
+    createdAt: datetime
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role in ADMIN_ROLES
+
+
+_cache: "OrderedDict[int, Tuple[float, Optional[UserRecord]]]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _record(user) -> Optional[UserRecord]:
+    if user is None:
+        return None
+    return UserRecord(
+        id=user.id,
+        telegramId=int(user.telegramId),
+        firstName=user.firstName,
+        lastName=user.lastName,
+        phoneNumber=user.phoneNumber,
+        username=user.username,
+        role=str(user.role),
+        createdAt=user.createdAt
+    )
+
+
+def _remember(telegram_id: int, record: Optional[UserRecord]) -> Optional[UserRecord]:
+    _cache[telegram_id] = (time.monotonic() + CACHE_TTL, record)
+    _cache.move_to_end(telegram_id)
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+        _stats["evictions"] += 1
+    return record
+
+
+def invalidate_user(telegram_id: TelegramId):
+    """Keshdagi yozuvni tashlash - keyingi so'rov bazadan o'qiladi"""
+    _cache.pop(int(telegram_id), None)
+
+
+def cache_stats() -> dict:
+    """Kesh hisoblagichlari (hits, misses, evictions, size, hit_rate)"""
+    total = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "size": len(_cache),
+        "hit_rate": _stats["hits"] / total if total else 0.0
+    }
+
+
+async def get_user(telegram_id: TelegramId) -> Optional[UserRecord]:
+    """Foydalanuvchi yozuvi (ro'yxatdan o'tmagan bo'lsa ``None``)"""
+    telegram_id = int(telegram_id)
+    entry = _cache.get(telegram_id)
+    if entry is not None and entry[0] > time.monotonic():
+        _cache.move_to_end(telegram_id)
+        _stats["hits"] += 1
+        return entry[1]
+
+    _stats["misses"] += 1
+    user = await db.user.find_unique(where={"telegramId": telegram_id})
+    return _remember(telegram_id, _record(user))
+
+
+async def create_user(data: dict) -> UserRecord:
+    user = await db.user.create(data=data)
+    return _remember(int(user.telegramId), _record(user))
+
+
+async def update_user(telegram_id: TelegramId, **data) -> UserRecord:
+    """Foydalanuvchini yangilash va keshga yangi qiymatni yozish"""
+    telegram_id = int(telegram_id)
+    try:
+        user = await db.user.update(where={"telegramId": telegram_id}, data=data)
+    except Exception:
+        invalidate_user(telegram_id)
+        raise
+    if user is None:
+        invalidate_user(telegram_id)
+        return None
+    return _remember(telegram_id, _record(user))
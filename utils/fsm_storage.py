@@ -0,0 +1,253 @@
+"""SQLite asosidagi doimiy FSM storage (aiogram ``BaseStorage``).
+
+Holat va ma'lumotlar diskda saqlanadi, shuning uchun bot qayta ishga
+tushganda yarim qolgan wizardlar yo'qolmaydi. Oldida cheklangan hajmli LRU
+"issiq" qatlam turadi: har bir wizard qadamida bir necha marta chaqiriladigan
+``get_state``/``get_data`` odatda xotiradan javob beradi. Yozuvlar darhol
+xotiraga tushadi va ``FLUSH_DELAY`` ichida yig'ilgan o'zgarishlar bitta
+tranzaksiyada diskka yoziladi.
+
+Har bir yozuvning muddati (TTL) bor - tashlab ketilgan wizardlar o'z-o'zidan
+o'chadi. Throttling bucketlari faqat xotirada saqlanadi.
+"""
+import asyncio
+import copy
+import logging
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from aiogram.dispatcher.storage import BaseStorage
+
+PURGE_EVERY = 1000  # shuncha yozuvdan keyin muddati o'tganlar diskdan tozalanadi
+FLUSH_DELAY = 0.05  # o'zgarishlar diskka yozilguncha eng ko'p kutish (sekundlarda)
+
+Key = Tuple[str, str]
+
+
+class _Record:
+    __slots__ = ("state", "data", "expires")
+
+    def __init__(self, state=None, data=None, expires=0.0):
+        self.state = state
+        self.data = data if data is not None else {}
+        self.expires = expires
+
+    def is_empty(self) -> bool:
+        return self.state is None and not self.data
+
+
+class SQLiteStorage(BaseStorage):
+    """SQLite + LRU kesh asosidagi FSM storage"""
+
+    def __init__(self, path: str = "fsm_storage.sqlite3", ttl: int = 86400, cache_size: int = 10000):
+        self._path = path
+        self._ttl = ttl
+        self._cache_size = cache_size
+        # Barcha disk amallari bitta oqimda - yozuvlar tartibi saqlanadi
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fsm-sqlite")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._hot: "OrderedDict[Key, _Record]" = OrderedDict()
+        self._buckets: "OrderedDict[Key, Dict]" = OrderedDict()
+        # Diskka hali yozilmagan va hozir yozilayotgan yozuvlar (keshdan chiqib ketsa ham yo'qolmaydi)
+        self._pending: Dict[Key, _Record] = {}
+        self._flushing: Dict[Key, _Record] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._writes = 0
+
+    # --- disk (ishchi oqimda bajariladi) ---
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fsm ("
+                "chat TEXT NOT NULL, user TEXT NOT NULL, state TEXT, data BLOB, expires REAL NOT NULL, "
+                "PRIMARY KEY (chat, user))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS fsm_expires ON fsm (expires)")
+            self._conn = conn
+        return self._conn
+
+    def _select(self, key: Key):
+        return self._db().execute(
+            "SELECT state, data, expires FROM fsm WHERE chat = ? AND user = ?", key
+        ).fetchone()
+
+    def _write_batch(self, upserts, deletes, purge_before: Optional[float]):
+        conn = self._db()
+        with conn:
+            conn.execute("BEGIN")
+            if upserts:
+                conn.executemany(
+                    "INSERT INTO fsm (chat, user, state, data, expires) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (chat, user) DO UPDATE SET "
+                    "state = excluded.state, data = excluded.data, expires = excluded.expires",
+                    upserts
+                )
+            if deletes:
+                conn.executemany("DELETE FROM fsm WHERE chat = ? AND user = ?", deletes)
+            if purge_before is not None:
+                conn.execute("DELETE FROM fsm WHERE expires < ?", (purge_before,))
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    # --- issiq qatlam ---
+
+    def _key(self, chat, user) -> Key:
+        chat, user = self.check_address(chat=chat, user=user)
+        return str(chat), str(user)
+
+    def _remember(self, key: Key, record: _Record):
+        self._hot[key] = record
+        self._hot.move_to_end(key)
+        while len(self._hot) > self._cache_size:
+            self._hot.popitem(last=False)
+
+    async def _load(self, key: Key) -> _Record:
+        now = time.time()
+        record = self._hot.get(key) or self._pending.get(key) or self._flushing.get(key)
+        if record is not None and (record.is_empty() or record.expires >= now):
+            self._remember(key, record)
+            return record
+
+        if record is None:
+            row = await self._run(self._select, key)
+            # Kutish davomida boshqa korutina yuklab qo'ygan yoki yozgan bo'lishi mumkin
+            record = self._hot.get(key) or self._pending.get(key) or self._flushing.get(key)
+            if record is None and row is not None and row[2] >= now:
+                record = _Record(row[0], pickle.loads(row[1]), row[2])
+
+        if record is None or (not record.is_empty() and record.expires < now):
+            # Yo'q yoki muddati o'tgan - bo'sh yozuv ham keshlanadi, keyingi safar diskka murojaat qilinmaydi
+            record = _Record()
+        self._remember(key, record)
+        return record
+
+    async def _store(self, key: Key, record: _Record):
+        record.expires = 0.0 if record.is_empty() else time.time() + self._ttl
+        self._remember(key, record)
+        self._pending[key] = record
+        self._writes += 1
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(FLUSH_DELAY)
+        try:
+            await self._flush()
+        except Exception as e:
+            logging.error(f"FSM storage diskka yozishda xato: {e}")
+
+    async def _flush(self):
+        """Yig'ilgan o'zgarishlarni bitta tranzaksiyada diskka yozish"""
+        if not self._pending:
+            return
+        self._flushing, self._pending = self._pending, {}
+
+        upserts, deletes = [], []
+        for key, record in self._flushing.items():
+            if record.is_empty():
+                deletes.append(key)
+            else:
+                data = pickle.dumps(record.data, protocol=pickle.HIGHEST_PROTOCOL)
+                upserts.append((*key, record.state, data, record.expires))
+
+        purge_before = None
+        if self._writes >= PURGE_EVERY:
+            self._writes = 0
+            purge_before = time.time()
+
+        try:
+            await self._run(self._write_batch, upserts, deletes, purge_before)
+        except Exception:
+            # Yozilmagan yozuvlar keyingi flush uchun qaytariladi (yangiroq qiymat bo'lsa, o'sha qoladi)
+            for key, record in self._flushing.items():
+                self._pending.setdefault(key, record)
+            raise
+        finally:
+            self._flushing = {}
+
+    # --- BaseStorage ---
+
+    async def close(self):
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self._flush()
+        self._hot.clear()
+        self._buckets.clear()
+        await self._run(self._close)
+        self._executor.shutdown(wait=False)
+
+    async def wait_closed(self):
+        return True
+
+    async def get_state(self, *, chat=None, user=None, default: Optional[str] = None) -> Optional[str]:
+        record = await self._load(self._key(chat, user))
+        if record.state is None:
+            return self.resolve_state(default)
+        return record.state
+
+    async def get_data(self, *, chat=None, user=None, default: Optional[Dict] = None) -> Dict:
+        record = await self._load(self._key(chat, user))
+        if not record.data and default is not None:
+            return copy.deepcopy(default)
+        return copy.deepcopy(record.data)
+
+    async def set_state(self, *, chat=None, user=None, state=None):
+        key = self._key(chat, user)
+        record = await self._load(key)
+        record = _Record(self.resolve_state(state), record.data)
+        await self._store(key, record)
+
+    async def set_data(self, *, chat=None, user=None, data: Dict = None):
+        key = self._key(chat, user)
+        record = await self._load(key)
+        record = _Record(record.state, copy.deepcopy(data) if data else {})
+        await self._store(key, record)
+
+    async def update_data(self, *, chat=None, user=None, data: Dict = None, **kwargs):
+        key = self._key(chat, user)
+        record = await self._load(key)
+        merged = copy.deepcopy(record.data)
+        merged.update(copy.deepcopy(data) if data else {}, **kwargs)
+        await self._store(key, _Record(record.state, merged))
+
+    async def reset_state(self, *, chat=None, user=None, with_data: bool = True):
+        key = self._key(chat, user)
+        record = await self._load(key)
+        # Holat va ma'lumotlar bitta yozuvda tozalanadi
+        await self._store(key, _Record(None, {} if with_data else record.data))
+
+    def has_bucket(self):
+        return True
+
+    async def get_bucket(self, *, chat=None, user=None, default: Optional[dict] = None) -> Dict:
+        bucket = self._buckets.get(self._key(chat, user))
+        if bucket is None:
+            return copy.deepcopy(default) if default is not None else {}
+        return copy.deepcopy(bucket)
+
+    async def set_bucket(self, *, chat=None, user=None, bucket: Dict = None):
+        key = self._key(chat, user)
+        self._buckets[key] = copy.deepcopy(bucket) if bucket else {}
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self._cache_size:
+            self._buckets.popitem(last=False)
+
+    async def update_bucket(self, *, chat=None, user=None, bucket: Dict = None, **kwargs):
+        merged = await self.get_bucket(chat=chat, user=user)
+        merged.update(bucket or {}, **kwargs)
+        await self.set_bucket(chat=chat, user=user, bucket=merged)
@@ -0,0 +1,115 @@
+"""Haydovchilar kanaliga a'zolik keshi.
+
+Buyurtmani olish tugmasi har bosilganda ``get_chat_member`` chaqirilmaydi:
+
+* yangi yozuv (``MEMBERSHIP_TTL`` ichida) darhol keshdan qaytadi;
+* eskirgan, lekin ``MEMBERSHIP_STALE_TTL`` dan oshmagan a'zolik ham darhol
+  qaytadi, Bot API dan yangilash esa fonda bitta so'rov bilan bajariladi
+  (stale-while-revalidate);
+* a'zo bo'lmagan holat qisqa muddat (``MEMBERSHIP_NEGATIVE_TTL``)
+  saqlanadi - obuna bo'lgan haydovchi uzoq kutib qolmasligi uchun.
+
+Bot kanal admini bo'lsa, ``chat_member`` updatelari keshni darhol yangilaydi.
+Bir foydalanuvchi uchun bir vaqtda faqat bitta Bot API so'rovi bajariladi.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from loader import bot
+
+load_dotenv()
+CHANNEL_ID = int(os.getenv("CHANNEL_ID", 0))
+FRESH_TTL = float(os.getenv("MEMBERSHIP_TTL", 300))
+STALE_TTL = float(os.getenv("MEMBERSHIP_STALE_TTL", 3600))
+NEGATIVE_TTL = float(os.getenv("MEMBERSHIP_NEGATIVE_TTL", 30))
+CACHE_SIZE = 10000
+
+MEMBER_STATUSES = ("member", "administrator", "creator")
+NOT_MEMBER_STATUSES = ("left", "kicked", "restricted")
+
+_cache: "OrderedDict[int, Tuple[str, float]]" = OrderedDict()
+_inflight: Dict[int, asyncio.Future] = {}
+_stats = {"hits": 0, "stale": 0, "misses": 0, "updates": 0}
+
+
+def _remember(user_id: int, status: str):
+    _cache[user_id] = (status, time.monotonic())
+    _cache.move_to_end(user_id)
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def _fetch(user_id: int) -> asyncio.Future:
+    """Bot API dan holatni olish (bir foydalanuvchi uchun bitta umumiy so'rov)"""
+    future = _inflight.get(user_id)
+    if future is not None:
+        return future
+
+    async def fetch() -> str:
+        try:
+            member = await bot.get_chat_member(chat_id=CHANNEL_ID, user_id=user_id)
+            _remember(user_id, member.status)
+            return member.status
+        finally:
+            _inflight.pop(user_id, None)
+
+    future = asyncio.ensure_future(fetch())
+    _inflight[user_id] = future
+    return future
+
+
+def _log_failure(user_id: int, future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        logging.warning(f"Kanal a'zoligini yangilashda xato: {user_id}, {future.exception()}")
+
+
+def _revalidate(user_id: int):
+    # Fondagi xato eskirgan qiymatni o'chirmaydi, faqat logga yoziladi
+    _fetch(user_id).add_done_callback(partial(_log_failure, user_id))
+
+
+async def get_member_status(user_id: int, fresh: bool = False) -> str:
+    """Foydalanuvchining kanaldagi holati (member, left, kicked, ...)"""
+    entry = None if fresh else _cache.get(user_id)
+    if entry is not None:
+        status, fetched_at = entry
+        age = time.monotonic() - fetched_at
+        is_member = status in MEMBER_STATUSES
+        if age < (FRESH_TTL if is_member else NEGATIVE_TTL):
+            _stats["hits"] += 1
+            return status
+        if is_member and age < STALE_TTL:
+            _stats["stale"] += 1
+            _revalidate(user_id)
+            return status
+
+    _stats["misses"] += 1
+    return await _fetch(user_id)
+
+
+async def is_channel_member(user_id: int, fresh: bool = False) -> bool:
+    return await get_member_status(user_id, fresh) in MEMBER_STATUSES
+
+
+def update_member_status(user_id: int, status: str):
+    """``chat_member`` updatesidan kelgan yangi holatni yozish"""
+    _stats["updates"] += 1
+    _remember(user_id, status)
+
+
+def forget_member(user_id: Optional[int] = None):
+    if user_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(user_id, None)
+
+
+def cache_stats() -> dict:
+    return {**_stats, "size": len(_cache)}
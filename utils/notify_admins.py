@@ -1,10 +1,124 @@
+"""Adminlarga xabar yuborish.
+
+Adminlar ro'yxati (roster) xotirada keshlanadi va rol o'zgarganda
+``invalidate_admin_roster()`` bilan yangilanadi. ``notify_admins`` xabarni
+fonda, cheklangan parallellik bilan tarqatadi - chaqirgan handler kutmaydi.
+Har bir admin uchun natija ``recent_deliveries()`` orqali ko'rish uchun
+saqlanadi.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from typing import List, NamedTuple, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
 from data.config import OWNER_ID
+from loader import db
+from utils import outbox
+from utils.outbox import Priority
+from utils.sharding import broadcast, on_broadcast
+
+load_dotenv()
+ROSTER_TTL = float(os.getenv("ADMIN_ROSTER_TTL", 600))  # rol o'zgarishini o'tkazib yuborsak ham eskirmasligi uchun
+FANOUT_CONCURRENCY = int(os.getenv("ADMIN_NOTIFY_CONCURRENCY", 5))
+DELIVERY_LOG_SIZE = 500
+
+ADMIN_ROLES = ["ADMIN", "SUPER_ADMIN"]
+
+
+class Delivery(NamedTuple):
+    notification_id: int
+    admin_id: int
+    ok: bool
+    error: Optional[str]
+    sent_at: float
+
+
+_roster: Optional[Tuple[int, ...]] = None
+_roster_expires = 0.0
+_roster_lock = asyncio.Lock()
+_deliveries: "deque[Delivery]" = deque(maxlen=DELIVERY_LOG_SIZE)
+_tasks: Set[asyncio.Task] = set()
+_ids = itertools.count(1)
+
+
+@on_broadcast("admin_roster")
+def _forget_roster():
+    global _roster
+    _roster = None
+
+
+def invalidate_admin_roster():
+    """Rol o'zgarganda chaqiriladi - keyingi xabar ro'yxatni bazadan qayta oladi"""
+    _forget_roster()
+    broadcast("admin_roster")
+
+
+async def get_admin_ids() -> Tuple[int, ...]:
+    """ADMIN va SUPER_ADMIN rolidagi foydalanuvchilarning telegram ID lari"""
+    global _roster, _roster_expires
+    async with _roster_lock:
+        if _roster is None or _roster_expires < time.monotonic():
+            admins = await db.user.find_many(where={"role": {"in": ADMIN_ROLES}})
+            _roster = tuple(int(admin.telegramId) for admin in admins)
+            _roster_expires = time.monotonic() + ROSTER_TTL
+        return _roster
+
+
+async def _deliver(notification_id: int, admin_id: int, message_text: str, semaphore: asyncio.Semaphore):
+    async with semaphore:
+        try:
+            await outbox.send_message(admin_id, message_text, priority=Priority.BULK, parse_mode="HTML")
+        except Exception as e:
+            logging.error(f"Admin {admin_id} ga xabar yuborishda xato: {e}")
+            _deliveries.append(Delivery(notification_id, admin_id, False, str(e), time.time()))
+        else:
+            _deliveries.append(Delivery(notification_id, admin_id, True, None, time.time()))
+
+
+async def _fan_out(notification_id: int, message_text: str, exclude_user_id: Optional[int]):
+    try:
+        admin_ids = await get_admin_ids()
+    except Exception as e:
+        logging.error(f"Adminlarni olishda xato: {e}")
+        return
+
+    semaphore = asyncio.Semaphore(FANOUT_CONCURRENCY)
+    await asyncio.gather(*(
+        _deliver(notification_id, admin_id, message_text, semaphore)
+        for admin_id in admin_ids if admin_id != exclude_user_id
+    ))
+
+
+async def notify_admins(message_text: str, exclude_user_id: int = None) -> int:
+    """Barcha adminlarga xabarni fonda yuborish. Natijalarni topish uchun xabar ID sini qaytaradi"""
+    notification_id = next(_ids)
+    task = asyncio.create_task(_fan_out(notification_id, message_text, exclude_user_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return notification_id
+
+
+def recent_deliveries(notification_id: Optional[int] = None) -> List[Delivery]:
+    """Oxirgi yuborishlar natijalari (berilsa, faqat bitta xabar uchun)"""
+    if notification_id is None:
+        return list(_deliveries)
+    return [d for d in _deliveries if d.notification_id == notification_id]
+
+
+async def wait_notifications(timeout: float = 10):
+    """Fondagi tarqatishlarni tugashini kutish (bot o'chirilayotganda)"""
+    if _tasks:
+        await asyncio.wait(set(_tasks), timeout=timeout)
 
 
 async def on_startup_notify(dp):
     for owner in OWNER_ID:
         try:
-            await dp.bot.send_message(owner, "Bot ishga tushdi")
+            await outbox.send_message(owner, "Bot ishga tushdi", priority=Priority.BULK)
         except Exception as e:
             print(f"[XATO] Admin ID: {owner} uchun xabar yuborilmadi. Sabab: {e}")
-
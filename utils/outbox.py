@@ -0,0 +1,231 @@
+"""Telegramga chiquvchi so'rovlar navbati (rate limit bilan).
+
+Barcha kanal postlari, eslatmalar va admin xabarlari shu navbat orqali
+yuboriladi. Token bucketlar:
+
+* umumiy - sekundiga ~30 ta xabar (Telegram bot limiti);
+* har bir shaxsiy chat - sekundiga ~1 ta;
+* kanal va guruhlar - daqiqasiga ~20 ta.
+
+Navbat ustuvorlik bo'yicha ishlaydi: kanal postlari va haydovchi band
+qilgan buyurtmalar eslatmalar va admin xabarlaridan oldin ketadi.
+``RetryAfter`` kelsa, o'sha chat ko'rsatilgan vaqtga to'xtatiladi va
+so'rov qayta navbatga qo'yiladi - xabar yo'qolmaydi. Bitta chatga bir
+vaqtda faqat bitta so'rov yuboriladi, shuning uchun (masalan, bitta postning
+ketma-ket tahrirlari) Telegramga navbat tartibida yetib boradi.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import time
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from aiogram.utils.exceptions import RetryAfter
+from dotenv import load_dotenv
+
+from loader import bot
+
+load_dotenv()
+GLOBAL_RATE = float(os.getenv("OUTBOX_GLOBAL_RATE", 30))  # sekundiga
+CHAT_RATE = float(os.getenv("OUTBOX_CHAT_RATE", 1))  # sekundiga, shaxsiy chat
+GROUP_RATE = float(os.getenv("OUTBOX_GROUP_PER_MINUTE", 20)) / 60  # kanal/guruh
+CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", 8))  # bir vaqtda ochiq so'rovlar
+MAX_RETRIES = 5
+MAX_BUCKETS = 10000
+
+
+class Priority(IntEnum):
+    CHANNEL = 0   # kanal postlari va haydovchi band qilgan buyurtmalar
+    USER = 1      # foydalanuvchiga bevosita javoblar
+    REMINDER = 2  # eslatmalar, avtomatik bekor qilish xabarlari
+    BULK = 3      # admin xabarlari va ommaviy yuborishlar
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Keyingi token uchun kutish vaqti (0 - hozir bor)"""
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def is_full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+
+class _Request:
+    __slots__ = ("chat_id", "call", "future", "priority", "seq", "attempts")
+
+    def __init__(self, chat_id, call, future, priority, seq):
+        self.chat_id = chat_id
+        self.call = call
+        self.future = future
+        self.priority = priority
+        self.seq = seq
+        self.attempts = 0
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class Outbox:
+    def __init__(self):
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._counter = itertools.count()
+        self._global = TokenBucket(GLOBAL_RATE, GLOBAL_RATE)
+        self._chats: Dict[Any, TokenBucket] = {}
+        self._paused: Dict[Any, float] = {}
+        # Limiti tugagan chatlarning so'rovlari (tartibi saqlanadi)
+        self._parked: Dict[Any, List[_Request]] = {}
+        # So'rovi hali tugamagan chatlar va ularning keyingi so'rovlari
+        self._busy: Set[Any] = set()
+        self._waiting: Dict[Any, List[_Request]] = {}
+        self._inflight: Optional[asyncio.Semaphore] = None
+
+    def _bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= MAX_BUCKETS:
+                # To'lib turgan (uzoq vaqt ishlatilmagan) bucketlarni tashlash
+                self._chats = {k: b for k, b in self._chats.items() if not b.is_full()}
+            if isinstance(chat_id, int) and chat_id < 0:
+                bucket = TokenBucket(GROUP_RATE, 3)
+            else:
+                bucket = TokenBucket(CHAT_RATE, 3)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _put(self, request: _Request):
+        self._queue.put_nowait(request)
+
+    def _park(self, request: _Request, wait: float):
+        parked = self._parked.get(request.chat_id)
+        if parked is None:
+            self._parked[request.chat_id] = [request]
+            asyncio.get_running_loop().call_later(wait, self._unpark, request.chat_id)
+        else:
+            parked.append(request)
+
+    def _unpark(self, chat_id):
+        for request in self._parked.pop(chat_id, ()):
+            self._put(request)
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            self._inflight = asyncio.Semaphore(CONCURRENCY)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            request = await self._queue.get()
+
+            # Chat to'xtatilgan yoki uning limiti tugagan - boshqa chatlarni to'sib qo'ymaslik uchun chetga olinadi
+            if request.chat_id in self._parked:
+                self._parked[request.chat_id].append(request)
+                continue
+            if request.chat_id in self._busy:
+                self._waiting.setdefault(request.chat_id, []).append(request)
+                continue
+            wait = max(self._paused.get(request.chat_id, 0) - time.monotonic(), self._bucket(request.chat_id).delay())
+            if wait > 0:
+                self._park(request, wait)
+                continue
+
+            global_wait = self._global.delay()
+            if global_wait > 0:
+                await asyncio.sleep(global_wait)
+
+            self._global.take()
+            self._bucket(request.chat_id).take()
+            await self._inflight.acquire()
+            self._busy.add(request.chat_id)
+            asyncio.create_task(self._execute(request))
+
+    async def _execute(self, request: _Request):
+        try:
+            result = await request.call()
+        except RetryAfter as e:
+            request.attempts += 1
+            if request.attempts > MAX_RETRIES:
+                if not request.future.done():
+                    request.future.set_exception(e)
+                return
+            logging.warning(f"Chat {request.chat_id}: flood limit, {e.timeout} sekunddan keyin qayta yuboriladi")
+            self._paused[request.chat_id] = time.monotonic() + e.timeout
+            self._put(request)
+        except Exception as e:
+            if not request.future.done():
+                request.future.set_exception(e)
+        else:
+            if not request.future.done():
+                request.future.set_result(result)
+        finally:
+            self._inflight.release()
+            self._busy.discard(request.chat_id)
+            for waiting in self._waiting.pop(request.chat_id, ()):
+                self._put(waiting)
+
+    def submit(self, chat_id, call: Callable[[], Awaitable], priority: int = Priority.USER) -> asyncio.Future:
+        """So'rovni navbatga qo'yish. Natija (yoki xato) Future orqali qaytadi"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self._put(_Request(chat_id, call, future, priority, next(self._counter)))
+        return future
+
+    async def stop(self, timeout: float = 5):
+        """Navbatdagi so'rovlarni yuborishga vaqt berib, workerni to'xtatish"""
+        if self._worker is None:
+            return
+        deadline = time.monotonic() + timeout
+        while (not self._queue.empty() or self._parked or self._busy) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+
+_outbox = Outbox()
+
+
+async def stop_outbox():
+    await _outbox.stop()
+
+
+async def send_message(chat_id, text, priority: int = Priority.USER, **kwargs):
+    return await _outbox.submit(chat_id, lambda: bot.send_message(chat_id, text, **kwargs), priority)
+
+
+async def edit_message_text(chat_id, message_id, text, priority: int = Priority.USER, **kwargs):
+    return await _outbox.submit(
+        chat_id,
+        lambda: bot.edit_message_text(text, chat_id=chat_id, message_id=message_id, **kwargs),
+        priority
+    )
+
+
+async def delete_message(chat_id, message_id, priority: int = Priority.USER):
+    return await _outbox.submit(chat_id, lambda: bot.delete_message(chat_id=chat_id, message_id=message_id), priority)
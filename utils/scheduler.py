@@ -0,0 +1,156 @@
+"""Bazada saqlanadigan (restartdan omon qoladigan) vazifalar rejalashtiruvchisi.
+
+Har bir vazifa ``Job`` jadvalida bitta qator: turi (kind), parametrlari
+(payload) va bajarilish vaqti (runAt). Bitta poller muddati kelgan
+vazifalarni ``FOR UPDATE SKIP LOCKED`` bilan partiyalab band qiladi va
+ro'yxatdan o'tgan handlerlarga uzatadi. Xotirada faqat joriy partiya turadi.
+"""
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+from prisma import Json
+
+from loader import db
+
+load_dotenv()
+POLL_INTERVAL = float(os.getenv("SCHEDULER_POLL_INTERVAL", 5))
+BATCH_SIZE = int(os.getenv("SCHEDULER_BATCH_SIZE", 50))
+MAX_ATTEMPTS = int(os.getenv("SCHEDULER_MAX_ATTEMPTS", 3))
+# Shu vaqtdan ortiq "running" holatida qolgan vazifa (masalan, jarayon o'chib qolgan) qayta olinadi
+LOCK_TIMEOUT = int(os.getenv("SCHEDULER_LOCK_TIMEOUT", 300))
+RETRY_DELAY = 30
+
+JobHandler = Callable[..., Awaitable[None]]
+
+_handlers: Dict[str, JobHandler] = {}
+_poller: Optional[asyncio.Task] = None
+
+# Muddati kelgan vazifalarni band qilish. Bir nechta bot nusxasi bir vaqtda
+# ishlasa ham SKIP LOCKED tufayli bitta vazifa faqat bittasiga tushadi.
+CLAIM_SQL = """
+UPDATE "Job"
+SET "status" = 'running'::"JobStatus",
+    "attempts" = "attempts" + 1,
+    "lockedAt" = NOW() AT TIME ZONE 'UTC',
+    "updatedAt" = NOW() AT TIME ZONE 'UTC'
+WHERE "id" IN (
+    SELECT "id" FROM "Job"
+    WHERE ("status" = 'pending' AND "runAt" <= NOW() AT TIME ZONE 'UTC')
+       OR ("status" = 'running' AND "lockedAt" < NOW() AT TIME ZONE 'UTC' - make_interval(secs => $2))
+    ORDER BY "runAt"
+    LIMIT $1
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING "id", "kind", "payload", "attempts"
+"""
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def job_handler(kind: str):
+    """Vazifa turi uchun handlerni ro'yxatdan o'tkazish (dekorator)"""
+    def decorator(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def _job_data(kind: str, delay: float, payload: dict) -> dict:
+    return {
+        "kind": kind,
+        "payload": Json(payload),
+        "runAt": _utcnow() + timedelta(seconds=delay),
+    }
+
+
+async def schedule(kind: str, delay: float, **payload):
+    """Bitta vazifani ``delay`` sekunddan keyin bajarilishga rejalashtirish"""
+    return await db.job.create(data=_job_data(kind, delay, payload))
+
+
+async def schedule_many(*jobs):
+    """Bir nechta vazifani bitta so'rovda rejalashtirish.
+
+    Har bir element ``(kind, delay, payload)`` ko'rinishida bo'ladi.
+    """
+    return await db.job.create_many(data=[_job_data(kind, delay, payload) for kind, delay, payload in jobs])
+
+
+async def _claim_due_jobs():
+    rows = await db.query_raw(CLAIM_SQL, BATCH_SIZE, LOCK_TIMEOUT)
+    for row in rows:
+        if isinstance(row["payload"], str):
+            row["payload"] = json.loads(row["payload"])
+    return rows
+
+
+async def _run_job(row: dict):
+    job_id = row["id"]
+    handler = _handlers.get(row["kind"])
+
+    try:
+        if handler is None:
+            raise LookupError(f"'{row['kind']}' turi uchun handler yo'q")
+        await handler(**row["payload"])
+    except Exception as e:
+        logging.error(f"Vazifa #{job_id} ({row['kind']}) bajarilmadi: {e}")
+        if row["attempts"] >= MAX_ATTEMPTS or handler is None:
+            await db.job.update(
+                where={"id": job_id},
+                data={"status": "failed", "lastError": str(e)}
+            )
+        else:
+            await db.job.update(
+                where={"id": job_id},
+                data={
+                    "status": "pending",
+                    "lastError": str(e),
+                    "runAt": _utcnow() + timedelta(seconds=RETRY_DELAY * row["attempts"])
+                }
+            )
+        return
+
+    await db.job.delete(where={"id": job_id})
+
+
+async def _poll():
+    logging.info("Vazifalar rejalashtiruvchisi ishga tushdi")
+    while True:
+        try:
+            rows = await _claim_due_jobs()
+            if rows:
+                await asyncio.gather(*(_run_job(row) for row in rows))
+            # Partiya to'la bo'lsa, navbatda yana vazifalar bor - kutmasdan davom etamiz
+            if len(rows) >= BATCH_SIZE:
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Vazifalarni olishda xato: {e}")
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+def start_scheduler():
+    """Pollerni ishga tushirish (db.connect() dan keyin chaqiriladi)"""
+    global _poller
+    if _poller is None or _poller.done():
+        _poller = asyncio.create_task(_poll())
+
+
+async def stop_scheduler():
+    global _poller
+    if _poller is None:
+        return
+    _poller.cancel()
+    try:
+        await _poller
+    except asyncio.CancelledError:
+        pass
+    _poller = None
@@ -0,0 +1,334 @@
+"""Ko'p jarayonli (sharded) rejim: bitta qabul qiluvchi + N ta ishchi jarayon.
+
+Supervisor jarayoni Telegramdan updatelarni (getUpdates) oladi va ularni
+foydalanuvchi ID si bo'yicha ishchilarga taqsimlaydi: bitta foydalanuvchining
+barcha updatelari doim bitta ishchiga tushadi. Ishchi ichida ham bitta
+foydalanuvchi updatelari navbat bilan, turli foydalanuvchilarniki esa
+parallel bajariladi - shuning uchun har bir foydalanuvchi uchun tartib
+saqlanadi, handlerlarning CPU ishi esa barcha yadrolarga taqsimlanadi.
+
+Ishchilar bitta bazani va diskdagi FSM storage ni bo'lishadi. Foydalanuvchi
+keshlari (FSM, profil, kanal a'zoligi) ham shard bo'yicha bo'linadi, umumiy
+keshlar (katalog, adminlar ro'yxati) esa ``broadcast`` orqali barcha
+ishchilarda yangilanadi. Telegram limitlari ishchilar soniga bo'linadi.
+
+Bot faqat barcha ishchilar ishga tushib bo'lgandan keyin update qabul qila
+boshlaydi. Orphan tozalash kabi bir martalik ishlar faqat birinchi ishchida
+(``is_primary()``) bajariladi.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aiogram import Bot, Dispatcher, types
+from dotenv import load_dotenv
+
+START_TIMEOUT = 120  # ishchi ishga tushishini kutish (sekundlarda)
+POLL_TIMEOUT = 20  # getUpdates long-polling
+
+# Ishchilar orasida bo'linadigan Telegram limitlari (nomi, standart qiymati)
+SHARED_LIMITS = (("OUTBOX_GLOBAL_RATE", 30), ("OUTBOX_GROUP_PER_MINUTE", 20))
+
+# Ishchi holati (supervisor va oddiy rejimda o'zgarmaydi)
+_primary = True
+_index: Optional[int] = None
+_control = None
+_broadcast_handlers: Dict[str, Callable[..., Any]] = {}
+
+
+def shard_key(update: dict) -> int:
+    """Update qaysi foydalanuvchiga tegishli (bo'lmasa chat ID si)"""
+    member = update.get("chat_member") or update.get("my_chat_member")
+    if member:
+        # A'zolik keshi shu foydalanuvchining buyurtmalarini bajaradigan ishchida turadi
+        return member["new_chat_member"]["user"]["id"]
+    for kind in ("message", "edited_message", "callback_query", "inline_query", "channel_post",
+                 "edited_channel_post", "chosen_inline_result", "shipping_query", "pre_checkout_query",
+                 "poll_answer", "chat_join_request"):
+        event = update.get(kind)
+        if not event:
+            continue
+        sender = event.get("from") or event.get("user")
+        if sender:
+            return sender["id"]
+        chat = event.get("chat") or (event.get("message") or {}).get("chat")
+        if chat:
+            return chat["id"]
+    return update["update_id"]
+
+
+def is_primary() -> bool:
+    """Bir martalik ishga tushirish vazifalari shu jarayonda bajariladimi"""
+    return _primary
+
+
+def shard_index() -> Optional[int]:
+    return _index
+
+
+def on_broadcast(kind: str):
+    """Boshqa ishchidan kelgan ``broadcast`` uchun handler (dekorator)"""
+    def decorator(func):
+        _broadcast_handlers[kind] = func
+        return func
+    return decorator
+
+
+def broadcast(kind: str, *args):
+    """Qolgan ishchilarga xabar berish (masalan, keshni tashlash). Oddiy rejimda hech narsa qilmaydi"""
+    if _control is not None:
+        _control.put((_index, kind, args))
+
+
+def _handle_broadcast(kind: str, args: tuple):
+    handler = _broadcast_handlers.get(kind)
+    if handler is None:
+        logging.warning(f"Shard {_index}: noma'lum broadcast {kind}")
+        return
+    try:
+        handler(*args)
+    except Exception as e:
+        logging.error(f"Shard {_index}: broadcast {kind} xato: {e}")
+
+
+class _Lanes:
+    """Bitta kalit (foydalanuvchi) updatelari ketma-ket, turli kalitlarniki parallel"""
+
+    def __init__(self, dispatcher: Dispatcher, concurrency: int, capacity: int):
+        self.dispatcher = dispatcher
+        self._tails: Dict[int, asyncio.Task] = {}
+        self._running = asyncio.Semaphore(concurrency)
+        self._capacity = asyncio.Semaphore(capacity)
+
+    async def submit(self, key: int, update: types.Update):
+        await self._capacity.acquire()
+        task = asyncio.create_task(self._run(update, self._tails.get(key)))
+        self._tails[key] = task
+        task.add_done_callback(lambda done: self._done(key, done))
+
+    def _done(self, key: int, task: asyncio.Task):
+        self._capacity.release()
+        if self._tails.get(key) is task:
+            del self._tails[key]
+
+    async def _run(self, update: types.Update, previous: Optional[asyncio.Task]):
+        if previous is not None:
+            await asyncio.wait([previous])
+        async with self._running:
+            try:
+                await self.dispatcher.process_update(update)
+            except Exception as e:
+                logging.error(f"Update {update.update_id} ni qayta ishlashda xato: {e}")
+
+    async def drain(self):
+        # Har bir kalitning oxirgi vazifasi oldingilarini kutadi
+        if self._tails:
+            await asyncio.wait(set(self._tails.values()))
+
+
+async def serve_shard(dispatcher: Dispatcher, inbox, concurrency: int = 16, capacity: int = 1000):
+    """Ishchi tsikli: ``inbox`` dan updatelarni olib bajarish (``None`` kelguncha)"""
+    Bot.set_current(dispatcher.bot)
+    Dispatcher.set_current(dispatcher)
+    lanes = _Lanes(dispatcher, concurrency, capacity)
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            item = await loop.run_in_executor(None, inbox.get, True, 1)
+        except queue.Empty:
+            parent = multiprocessing.parent_process()
+            if parent is not None and not parent.is_alive():
+                logging.error(f"Shard {_index}: supervisor to'xtab qoldi, ishchi yopilmoqda")
+                break
+            continue
+        if item is None:
+            break
+        tag, key, payload = item
+        if tag == "update":
+            await lanes.submit(key, types.Update(**payload))
+        else:
+            _handle_broadcast(key, payload)
+    await lanes.drain()
+
+
+def _share_limits(workers: int):
+    # Ishchilar modullarni import qilishdan oldin o'qiydi, shuning uchun spawn dan oldin o'rnatiladi
+    load_dotenv()
+    for name, default in SHARED_LIMITS:
+        os.environ[name] = str(float(os.getenv(name, default)) / workers)
+
+
+def _setup_worker(index: int, control, primary: bool):
+    global _primary, _index, _control
+    _primary, _index, _control = primary, index, control
+    # To'xtatishni supervisor boshqaradi (inbox ga None yuboradi)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+
+def _app_worker(index: int, total: int, inbox, control, ready, primary: bool,
+                on_startup: Callable, on_shutdown: Callable, concurrency: int):
+    """Botning ishchi jarayoni (handlerlar, baza ulanishi va keshlar shu yerda)"""
+    _setup_worker(index, control, primary)
+    from loader import bot, dp
+
+    async def main():
+        Bot.set_current(bot)
+        Dispatcher.set_current(dp)
+        await on_startup(dp)
+        ready.put(index)
+        try:
+            await serve_shard(dp, inbox, concurrency)
+        finally:
+            await on_shutdown(dp)
+            await dp.storage.close()
+            await dp.storage.wait_closed()
+            session = await bot.get_session()
+            await session.close()
+
+    asyncio.run(main())
+
+
+class Supervisor:
+    """Updatelarni qabul qilib, ``shard_key`` bo'yicha ishchi jarayonlarga taqsimlash"""
+
+    def __init__(self, token: str, workers: int, target: Callable, args: Tuple = (),
+                 allowed_updates: Optional[List[str]] = None, skip_updates: bool = False, server=None):
+        self.token = token
+        self.workers = max(1, workers)
+        self.target = target
+        self.args = args
+        self.allowed_updates = allowed_updates
+        self.skip_updates = skip_updates
+        self.server = server
+        self.ready = asyncio.Event()
+        self._context = multiprocessing.get_context("spawn")
+        self._inboxes = [self._context.Queue() for _ in range(self.workers)]
+        self._control = self._context.Queue()
+        self._started = self._context.Queue()
+        self._processes: List[Optional[multiprocessing.Process]] = [None] * self.workers
+        self._stopping = False
+        self._poller: Optional[asyncio.Task] = None
+
+    def _spawn(self, index: int, primary: bool):
+        process = self._context.Process(
+            target=self.target,
+            args=(index, self.workers, self._inboxes[index], self._control, self._started, primary, *self.args),
+            name=f"bot-shard-{index}",
+            daemon=False
+        )
+        process.start()
+        self._processes[index] = process
+
+    async def _wait_started(self, count: int):
+        loop = asyncio.get_running_loop()
+        for _ in range(count):
+            index = await loop.run_in_executor(None, self._started.get, True, START_TIMEOUT)
+            logging.info(f"Shard {index} tayyor")
+
+    async def _forward_broadcasts(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                origin, kind, args = await loop.run_in_executor(None, self._control.get, True, 1)
+            except queue.Empty:
+                continue
+            for index, inbox in enumerate(self._inboxes):
+                if index != origin:
+                    inbox.put(("broadcast", kind, args))
+
+    async def _respawn_dead(self):
+        for index, process in enumerate(self._processes):
+            if process is not None and process.exitcode is not None and not self._stopping:
+                logging.error(f"Shard {index} to'xtab qoldi (exitcode {process.exitcode}), qayta ishga tushirilmoqda")
+                # Qayta ishga tushgan ishchi bir martalik vazifalarni takrorlamaydi
+                self._spawn(index, primary=False)
+                await self._wait_started(1)
+
+    async def _poll(self, bot: Bot):
+        offset = None
+        if self.skip_updates:
+            pending = await bot.get_updates(offset=-1, timeout=1)
+            if pending:
+                offset = pending[-1].update_id + 1
+
+        while not self._stopping:
+            await self._respawn_dead()
+            try:
+                updates = await bot.get_updates(offset=offset, timeout=POLL_TIMEOUT,
+                                                allowed_updates=self.allowed_updates)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"getUpdates xato: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            for update in updates:
+                data = update.to_python()
+                key = shard_key(data)
+                self._inboxes[key % self.workers].put(("update", key, data))
+                offset = update.update_id + 1
+
+    async def serve(self):
+        """Ishchilarni ko'tarish, ular tayyor bo'lgach updatelarni taqsimlash"""
+        _share_limits(self.workers)
+        for index in range(self.workers):
+            self._spawn(index, primary=index == 0)
+        await self._wait_started(self.workers)
+        logging.info(f"{self.workers} ta shard ishga tushdi, updatelar qabul qilinmoqda")
+
+        bot = Bot(self.token, server=self.server) if self.server else Bot(self.token)
+        forwarder = asyncio.create_task(self._forward_broadcasts())
+        try:
+            await bot.delete_webhook()
+            self.ready.set()
+            self._poller = asyncio.create_task(self._poll(bot))
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+        finally:
+            forwarder.cancel()
+            await self._shutdown_workers()
+            session = await bot.get_session()
+            await session.close()
+
+    def stop(self):
+        self._stopping = True
+        if self._poller is not None:
+            self._poller.cancel()
+
+    async def _shutdown_workers(self, timeout: float = 30):
+        for inbox in self._inboxes:
+            inbox.put(None)
+        loop = asyncio.get_running_loop()
+        for index, process in enumerate(self._processes):
+            if process is None:
+                continue
+            await loop.run_in_executor(None, process.join, timeout)
+            if process.exitcode is None:
+                logging.warning(f"Shard {index} {timeout} sekundda to'xtamadi, majburan o'chirilmoqda")
+                process.terminate()
+
+    def run(self):
+        async def main():
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, self.stop)
+            await self.serve()
+
+        asyncio.run(main())
+
+
+def run_sharded(token: str, workers: int, on_startup: Callable, on_shutdown: Callable, concurrency: int = 16,
+                allowed_updates: Optional[List[str]] = None, skip_updates: bool = False):
+    """Botni ``workers`` ta ishchi jarayonda ishga tushirish (polling)"""
+    Supervisor(
+        token, workers, _app_worker, (on_startup, on_shutdown, concurrency),
+        allowed_updates=allowed_updates, skip_updates=skip_updates
+    ).run()
@@ -0,0 +1,132 @@
+"""Bot ishga tushishi: bazaga ulanish va isitish (warm-up).
+
+Avval baza ulanadi - qolgan barcha bosqichlar unga bog'liq. So'ng katalog,
+adminlar ro'yxati, kanal ma'lumotlari, Prisma query engine, statik
+klaviaturalar va modullarning tozalash vazifalari parallel bajariladi.
+Har bir bosqich vaqti logga yoziladi; isitish bosqichidagi xato botni
+to'xtatmaydi (o'sha ma'lumot birinchi so'rovda odatdagidek yuklanadi).
+
+``run_startup`` ``on_startup`` ichida kutiladi: aiogram polling ni ham,
+webhook serveri esa ``set_webhook`` ni ham undan keyin boshlaydi, shuning
+uchun deploydan keyingi birinchi foydalanuvchilar "sovuq" yo'lga tushmaydi.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import date
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from dotenv import load_dotenv
+
+from keyboards import admin_btns, defaultbtns, edit_profile, order_btns
+from loader import db
+from utils import callback_codec as codec
+from utils.channel_info import load_channel_url
+from utils.db_api.catalog import get_catalog
+from utils.notify_admins import get_admin_ids
+from utils.set_bot_commands import set_default_commands
+
+load_dotenv()
+PHASE_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", 30))  # sekundlarda, har bir bosqich uchun
+
+Step = Callable[[], Awaitable[None]]
+
+
+class Phase(NamedTuple):
+    name: str
+    seconds: float
+    ok: bool
+    error: Optional[str]
+
+
+_phases: List[Phase] = []
+_ready = False
+
+
+async def _run_phase(name: str, step: Step) -> Phase:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(step(), PHASE_TIMEOUT)
+    except Exception as e:
+        phase = Phase(name, time.perf_counter() - started, False, str(e) or type(e).__name__)
+        logging.error(f"Startup: {name} bosqichida xato ({phase.seconds * 1000:.0f} ms): {phase.error}")
+    else:
+        phase = Phase(name, time.perf_counter() - started, True, None)
+        logging.info(f"Startup: {name} - {phase.seconds * 1000:.0f} ms")
+    _phases.append(phase)
+    return phase
+
+
+async def _warm_catalog():
+    await get_catalog()
+
+
+async def _warm_admin_roster():
+    await get_admin_ids()
+
+
+async def _warm_channel():
+    await load_channel_url()
+
+
+async def _warm_query_engine():
+    # Model so'rovi va raw so'rov yo'llarini birinchi marta ishga tushirish
+    await db.user.count()
+    await db.query_raw("SELECT 1")
+
+
+async def _warm_keyboards():
+    # prebuilt klaviaturalar birinchi chaqiruvda yig'ilib keshlanadi
+    for build in (
+        defaultbtns.get_role_keyboard, defaultbtns.get_phone_keyboard,
+        defaultbtns.get_driver_keyboard, defaultbtns.get_passenger_keyboard,
+        edit_profile.get_profile_keyboard, edit_profile.get_back_to_profile_keyboard,
+        admin_btns.admin_main_menu, admin_btns.cancel_keyboard,
+        admin_btns.confirmation_keyboard, admin_btns.region_main_keyboard,
+        order_btns.passengers_markup, order_btns.package_types_markup, order_btns.package_sizes_markup
+    ):
+        build()
+    order_btns.dates_markup(date.today())
+
+    catalog = await get_catalog()
+    for action in (codec.TRIP_FROM_REGION, codec.DELIVERY_FROM_REGION):
+        order_btns.regions_markup(catalog, action)
+
+
+async def run_startup(dispatcher, tasks: Optional[Dict[str, Step]] = None) -> List[Phase]:
+    """Bazaga ulanish, so'ng isitish va ``tasks`` (masalan, modullar tozalashi) parallel"""
+    global _ready
+    started = time.perf_counter()
+
+    connect = await _run_phase("db.connect", db.connect)
+    if not connect.ok:
+        raise RuntimeError(f"Bazaga ulanib bo'lmadi: {connect.error}")
+
+    steps: Dict[str, Step] = {
+        "catalog": _warm_catalog,
+        "admin_roster": _warm_admin_roster,
+        "channel": _warm_channel,
+        "query_engine": _warm_query_engine,
+        "keyboards": _warm_keyboards,
+        "bot_commands": lambda: set_default_commands(dispatcher),
+        **(tasks or {})
+    }
+    await asyncio.gather(*(_run_phase(name, step) for name, step in steps.items()))
+
+    _ready = True
+    failed = [phase.name for phase in _phases if not phase.ok]
+    logging.info(
+        f"Startup tugadi: {(time.perf_counter() - started) * 1000:.0f} ms"
+        + (f", xatolar: {', '.join(failed)}" if failed else "")
+    )
+    return list(_phases)
+
+
+def is_ready() -> bool:
+    return _ready
+
+
+def startup_report() -> List[Phase]:
+    """Oxirgi ishga tushirish bosqichlari va ularning vaqti"""
+    return list(_phases)
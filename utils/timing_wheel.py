@@ -0,0 +1,106 @@
+"""Ierarxik xeshlangan vaqt g'ildiragi (hierarchical hashed timing wheel).
+
+Minglab bir xil muddatli taymerlarni har biri uchun alohida korutina
+ochmasdan ushlab turish uchun. Qo'shish va bekor qilish O(1), har bir tick
+faqat bitta katakni (slot) ko'rib chiqadi.
+"""
+import math
+import time
+from typing import Any, Dict, Hashable, Iterator, List, Tuple
+
+
+class TimingWheel:
+    """Kalit -> muddat yozuvlarini saqlovchi vaqt g'ildiragi.
+
+    ``levels`` ta g'ildirak, har birida ``slots`` ta katak. 0-daraja katagi
+    bitta tick, 1-daraja katagi ``slots`` tick va h.k. Yuqori darajadagi
+    yozuvlar o'z vaqti yaqinlashganda pastki darajaga tushiriladi (cascade).
+    Eng yuqori daraja sig'imidan uzoq muddatlar ham o'sha darajada aylanib turadi.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 64, levels: int = 2):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self._wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        # Kalit qaysi katakda turganini bilish - bekor qilish O(1) bo'lishi uchun
+        self._buckets: Dict[Hashable, dict] = {}
+        self._ticks = 0
+        self._started = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._buckets
+
+    def _place(self, key: Hashable, deadline: int, value: Any):
+        remaining = deadline - self._ticks
+        for level in range(self.levels):
+            span = self.slots ** level
+            if remaining < span * self.slots or level == self.levels - 1:
+                bucket = self._wheels[level][(deadline // span) % self.slots]
+                bucket[key] = (deadline, value)
+                self._buckets[key] = bucket
+                return
+
+    def add(self, key: Hashable, delay: float, value: Any = None):
+        """``delay`` sekunddan keyin muddati tugaydigan yozuv qo'shish (mavjudini almashtiradi)"""
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick))
+        self._place(key, self._ticks + ticks, value)
+
+    def cancel(self, key: Hashable) -> bool:
+        """Yozuvni olib tashlash. Yozuv bo'lgan bo'lsa True qaytaradi"""
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            return False
+        del bucket[key]
+        return True
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return default
+        return bucket[key][1]
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        for key, bucket in self._buckets.items():
+            yield key, bucket[key][1]
+
+    def _advance_one(self, expired: List[Tuple[Hashable, Any]]):
+        self._ticks += 1
+        now = self._ticks
+
+        # Yuqori darajalardan muddati yaqinlashgan yozuvlarni pastga tushirish
+        for level in range(self.levels - 1, 0, -1):
+            span = self.slots ** level
+            if now % span:
+                continue
+            index = (now // span) % self.slots
+            bucket = self._wheels[level][index]
+            if not bucket:
+                continue
+            self._wheels[level][index] = {}
+            for key, (deadline, value) in bucket.items():
+                self._place(key, deadline, value)
+
+        index = now % self.slots
+        bucket = self._wheels[0][index]
+        if not bucket:
+            return
+        self._wheels[0][index] = {}
+        for key, (deadline, value) in bucket.items():
+            if deadline <= now:
+                del self._buckets[key]
+                expired.append((key, value))
+            else:
+                self._place(key, deadline, value)
+
+    def advance(self) -> List[Tuple[Hashable, Any]]:
+        """G'ildirakni joriy vaqtgacha aylantirib, muddati tugagan yozuvlarni qaytarish"""
+        target = int((time.monotonic() - self._started) / self.tick)
+        expired: List[Tuple[Hashable, Any]] = []
+        while self._ticks < target:
+            self._advance_one(expired)
+        return expired
@@ -1,10 +1,13 @@
-import asyncio
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-from loader import dp, db, bot
+from loader import db
 import logging
 from dotenv import load_dotenv
 import os
-from datetime import datetime
+
+from utils import outbox
+from utils.outbox import Priority
+from utils.scheduler import job_handler, schedule_many
+from utils.db_api.lifecycle import transition
 
 load_dotenv()
 BOT_USERNAME = os.getenv("BOT_USERNAME")
@@ -12,113 +15,88 @@ BOT_USERNAME = os.getenv("BOT_USERNAME")
 ORDER_EXPIRY_TIME = int(os.getenv("ORDER_EXPIRY_TIME", 1200))
 ORDER_REMINDER_TIME = int(os.getenv("ORDER_REMINDER_TIME", 900))
 
-async def send_order_reminder(order_id: int, user_id: str):
-    """Buyurtma eslatmasini yuborish va avtomatik bekor qilish."""
+ORDER_REMINDER = "order_reminder"
+ORDER_EXPIRY = "order_expiry"
+
+
+def _order_details(order) -> str:
+    """Eslatma xabarlari uchun buyurtma ma'lumotlari"""
+    departure_time_str = "Belgilanmagan"
+    if order.departureTime:
+        try:
+            departure_time_str = order.departureTime.strftime('%Y-%m-%d %H:%M')
+        except AttributeError:
+            departure_time_str = "Noto'g'ri format"
+
+    from_district = order.fromDistrict.name if order.fromDistrict else "Noma'lum"
+    to_district = order.toDistrict.name if order.toDistrict else "Noma'lum"
+    passengers_count = getattr(order, 'passengers', 1)
+
+    return (
+        f"📋 *Buyurtma ma'lumotlari:*\n"
+        f"📍 Qayerdan: {from_district}\n"
+        f"📍 Qayerga: {to_district}\n"
+        f"🕒 Chiqish vaqti: {departure_time_str}\n"
+        f"👥 Yo'lovchilar soni: {passengers_count}\n\n"
+    )
+
+
+async def send_order_reminder(order_id: int, user_id: int):
+    """Buyurtma uchun eslatma va avtomatik bekor qilish vazifalarini rejalashtirish.
+
+    Vazifalar bazada saqlanadi, shuning uchun bot qayta ishga tushsa ham bajariladi.
+    """
+    payload = {"order_id": order_id, "user_id": user_id}
     try:
-        order = await db.order.find_unique(
-            where={"id": order_id}, 
-            include={"status": True, "fromDistrict": True, "toDistrict": True}
-        )
-        
-        if not order or (order.status and order.status.status != "initiated"):
-            return
-
-        # DepartureTime ni tekshirish va formatlash
-        departure_time_str = "Belgilanmagan"
-        if order.departureTime:
-            try:
-                departure_time_str = order.departureTime.strftime('%Y-%m-%d %H:%M')
-            except AttributeError:
-                departure_time_str = "Noto'g'ri format"
-        
-        # District nomlarini olish
-        from_district = order.fromDistrict.name if order.fromDistrict else "Noma'lum"
-        to_district = order.toDistrict.name if order.toDistrict else "Noma'lum"
-        
-        # Passengers sonini olish (agar mavjud bo'lsa)
-        passengers_count = getattr(order, 'passengers', 1)
-        
-        keyboard = InlineKeyboardMarkup(row_width=2)
-        keyboard.add(
-            InlineKeyboardButton("✅ Complete", callback_data=f"complete_order_{order_id}"),
-            InlineKeyboardButton("❌ Cancel", callback_data=f"cancel_order_{order_id}")
-        )
-        
-        await asyncio.sleep(ORDER_REMINDER_TIME)
-        
-        updated_order = await db.order.find_unique(
-            where={"id": order_id}, 
-            include={"status": True, "fromDistrict": True, "toDistrict": True}
+        await schedule_many(
+            (ORDER_REMINDER, ORDER_REMINDER_TIME, payload),
+            (ORDER_EXPIRY, ORDER_EXPIRY_TIME, payload),
         )
-        
-        if updated_order and updated_order.status and updated_order.status.status == "initiated":
-            # Yangilangan ma'lumotlarni olish
-            updated_from_district = updated_order.fromDistrict.name if updated_order.fromDistrict else "Noma'lum"
-            updated_to_district = updated_order.toDistrict.name if updated_order.toDistrict else "Noma'lum"
-            
-            # DepartureTime ni yangilangan holda tekshirish
-            updated_departure_time_str = "Belgilanmagan"
-            if updated_order.departureTime:
-                try:
-                    updated_departure_time_str = updated_order.departureTime.strftime('%Y-%m-%d %H:%M')
-                except AttributeError:
-                    updated_departure_time_str = "Noto'g'ri format"
-            
-            updated_passengers_count = getattr(updated_order, 'passengers', 1)
-            
-            await bot.send_message(
-                user_id,
-                (
-                    f"📋 *Buyurtma ma'lumotlari:*\n"
-                    f"📍 Qayerdan: {updated_from_district}\n"
-                    f"📍 Qayerga: {updated_to_district}\n"
-                    f"🕒 Chiqish vaqti: {updated_departure_time_str}\n"
-                    f"👥 Yo'lovchilar soni: {updated_passengers_count}\n\n"
-                    "⏳ Buyurtmangiz hali tasdiqlanmagan. Iltimos, 'Complete' yoki 'Cancel' tugmalaridan birini bosing."
-                ),
-                reply_markup=keyboard,
-                parse_mode="Markdown"
-            )
-            
-        await asyncio.sleep(ORDER_EXPIRY_TIME - ORDER_REMINDER_TIME)
-        
-        final_order = await db.order.find_unique(
-            where={"id": order_id}, 
-            include={"status": True, "fromDistrict": True, "toDistrict": True}
-        )
-        
-        if final_order and final_order.status and final_order.status.status == "initiated":
-            await db.orderstatus.update(
-                where={"orderId": order_id},
-                data={"status": "canceled"}
-            )
-            
-            # Final ma'lumotlarni olish
-            final_from_district = final_order.fromDistrict.name if final_order.fromDistrict else "Noma'lum"
-            final_to_district = final_order.toDistrict.name if final_order.toDistrict else "Noma'lum"
-            
-            final_departure_time_str = "Belgilanmagan"
-            if final_order.departureTime:
-                try:
-                    final_departure_time_str = final_order.departureTime.strftime('%Y-%m-%d %H:%M')
-                except AttributeError:
-                    final_departure_time_str = "Noto'g'ri format"
-            
-            final_passengers_count = getattr(final_order, 'passengers', 1)
-            
-            await bot.send_message(
-                user_id,
-                (
-                    f"📋 *Buyurtma ma'lumotlari:*\n"
-                    f"📍 Qayerdan: {final_from_district}\n"
-                    f"📍 Qayerga: {final_to_district}\n"
-                    f"🕒 Chiqish vaqti: {final_departure_time_str}\n"
-                    f"👥 Yo'lovchilar soni: {final_passengers_count}\n\n"
-                    f"❌ Buyurtmangiz {ORDER_EXPIRY_TIME//60} daqiqa ichida tasdiqlanmadi va avtomatik bekor qilindi."
-                ),
-                reply_markup=None,
-                parse_mode="Markdown"
-            )
-    
     except Exception as e:
-        logging.error(f"Order reminder error: {e}")
\ No newline at end of file
+        logging.error(f"Buyurtma #{order_id} uchun vazifalarni rejalashtirishda xato: {e}")
+
+
+@job_handler(ORDER_REMINDER)
+async def remind_order(order_id: int, user_id: int):
+    """Hali tasdiqlanmagan buyurtma haqida foydalanuvchiga eslatma"""
+    order = await db.order.find_unique(
+        where={"id": order_id},
+        include={"status": True, "fromDistrict": True, "toDistrict": True}
+    )
+
+    if not order or not order.status or order.status.status != "initiated":
+        return
+
+    keyboard = InlineKeyboardMarkup(row_width=2)
+    keyboard.add(
+        InlineKeyboardButton("✅ Complete", callback_data=f"complete_order_{order_id}"),
+        InlineKeyboardButton("❌ Cancel", callback_data=f"cancel_order_{order_id}")
+    )
+
+    await outbox.send_message(
+        user_id,
+        _order_details(order) +
+        "⏳ Buyurtmangiz hali tasdiqlanmagan. Iltimos, 'Complete' yoki 'Cancel' tugmalaridan birini bosing.",
+        priority=Priority.REMINDER,
+        reply_markup=keyboard,
+        parse_mode="Markdown"
+    )
+
+
+@job_handler(ORDER_EXPIRY)
+async def expire_order(order_id: int, user_id: int):
+    """Belgilangan vaqt ichida tasdiqlanmagan buyurtmani bekor qilish"""
+    # Faqat hali "initiated" holatidagi buyurtma bekor qilinadi va shu so'rovning o'zida qaytadi
+    order = await transition(order_id, "expire")
+    if not order:
+        return
+
+    logging.info(f"Buyurtma #{order_id} tasdiqlanmagani uchun avtomatik bekor qilindi")
+    await outbox.send_message(
+        user_id,
+        _order_details(order) +
+        f"❌ Buyurtmangiz {ORDER_EXPIRY_TIME//60} daqiqa ichida tasdiqlanmadi va avtomatik bekor qilindi.",
+        priority=Priority.REMINDER,
+        reply_markup=None,
+        parse_mode="Markdown"
+    )
@@ -0,0 +1,129 @@
+"""Webhook rejimi: aiohttp server + navbat + N ta ishchi.
+
+Telegram so'rovi kelishi bilan update navbatga qo'yiladi va darhol 200
+qaytariladi - handlerlar ``workers`` ta ishchi korutinada bajariladi.
+Navbat to'lib qolsa 503 qaytariladi va Telegram updateni keyinroq qayta
+yuboradi (hech narsa yo'qolmaydi).
+"""
+import asyncio
+import logging
+import ssl
+from typing import Awaitable, Callable, List, Optional
+
+from aiogram import Bot, Dispatcher, types
+from aiohttp import web
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+Hook = Callable[[Dispatcher], Awaitable[None]]
+
+
+class WebhookServer:
+    """Webhook so'rovlarini qabul qilib, updatelarni ishchilarga taqsimlash"""
+
+    def __init__(self, dispatcher: Dispatcher, path: str = "/webhook", workers: int = 16,
+                 queue_size: int = 1000, secret_token: Optional[str] = None):
+        self.dispatcher = dispatcher
+        self.path = path
+        self.workers = workers
+        self.secret_token = secret_token or None
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._tasks: List[asyncio.Task] = []
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        if self.secret_token and request.headers.get(SECRET_HEADER) != self.secret_token:
+            return web.Response(status=403)
+
+        try:
+            update = types.Update(**(await request.json()))
+        except Exception as e:
+            logging.error(f"Webhook: noto'g'ri update: {e}")
+            return web.Response(status=400)
+
+        try:
+            self._queue.put_nowait(update)
+        except asyncio.QueueFull:
+            logging.warning(f"Webhook navbati to'lgan ({self._queue.maxsize}), update {update.update_id} qaytarildi")
+            return web.Response(status=503)
+        return web.Response()
+
+    async def _worker(self):
+        while True:
+            update = await self._queue.get()
+            try:
+                await self.dispatcher.process_update(update)
+            except Exception as e:
+                logging.error(f"Update {update.update_id} ni qayta ishlashda xato: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def start(self):
+        # Ishchilar shu kontekstni meros qilib oladi (Bot.get_current() va h.k.)
+        Bot.set_current(self.dispatcher.bot)
+        Dispatcher.set_current(self.dispatcher)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 10):
+        """Navbatdagi updatelarni tugatib, ishchilarni to'xtatish"""
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"Webhook: {self._queue.qsize()} ta update qayta ishlanmay qoldi")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self._handle)
+        return app
+
+
+def start_webhook(dispatcher: Dispatcher, *, webhook_url: str, path: str, host: str, port: int,
+                  workers: int = 16, queue_size: int = 1000, ssl_cert: Optional[str] = None,
+                  ssl_key: Optional[str] = None, secret_token: Optional[str] = None,
+                  allowed_updates: Optional[List[str]] = None,
+                  on_startup: Optional[Hook] = None, on_shutdown: Optional[Hook] = None):
+    """Botni webhook rejimida ishga tushirish.
+
+    ``ssl_cert``/``ssl_key`` berilsa server HTTPS da ishlaydi va sertifikat
+    Telegramga yuklanadi (self-signed uchun). Berilmasa oddiy HTTP - lokal
+    test yoki TLS ni reverse proxy tugatadigan holat uchun.
+    """
+    server = WebhookServer(dispatcher, path, workers, queue_size, secret_token)
+    app = server.make_app()
+
+    async def _startup(_):
+        await server.start()
+        if on_startup:
+            await on_startup(dispatcher)
+        certificate = types.InputFile(ssl_cert) if ssl_cert else None
+        await dispatcher.bot.set_webhook(
+            webhook_url,
+            certificate=certificate,
+            secret_token=secret_token or None,
+            allowed_updates=allowed_updates,
+            drop_pending_updates=False
+        )
+        logging.info(f"Webhook o'rnatildi: {webhook_url} ({workers} ta ishchi, navbat {queue_size})")
+
+    async def _shutdown(_):
+        # Webhook o'chirilmaydi - restart paytida Telegram updatelarni saqlab turadi
+        await server.stop()
+        if on_shutdown:
+            await on_shutdown(dispatcher)
+        await dispatcher.storage.close()
+        await dispatcher.storage.wait_closed()
+        session = await dispatcher.bot.get_session()
+        await session.close()
+
+    app.on_startup.append(_startup)
+    app.on_shutdown.append(_shutdown)
+
+    ssl_context = None
+    if ssl_cert and ssl_key:
+        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_context.load_cert_chain(ssl_cert, ssl_key)
+
+    web.run_app(app, host=host, port=port, ssl_context=ssl_context)